@@ -0,0 +1,50 @@
+from sqlalchemy import select, insert, delete, func, literal, case
+from .modelo import Livro, EstatisticaGeral, EstatisticaAvaliacao, EstatisticaCategoria, EstatisticaCluster
+from .ml import rating_map
+
+
+def avaliacao_numerica(coluna):
+    """
+    Converte no próprio banco a avaliação textual ("One" a "Five") no valor da
+    coluna 'avaliacao_num' (0 se desconhecida), usado pela carga do banco.
+    """
+    return case(rating_map, value=coluna, else_=0)
+
+
+def recalcular_agregados(db):
+    """
+    Recalcula as tabelas de estatísticas a partir da tabela 'livros'.
+
+    Deve ser chamada pela carga dentro da mesma transação que altera os livros,
+    para que as rotas de estatísticas leiam apenas poucas linhas já prontas.
+    """
+    db.execute(delete(EstatisticaGeral))
+    db.execute(delete(EstatisticaAvaliacao))
+    db.execute(delete(EstatisticaCategoria))
+    db.execute(delete(EstatisticaCluster))
+
+    db.execute(insert(EstatisticaGeral).from_select(
+        ["id", "total_livros", "preco_medio"],
+        select(literal(1), func.count(Livro.id), func.avg(Livro.preco)),
+    ))
+
+    db.execute(insert(EstatisticaAvaliacao).from_select(
+        ["avaliacao", "total_livros"],
+        select(Livro.avaliacao, func.count(Livro.id))
+        .where(Livro.avaliacao.is_not(None))
+        .group_by(Livro.avaliacao),
+    ))
+
+    db.execute(insert(EstatisticaCategoria).from_select(
+        ["categoria", "total_livros", "preco_medio"],
+        select(Livro.categoria, func.count(Livro.id), func.avg(Livro.preco))
+        .where(Livro.categoria.is_not(None))
+        .group_by(Livro.categoria),
+    ))
+
+    db.execute(insert(EstatisticaCluster).from_select(
+        ["cluster", "total_livros", "preco_medio", "avaliacao_media"],
+        select(Livro.cluster, func.count(Livro.id), func.avg(Livro.preco), func.avg(Livro.avaliacao_num))
+        .where(Livro.cluster.is_not(None))
+        .group_by(Livro.cluster),
+    ))
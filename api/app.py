@@ -1,19 +1,28 @@
 import os
-import sys
-import subprocess
-import joblib
-import numpy as np
+import time
 import logging
 import uuid
 from pythonjsonlogger import jsonlogger
 from typing import List
-from flask import Flask, jsonify, g, abort, request
+from flask import Flask, Response, jsonify, g, abort, request
 from flasgger import Swagger
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from sqlalchemy import func
-from .database import SessionLocal
-from .modelo import Livro, Usuario
-from .schemas import SchemaLivro, ModeloInput
+from sqlalchemy import select
+from .database import SessionLocal, SessionLeitura, engine, engines_leitura
+from .modelo import Livro, Usuario, EstatisticaGeral, EstatisticaAvaliacao, EstatisticaCategoria, EstatisticaCluster
+from pydantic import TypeAdapter, ValidationError
+from .schemas import SchemaLivro, ModeloInput, ModeloInputColunar
+from .paginacao import ler_paginacao, paginar
+from .serializacao import query_livros, resposta_livros
+from .cache import cache_compartilhado, com_etag, incrementar_versao_catalogo
+from .busca import filtrar_por_titulo
+from .exportacao import formato_colunar_solicitado, resposta_colunar, esquema_livros, esquema_features, COLUNAS_DATASET
+from .ml import nome_cluster, indice_cluster, prever_clusters, reclassificar_livros, modelo_atual, registro_modelos, ModeloIndisponivel
+from .agregados import recalcular_agregados
+from .jobs import disparar_pipeline, obter_job, resumo_job
+from .metricas import metricas, instrumentar_engine, registrar_requisicao, registrar_inferencia
+from .consultas_lentas import instrumentar_consultas_lentas, sinalizar_excesso_de_consultas
+from .replicas import roteador_leitura, engine_leitura
 from werkzeug.security import check_password_hash
 
 # Criar a instância principal
@@ -41,6 +50,23 @@ if __name__ != '__main__':
 @app.before_request
 def add_request_id():
     g.request_id = str(uuid.uuid4()) # criar um ID unico a cada requisição de log
+    g.inicio_requisicao = time.perf_counter()
+
+# Métricas de latência por rota e das consultas ao banco (rota /api/v1/metrics)
+instrumentar_engine(engine)
+for engine_replica in engines_leitura:
+    instrumentar_engine(engine_replica, papel="replica")
+
+# Log opcional de consultas lentas e de requisições com muitas consultas
+for engine_instrumentada in (engine, *engines_leitura):
+    instrumentar_consultas_lentas(engine_instrumentada)
+
+@app.after_request
+def registrar_metricas(response):
+    duracao = time.perf_counter() - g.get("inicio_requisicao", time.perf_counter())
+    registrar_requisicao(request.method, response.status_code, duracao)
+    sinalizar_excesso_de_consultas(request.method, duracao)
+    return response
 
 # Configurar Swagger
 template = {
@@ -70,41 +96,38 @@ swagger = Swagger(app, template=template)
 app.config["JWT_SECRET_KEY"] = "fiap_mle"
 jwt = JWTManager(app)
 
-# Carregando o modelo de classificação e o scaler
-try:
-    model_path = os.path.join('models', 'kmeans_model.joblib')
-    scaler_path = os.path.join('models', 'scaler.joblib')
-    kmeans_model = joblib.load(model_path)
-    scaler = joblib.load(scaler_path)
-    print("Modelos de ML carregados com sucesso.")
-
-except FileNotFoundError:
-    kmeans_model = None
-    scaler = None
-    print("AVISO: Arquivos de modelo não encontrados. O endpoint de predição não funcionará.")
-
-# Mapeamento dos nomes dos clusters
-cluster_names = {
-    0: "Econômico",
-    1: "Custo-Benefício",
-    2: "Premium",
-    3: "Colecionador"
-}
+# Validador da entrada em lista da predição em lote
+lista_modelo_input = TypeAdapter(List[ModeloInput])
 
-# Mapeamento para feature engineering
-rating_map = {"One": 1, 
-              "Two": 2, 
-              "Three": 3, 
-              "Four": 4, 
-              "Five": 5}
+def aquecer():
+    """
+    Inicializa o que a API carrega sob demanda: o modelo de ML (e com ele o
+    numpy) e a especificação do Swagger. Com preload_app, o gunicorn chama
+    esta função no master antes de criar os workers, que herdam tudo pronto e
+    compartilham essas páginas de memória (copy-on-write).
+    """
+    modelo_atual()
+    with app.test_request_context():
+        swagger.get_apispecs()
 
 # Gerenciamento das sessões do banco de dados
+def rota_somente_leitura():
+    """
+    Requisições GET/HEAD fora de /api/v1/admin/, que podem ser atendidas pelas réplicas de leitura.
+    """
+    return request.method in ("GET", "HEAD") and not request.path.startswith("/api/v1/admin/")
+
 def get_db():
     """
     Cria e retorna uma nova sessão com o banco de dados para cada requisição.
+    As rotas somente leitura usam uma réplica saudável (DATABASE_READ_URL),
+    se houver; escritas e rotas de administração usam sempre o banco principal.
     """
     if 'db' not in g:
-        g.db = SessionLocal()
+        if rota_somente_leitura():
+            g.db = SessionLeitura(bind=engine_leitura())
+        else:
+            g.db = SessionLocal()
     return g.db
     
 @app.teardown_appcontext
@@ -141,25 +164,86 @@ def health_check():
     extra_info = {"request_id": g.get("request_id")}
     app.logger.info("Endpoint Health Check foi acessado.", extra=extra_info)
 
-    return jsonify({"Status": "OK", "message": "API está ativa."})
+    resposta = {"Status": "OK", "message": "API está ativa."}
+    if roteador_leitura.replicas:
+        resposta["replicas_leitura"] = roteador_leitura.estado()
+    return jsonify(resposta)
+
+# Rota de métricas no formato do Prometheus
+@app.route("/api/v1/metrics", methods=['GET'])
+def get_metrics():
+    """
+    Expõe as métricas da API no formato de texto do Prometheus.
+    ---
+    tags:
+      - Health Check
+    summary: Contadores e histogramas de latência por rota, consultas ao banco, uso do pool de conexões e tempo de inferência do modelo.
+    description: Os valores somam todos os workers do gunicorn no host. Se a variável METRICAS_TOKEN estiver definida, a rota exige esse token no cabeçalho 'Authorization', no formato 'Bearer <token>'.
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Métricas no formato de exposição do Prometheus (text/plain; version=0.0.4).
+      401:
+        description: Token das métricas ausente ou inválido.
+    """
+    token = os.environ.get("METRICAS_TOKEN")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        abort(401, description="Token das métricas ausente ou inválido.")
+
+    return Response(metricas.exportar(), mimetype="text/plain; version=0.0.4")
 
 # Rota para listar livros no banco de dados livraria
 @app.route("/api/v1/books", methods=['GET'])
+@com_etag
 def get_livros():
     """
     Lista todos os livros da coleção.
     ---
     tags:
       - Livros
-    summary: Retorna uma lista com todos os livros.
-    description: Retorna uma lista de objetos, cada um representando um livro na base de dados.
+    summary: Retorna uma lista paginada com os livros.
+    description: Retorna uma página de livros ordenada por id. Para obter a próxima página, envie o valor do cabeçalho 'X-Next-Cursor' no parâmetro 'cursor'.
+    parameters:
+      - in: query
+        name: cluster
+        type: string
+        required: false
+        description: Filtra pelo cluster do modelo K-Means, pelo nome (ex. "Premium") ou pelo índice.
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        default: 100
+        description: Quantidade máxima de livros por página (1 a 1000).
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Cursor opaco da próxima página, retornado no cabeçalho 'X-Next-Cursor'.
+      - in: query
+        name: after_id
+        type: integer
+        required: false
+        description: Retorna apenas livros com id maior que o informado (alternativa ao cursor).
     responses:
       200:
-        description: Uma lista de livros.
+        description: Uma página da lista de livros.
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor da próxima página. Ausente na última página.
+          Link:
+            type: string
+            description: URL da próxima página (rel="next").
         schema:
           type: array
           items:
             $ref: '#/definitions/Book'
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
+      400:
+        description: Parâmetros de paginação ou cluster inválidos.
     """
     extra_info = {
         "request_id": g.get("request_id")
@@ -167,16 +251,27 @@ def get_livros():
 
     app.logger.info("Endpoint com lista de livros foi acessado.", extra=extra_info)
 
+    ordenacao = [Livro.id]
+    limite, cursor = ler_paginacao(ordenacao)
+
     db = get_db()
-    todos_livros = db.query(Livro).all()
+    query = query_livros(db)
 
-    livros_serializado = [SchemaLivro.model_validate(livro) for livro in todos_livros]
-    resultado = [livro.model_dump() for livro in livros_serializado]
+    # Filtro pelo cluster pré-calculado na carga do banco (coluna indexada)
+    cluster_filtro = request.args.get('cluster')
+    if cluster_filtro:
+        cluster = indice_cluster(cluster_filtro)
+        if cluster is None:
+            abort(400, description=f"Cluster '{cluster_filtro}' não encontrado.")
+        query = query.filter(Livro.cluster == cluster)
 
-    return jsonify(resultado)
+    pagina_livros, proximo_cursor = paginar(query, ordenacao, limite, cursor)
+
+    return resposta_livros(pagina_livros, proximo_cursor)
 
 # Rota para buscar um livro por ID
 @app.route("/api/v1/books/<int:livro_id>", methods=['GET'])
+@com_etag
 def get_livro_id(livro_id):
     """
     Busca um livro específico pelo seu ID.
@@ -195,6 +290,8 @@ def get_livro_id(livro_id):
         description: Detalhes do livro retornados com sucesso.
         schema:
           $ref: '#/definitions/Book'
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
       404:
         description: Livro não encontrado.
     """
@@ -220,6 +317,8 @@ def get_livro_id(livro_id):
 
 # Rota para listar as categorias de livro
 @app.route("/api/v1/categories", methods=['GET'])
+@com_etag
+@cache_compartilhado
 def get_categorias():
     """
     Lista todas as categorias de livros únicas.
@@ -239,6 +338,8 @@ def get_categorias():
               items:
                 type: string
               example: ["Science Fiction", "History", "Travel"]
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
     """
     db = get_db()
 
@@ -248,13 +349,15 @@ def get_categorias():
 
     app.logger.info("Endpoint com categorias de livros foi acessado.", extra=extra_info)
 
-    categorias = db.query(Livro.categoria).distinct().all()
+    categorias = db.query(EstatisticaCategoria.categoria).order_by(EstatisticaCategoria.categoria).all()
     categorias = [categoria[0] for categoria in categorias]
 
     return jsonify(categorias)
 
 # Rota para fazer busca por filtros
 @app.route("/api/v1/books/search", methods=['GET'])
+@com_etag
+@cache_compartilhado
 def get_search():
     """
     Busca livros por título e/ou categoria.
@@ -273,13 +376,38 @@ def get_search():
         type: string
         required: false
         description: Categoria exata do livro (case-insensitive).
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        default: 100
+        description: Quantidade máxima de livros por página (1 a 1000).
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Cursor opaco da próxima página, retornado no cabeçalho 'X-Next-Cursor'.
+      - in: query
+        name: after_id
+        type: integer
+        required: false
+        description: Retorna apenas livros com id maior que o informado (alternativa ao cursor, apenas sem busca por título).
     responses:
       200:
-        description: Uma lista de livros que correspondem aos filtros.
+        description: Uma página de livros que correspondem aos filtros, ordenada por relevância quando há busca por título e por id nos demais casos.
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor da próxima página. Ausente na última página.
+          Link:
+            type: string
+            description: URL da próxima página (rel="next").
         schema:
           type: array
           items:
             $ref: '#/definitions/Book'
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
     """
     
     db = get_db()
@@ -287,23 +415,25 @@ def get_search():
     titulo_filtro = request.args.get('titulo')
     categoria_filtro = request.args.get('categoria')
 
-    query = db.query(Livro)
+    query = query_livros(db)
+    ordenacao = [Livro.id]
 
+    # Com o índice de texto, os resultados da busca por título vêm ordenados por relevância
     if titulo_filtro:
-        query = query.filter(Livro.titulo.ilike(f'%{titulo_filtro}%'))
+        query, ordenacao = filtrar_por_titulo(query, titulo_filtro)
+
+    limite, cursor = ler_paginacao(ordenacao)
 
     if categoria_filtro:
         query = query.filter(Livro.categoria.ilike(categoria_filtro))
-    
-    livros_filtro = query.all()
 
-    livros_serializado = [SchemaLivro.model_validate(livro) for livro in livros_filtro]
-    resultado = [livro.model_dump() for livro in livros_serializado]
+    livros_filtro, proximo_cursor = paginar(query, ordenacao, limite, cursor)
 
-    return jsonify(resultado)
+    return resposta_livros(livros_filtro, proximo_cursor)
 
 # Rota para estatisticas gerais da coleção
 @app.route("/api/v1/stats/overview", methods=["GET"])
+@com_etag
 def get_stats_overview():
     """
     Obtém estatísticas gerais da coleção de livros.
@@ -334,15 +464,20 @@ def get_stats_overview():
                 "Three": 203,
                 "Four": 175,
                 "Five": 200
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
     """
 
     db = get_db()
 
-    total_livros = db.query(Livro).count()
-    preco_medio = round(db.query(func.avg(Livro.preco)).scalar(), 2)
-    distribuicao_aval = db.query(Livro.avaliacao, func.count(Livro.id)).group_by(Livro.avaliacao).all()
+    # Agregados calculados pela carga do banco (scripts.popular_db)
+    geral = db.get(EstatisticaGeral, 1)
+    distribuicao_aval = db.query(EstatisticaAvaliacao.avaliacao, EstatisticaAvaliacao.total_livros).all()
     contagem_aval = {avaliacao: contagem for avaliacao, contagem in distribuicao_aval}
 
+    total_livros = geral.total_livros if geral else 0
+    preco_medio = round(geral.preco_medio, 2) if geral and geral.preco_medio is not None else 0
+
     overview = {
         "total_livros": total_livros,
         "preco_medio": preco_medio,
@@ -353,6 +488,7 @@ def get_stats_overview():
 
 # Rota para estatísticas gerais por categoria de livro
 @app.route("/api/v1/stats/categories", methods=['GET'])
+@com_etag
 def get_stats_categories():
     """
     Obtém estatísticas detalhadas por categoria.
@@ -378,15 +514,17 @@ def get_stats_categories():
                 type: number
                 format: float
                 example: 33.74
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
     """
 
     db = get_db()
 
     stats_query = db.query(
-        Livro.categoria,
-        func.count(Livro.id).label("total_livros"),
-        func.avg(Livro.preco).label("preco_medio")
-    ).group_by(Livro.categoria).order_by(Livro.categoria).all()
+        EstatisticaCategoria.categoria,
+        EstatisticaCategoria.total_livros,
+        EstatisticaCategoria.preco_medio
+    ).order_by(EstatisticaCategoria.categoria).all()
 
     resultado_formatado = []
     for categoria, total_livros, preco_medio in stats_query:
@@ -398,36 +536,122 @@ def get_stats_categories():
         
     return jsonify(resultado_formatado)
 
+# Rota para estatísticas por cluster do modelo
+@app.route("/api/v1/stats/clusters", methods=['GET'])
+@com_etag
+def get_stats_clusters():
+    """
+    Obtém estatísticas por cluster do modelo K-Means.
+    ---
+    tags:
+      - Insights
+    summary: Retorna a contagem de livros, o preço médio e a avaliação média de cada cluster.
+    description: Os clusters de todos os livros são calculados na carga do banco, em uma única passada vetorizada do modelo.
+    responses:
+      200:
+        description: Lista de estatísticas por cluster.
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              cluster:
+                type: integer
+                example: 2
+              nome:
+                type: string
+                example: "Premium"
+              total_livros:
+                type: integer
+                example: 180
+              preco_medio:
+                type: number
+                format: float
+                example: 49.12
+              avaliacao_media:
+                type: number
+                format: float
+                example: 2.1
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
+    """
+
+    db = get_db()
+
+    stats_query = db.query(
+        EstatisticaCluster.cluster,
+        EstatisticaCluster.total_livros,
+        EstatisticaCluster.preco_medio,
+        EstatisticaCluster.avaliacao_media
+    ).order_by(EstatisticaCluster.cluster).all()
+
+    resultado_formatado = []
+    for cluster, total_livros, preco_medio, avaliacao_media in stats_query:
+        resultado_formatado.append({
+            "cluster": cluster,
+            "nome": nome_cluster(cluster),
+            "total_livros": total_livros,
+            "preco_medio": round(preco_medio, 2),
+            "avaliacao_media": round(avaliacao_media, 2)
+        })
+
+    return jsonify(resultado_formatado)
+
 # Rota para listar top rank dos livros
 @app.route("/api/v1/books/top-rated", methods=['GET'])
+@com_etag
+@cache_compartilhado
 def get_top_rated():
     """
     Lista os livros com a melhor avaliação (Five stars).
     ---
     tags:
       - Livros
-    summary: Retorna uma lista dos livros com avaliação "Five".
+    summary: Retorna uma lista paginada dos livros com avaliação "Five", ordenada por título.
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        default: 100
+        description: Quantidade máxima de livros por página (1 a 1000).
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Cursor opaco da próxima página, retornado no cabeçalho 'X-Next-Cursor'.
     responses:
       200:
-        description: Uma lista de livros com a avaliação máxima.
+        description: Uma página de livros com a avaliação máxima.
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor da próxima página. Ausente na última página.
+          Link:
+            type: string
+            description: URL da próxima página (rel="next").
         schema:
           type: array
           items:
             $ref: '#/definitions/Book'
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
     """
+    ordenacao = [Livro.titulo, Livro.id]
+    limite, cursor = ler_paginacao(ordenacao)
+
     db = get_db()
-        
-    top_rated = db.query(Livro).filter(
-        Livro.avaliacao == "Five"
-    ).order_by(Livro.titulo).all()
 
-    livros_serializado = [SchemaLivro.model_validate(livro) for livro in top_rated]
-    resultado = [livro.model_dump() for livro in livros_serializado]
-        
-    return jsonify(resultado)
+    # Filtro e ordenação resolvidos pelo índice (avaliacao_num, titulo, id)
+    query = query_livros(db).filter(Livro.avaliacao_num == 5)
+    top_rated, proximo_cursor = paginar(query, ordenacao, limite, cursor)
+
+    return resposta_livros(top_rated, proximo_cursor)
 
 # Rota para filtrar por faixa de preco
 @app.route("/api/v1/books/price-range", methods=['GET'])
+@com_etag
+@cache_compartilhado
 def get_price_range():
     """
     Lista livros dentro de uma faixa de preço específica.
@@ -446,13 +670,33 @@ def get_price_range():
         type: number
         required: true
         description: O preço máximo do livro.
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        default: 100
+        description: Quantidade máxima de livros por página (1 a 1000).
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Cursor opaco da próxima página, retornado no cabeçalho 'X-Next-Cursor'.
     responses:
       200:
-        description: Uma lista de livros dentro da faixa de preço.
+        description: Uma página de livros dentro da faixa de preço, ordenada por preço.
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor da próxima página. Ausente na última página.
+          Link:
+            type: string
+            description: URL da próxima página (rel="next").
         schema:
           type: array
           items:
             $ref: '#/definitions/Book'
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
       400:
         description: Erro se os parâmetros 'min' ou 'max' estiverem ausentes ou não forem números.
     """
@@ -470,15 +714,20 @@ def get_price_range():
         max_preco = float(max)
     except ValueError:
         abort(400, description="Parâmetros 'min' e 'max' devem ser números válidos.")
-        
-    livros_na_faixa = db.query(Livro).filter(
-        Livro.preco.between(min_preco, max_preco)
-    ).order_by(Livro.preco).all()
-    
-    livros_serializado = [SchemaLivro.model_validate(livro) for livro in livros_na_faixa]
-    resultado = [livro.model_dump() for livro in livros_serializado]
-        
-    return jsonify(resultado)
+
+    ordenacao = [Livro.preco, Livro.id]
+    limite, cursor = ler_paginacao(ordenacao)
+
+    # O cursor já define o início da faixa; com o mínimo ajustado, o banco
+    # não precisa comparar os dois limites inferiores para escolher o mais alto
+    if cursor is not None and cursor[0] > min_preco:
+        min_preco = cursor[0]
+
+    # Faixa percorrida em ordem pelo índice (preco, id)
+    query = query_livros(db).filter(Livro.preco.between(min_preco, max_preco))
+    livros_na_faixa, proximo_cursor = paginar(query, ordenacao, limite, cursor)
+
+    return resposta_livros(livros_na_faixa, proximo_cursor)
 
 # Rota para autenticar login
 @app.route("/api/v1/auth/login", methods=['POST'])
@@ -572,15 +821,26 @@ def scraping_trigger():
     tags:
       - Admin
     summary: Inicia o pipeline de atualização de dados (requer autenticação de admin).
+    description: Registra um job e inicia o pipeline em segundo plano. Apenas um pipeline é executado por vez; enquanto houver um em execução, a rota responde 409 com o job ativo. O andamento pode ser consultado em /api/v1/admin/jobs/{job_id}.
     security:
       - BearerAuth: []
     responses:
       202:
-        description: Processo iniciado com sucesso.
+        description: Processo iniciado com sucesso. O cabeçalho 'Location' aponta para o status do job.
+        schema:
+          type: object
+          properties:
+            msg:
+              type: string
+            job_id:
+              type: string
+              example: "3f1c2b9e-6d0a-4c1e-9a57-2f1f0a7d5c11"
       401:
         description: Token de autenticação ausente ou inválido.
       403:
         description: Acesso negado (não é um administrador).
+      409:
+        description: Já existe um pipeline em execução; retorna o id do job ativo.
     """
     current_user_id = get_jwt_identity()
     
@@ -593,25 +853,265 @@ def scraping_trigger():
         app.logger.warning("Tentativa de acesso de não administrador.", extra=extra_info)
 
         return jsonify({"msg": "Acesso negado. Apenas administradores."}), 403
-    
-    app.logger.warning("Pipeline de scraping disparado.", extra=extra_info)
 
-    try:
-        print("Iniciando o processo de scraping em segundo plano...")
-        python_executable = sys.executable
-        script_path = "scripts/update_pipe.py"
+    db = get_db()
 
-        # Iniciar o processo sem bloquear a API
-        subprocess.Popen([python_executable, "-m", "scripts.update_pipe"])
+    try:
+        job, criado = disparar_pipeline(db, current_user_id)
 
-        return jsonify({"msg": "Pipeline ativado com sucesso."}), 202
-        
     except Exception as e:
-        print(f"Erro ao disparar o scraping: {e}")
-        app.logger.warning("Pipeline de scraping falhou.", extra=extra_info)
+        app.logger.warning(f"Pipeline de scraping falhou: {e}", extra=extra_info)
 
         return jsonify({"msg": "Erro interno ao tentar iniciar o scraping."}), 500
 
+    if not criado:
+        app.logger.warning("Pipeline de scraping já está em execução.", extra=extra_info)
+
+        return jsonify({
+            "msg": "Já existe um pipeline em execução.",
+            "job_id": job.id if job else None
+        }), 409
+
+    app.logger.warning(f"Pipeline de scraping disparado (job {job.id}).", extra=extra_info)
+
+    resposta = jsonify({"msg": "Pipeline ativado com sucesso.", "job_id": job.id})
+    resposta.headers["Location"] = f"/api/v1/admin/jobs/{job.id}"
+    return resposta, 202
+
+
+# Endpoint para acompanhar o pipeline disparado
+@app.route("/api/v1/admin/jobs/<job_id>", methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    """
+    Retorna o status de um job do pipeline de atualização.
+    ---
+    tags:
+      - Admin
+    summary: Fase, progresso, vazão e duração de uma execução do pipeline (requer autenticação de admin).
+    security:
+      - BearerAuth: []
+    parameters:
+      - name: job_id
+        in: path
+        type: string
+        required: true
+        description: Id retornado por /api/v1/admin/scraping/trigger.
+    responses:
+      200:
+        description: Status do job.
+        schema:
+          type: object
+          properties:
+            id:
+              type: string
+            status:
+              type: string
+              enum: [em_fila, executando, concluido, falhou]
+            fase:
+              type: string
+              enum: [iniciando, coleta, carga, concluido, falhou]
+            duracao_segundos:
+              type: number
+            paginas_baixadas:
+              type: integer
+            livros_coletados:
+              type: integer
+            livros_gravados:
+              type: integer
+            paginas_por_segundo:
+              type: number
+            livros_por_segundo:
+              type: number
+            inseridos:
+              type: integer
+            atualizados:
+              type: integer
+            excluidos:
+              type: integer
+            mensagem:
+              type: string
+      401:
+        description: Token de autenticação ausente ou inválido.
+      403:
+        description: Acesso negado (não é um administrador).
+      404:
+        description: Job não encontrado.
+    """
+    current_user_id = get_jwt_identity()
+
+    if current_user_id != 'bruno':
+        extra_info = {"request_id": g.get("request_id"), "admin_id": current_user_id}
+        app.logger.warning("Tentativa de acesso de não administrador.", extra=extra_info)
+
+        return jsonify({"msg": "Acesso negado. Apenas administradores."}), 403
+
+    job = obter_job(get_db(), job_id)
+    if job is None:
+        abort(404, description="Job não encontrado.")
+
+    return jsonify(resumo_job(job))
+
+
+# Endpoints para o registro de versões do modelo
+def resumo_modelo(modelo):
+    if modelo is None:
+        return None
+    return {"versao": modelo.versao, "carregado_em": modelo.carregado_em.isoformat()}
+
+
+@app.route("/api/v1/admin/models", methods=['GET'])
+@jwt_required()
+def get_models():
+    """
+    Lista as versões do modelo de ML.
+    ---
+    tags:
+      - Admin
+    summary: Versões salvas do modelo, a versão em produção e a versão carregada neste worker (requer autenticação de admin).
+    security:
+      - BearerAuth: []
+    responses:
+      200:
+        description: Versões do modelo.
+        schema:
+          type: object
+          properties:
+            versoes:
+              type: array
+              items:
+                type: string
+              example: ["v1", "v2"]
+            versao_em_producao:
+              type: string
+              example: "v2"
+            carregado:
+              type: object
+            erro:
+              type: string
+      401:
+        description: Token de autenticação ausente ou inválido.
+      403:
+        description: Acesso negado (não é um administrador).
+    """
+    current_user_id = get_jwt_identity()
+
+    if current_user_id != 'bruno':
+        extra_info = {"request_id": g.get("request_id"), "admin_id": current_user_id}
+        app.logger.warning("Tentativa de acesso de não administrador.", extra=extra_info)
+
+        return jsonify({"msg": "Acesso negado. Apenas administradores."}), 403
+
+    return jsonify({
+        "versoes": registro_modelos.versoes(),
+        "versao_em_producao": registro_modelos.versao_em_producao(),
+        "carregado": resumo_modelo(modelo_atual()),
+        "erro": registro_modelos.erro
+    })
+
+
+@app.route("/api/v1/admin/models/reload", methods=['POST'])
+@jwt_required()
+def reload_model():
+    """
+    Coloca uma versão do modelo de ML em produção sem reiniciar a API.
+    ---
+    tags:
+      - Admin
+    summary: Recarrega o modelo e reclassifica o catálogo (requer autenticação de admin).
+    description: Com 'versao', a versão é promovida no arquivo ATUAL da pasta de modelos; sem ela, é recarregada a versão que já consta nesse arquivo. A nova versão é validada antes de substituir a anterior, e os demais workers a carregam na próxima verificação do arquivo. Em seguida, os clusters gravados no banco, as estatísticas por cluster e a versão do catálogo são atualizados em uma única transação, a menos que 'reclassificar' seja false.
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            versao:
+              type: string
+              example: "v2"
+            reclassificar:
+              type: boolean
+              default: true
+    responses:
+      200:
+        description: Modelo recarregado.
+        schema:
+          type: object
+          properties:
+            msg:
+              type: string
+            versao_anterior:
+              type: string
+              example: "v1"
+            versao:
+              type: string
+              example: "v2"
+            livros_reclassificados:
+              type: integer
+      401:
+        description: Token de autenticação ausente ou inválido.
+      403:
+        description: Acesso negado (não é um administrador).
+      404:
+        description: Versão do modelo não encontrada.
+      422:
+        description: A versão não pôde ser carregada; a versão anterior continua em uso.
+    """
+    current_user_id = get_jwt_identity()
+
+    extra_info = {
+        "request_id": g.get("request_id"),
+        "admin_id": current_user_id
+    }
+
+    if current_user_id != 'bruno':
+        app.logger.warning("Tentativa de acesso de não administrador.", extra=extra_info)
+
+        return jsonify({"msg": "Acesso negado. Apenas administradores."}), 403
+
+    dados = request.get_json(silent=True) or {}
+    versao = dados.get("versao")
+    reclassificar = dados.get("reclassificar", True)
+
+    if versao is not None and versao not in registro_modelos.versoes():
+        abort(404, description=f"Versão '{versao}' do modelo não encontrada.")
+
+    try:
+        # Valida a versão neste worker antes de promovê-la para os demais
+        anterior, novo = registro_modelos.recarregar(versao)
+        if versao is not None:
+            registro_modelos.promover(versao)
+    except ModeloIndisponivel as e:
+        app.logger.warning(f"Falha ao recarregar o modelo: {e}", extra=extra_info)
+
+        return jsonify({"msg": str(e)}), 422
+
+    app.logger.warning(f"Modelo de ML versão '{novo.versao}' carregado.", extra=extra_info)
+
+    reclassificados = 0
+    if reclassificar:
+        db = get_db()
+        try:
+            reclassificados = reclassificar_livros(db, modelo=novo)
+            recalcular_agregados(db)
+            incrementar_versao_catalogo(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            app.logger.warning(f"Falha ao reclassificar o catálogo: {e}", extra=extra_info)
+
+            return jsonify({"msg": "Modelo carregado, mas houve erro ao reclassificar o catálogo."}), 500
+
+    return jsonify({
+        "msg": "Modelo recarregado com sucesso.",
+        "versao_anterior": anterior.versao if anterior else None,
+        "versao": novo.versao,
+        "livros_reclassificados": reclassificados
+    })
+
 
 # Rotas para modelagem
 # Rota para acessar dados de treinamento
@@ -623,25 +1123,62 @@ def training_data():
     ---
     tags:
       - Machine Learning
-    summary: Retorna a lista completa de livros no formato padrão da API.
+    summary: Retorna o dataset de livros no formato padrão da API, paginado por id.
+    description: Com o cabeçalho 'Accept' igual a 'application/vnd.apache.arrow.stream' ou 'application/vnd.apache.parquet', o dataset completo é enviado em streaming no formato colunar, sem paginação.
+    produces:
+      - application/json
+      - application/vnd.apache.arrow.stream
+      - application/vnd.apache.parquet
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        required: false
+        default: 100
+        description: Quantidade máxima de livros por página (1 a 1000).
+      - in: query
+        name: cursor
+        type: string
+        required: false
+        description: Cursor opaco da próxima página, retornado no cabeçalho 'X-Next-Cursor'.
+      - in: query
+        name: after_id
+        type: integer
+        required: false
+        description: Retorna apenas livros com id maior que o informado (alternativa ao cursor).
     responses:
       200:
-        description: Dataset completo retornado com sucesso.
+        description: Página do dataset retornada com sucesso.
+        headers:
+          X-Next-Cursor:
+            type: string
+            description: Cursor da próxima página. Ausente na última página.
+          Link:
+            type: string
+            description: URL da próxima página (rel="next").
         schema:
           type: array
           items:
             $ref: '#/definitions/Book'
     """
 
+    # Exportação colunar (Arrow / Parquet) do dataset completo, lida do banco em lotes
+    formato = formato_colunar_solicitado()
+    if formato:
+        consulta = select(*COLUNAS_DATASET).order_by(Livro.id)
+        return resposta_colunar(consulta, esquema_livros(), formato, "training-data")
+
+    ordenacao = [Livro.id]
+    limite, cursor = ler_paginacao(ordenacao)
+
     db = get_db()
 
-    todos_livros = db.query(Livro).all()
-    livros_schema = [SchemaLivro.model_validate(livro) for livro in todos_livros]
-    resultado_json = [livro.model_dump() for livro in livros_schema]
-    return jsonify(resultado_json)
+    pagina_livros, proximo_cursor = paginar(query_livros(db), ordenacao, limite, cursor)
+    return resposta_livros(pagina_livros, proximo_cursor)
 
 # Rotas para acessar features do modelo
 @app.route("/api/v1/ml/features", methods=['GET'])
+@com_etag
 def get_features():
     """
     Retorna as features pré-processadas de TODOS os livros.
@@ -649,6 +1186,11 @@ def get_features():
     tags:
       - Machine Learning
     summary: Serve uma lista com as features processadas de todos os livros.
+    description: Com o cabeçalho 'Accept' igual a 'application/vnd.apache.arrow.stream' ou 'application/vnd.apache.parquet', as features são enviadas em streaming no formato colunar.
+    produces:
+      - application/json
+      - application/vnd.apache.arrow.stream
+      - application/vnd.apache.parquet
     responses:
       200:
         description: Lista de features retornada com sucesso.
@@ -664,27 +1206,31 @@ def get_features():
                 format: float
               avaliacao_numerica:
                 type: integer
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
     """
-    
+
+    formato = formato_colunar_solicitado()
+    if formato:
+        consulta = select(Livro.id, Livro.preco, Livro.avaliacao_num).order_by(Livro.id)
+        return resposta_colunar(consulta, esquema_features(), formato, "features")
+
     db = get_db()
 
-    todos_livros = db.query(Livro).all()
+    # Apenas as três colunas, com a avaliação numérica já calculada na carga do banco
+    todos_livros = db.query(Livro.id, Livro.preco, Livro.avaliacao_num).order_by(Livro.id).all()
 
-    lista_features = []
-    for livro in todos_livros:
-        avaliacao_numerica = rating_map.get(livro.avaliacao, 0)
-        features = {
-            "livro_id": livro.id,
-            "preco": livro.preco,
-            "avaliacao_numerica": avaliacao_numerica
-        }
-        lista_features.append(features)
+    lista_features = [
+        {"livro_id": livro_id, "preco": preco, "avaliacao_numerica": avaliacao_num}
+        for livro_id, preco, avaliacao_num in todos_livros
+    ]
 
 
     return jsonify(lista_features)
 
 # Rotas para acessar features do modelo de um id
 @app.route("/api/v1/ml/features/<int:livro_id>", methods=['GET'])
+@com_etag
 def get_book_features(livro_id):
     """
     Retorna as features pré-processadas de um único livro.
@@ -701,6 +1247,8 @@ def get_book_features(livro_id):
     responses:
       200:
         description: Features do livro retornadas com sucesso.
+      304:
+        description: Conteúdo não modificado desde o ETag enviado em 'If-None-Match'.
       404:
         description: Livro não encontrado.
     """
@@ -710,14 +1258,24 @@ def get_book_features(livro_id):
     if not livro_orm:
         abort(404, description=f"Livro com id {livro_id} não encontrado.")
     
-    avaliacao_numerica = rating_map.get(livro_orm.avaliacao, 0)
     features = {
         "livro_id": livro_orm.id,
         "preco": livro_orm.preco,
-        "avaliacao_numerica": avaliacao_numerica
+        "avaliacao_numerica": livro_orm.avaliacao_num
     }
     return jsonify(features)
 
+def modelo_em_uso():
+    """
+    Retorna a versão do modelo em uso, que deve ser a mesma durante toda a
+    requisição, ou responde 503 com o motivo da falha ao carregá-lo.
+    """
+    modelo = modelo_atual()
+    if modelo is None:
+        motivo = registro_modelos.erro or "Modelos de ML não estão disponíveis ou carregados."
+        abort(503, description=motivo)
+    return modelo
+
 # Rota para projeção com kmeans
 @app.route("/api/v1/ml/predictions", methods=['POST'])
 def predict_cluster():
@@ -735,7 +1293,7 @@ def predict_cluster():
           $ref: '#/definitions/ModeloInput'
     responses:
       200:
-        description: A predição do cluster do livro.
+        description: A predição do cluster do livro e a versão do modelo usada (também no cabeçalho 'X-Model-Version').
       503:
         description: Serviço indisponível se os modelos de ML não estiverem carregados.
     """  
@@ -746,21 +1304,91 @@ def predict_cluster():
 
     app.logger.info("Tentativa de login recebida.", extra=extra_info)
 
-    if not kmeans_model or not scaler:
-        abort(503, description="Modelos de ML não estão disponíveis ou carregados.")
+    modelo = modelo_em_uso()
 
     input_data = ModeloInput.model_validate(request.get_json())
-    avaliacao_numerica = rating_map.get(input_data.avaliacao, 0)
-    features = np.array([[input_data.preco, avaliacao_numerica]])
-    features_scaled = scaler.transform(features)
-    proj_cluster = kmeans_model.predict(features_scaled)[0]
-    cluster_name = cluster_names.get(int(proj_cluster), "Desconhecido")
+    inicio = time.perf_counter()
+    proj_cluster = prever_clusters([input_data.preco], [input_data.avaliacao], modelo)[0]
+    registrar_inferencia("individual", 1, time.perf_counter() - inicio)
+    cluster_name = nome_cluster(proj_cluster)
 
-    return jsonify({
+    resposta = jsonify({
         "input_data": input_data.model_dump(),
         "predicted_cluster_index": int(proj_cluster),
-        "predicted_cluster_name": cluster_name
+        "predicted_cluster_name": cluster_name,
+        "model_version": modelo.versao
     })
-   
+    resposta.headers["X-Model-Version"] = modelo.versao
+    return resposta
+
+# Rota para projeção em lote com kmeans
+@app.route("/api/v1/ml/predictions/batch", methods=['POST'])
+def predict_cluster_batch():
+    """
+    Prevê o cluster de vários livros em uma única requisição.
+    ---
+    tags:
+      - Machine Learning
+    summary: Classifica uma lista de livros com uma única execução vetorizada do modelo K-Means.
+    description: Aceita uma lista de objetos ModeloInput ou um objeto colunar com as listas 'preco' e 'avaliacao'. A resposta segue o mesmo formato da entrada e mantém a ordem dos livros.
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: array
+          items:
+            $ref: '#/definitions/ModeloInput'
+    responses:
+      200:
+        description: Os clusters previstos, na mesma ordem da entrada, e a versão do modelo usada (também no cabeçalho 'X-Model-Version').
+      400:
+        description: Entrada inválida.
+      503:
+        description: Serviço indisponível se os modelos de ML não estiverem carregados.
+    """
+
+    extra_info = {
+        "request_id": g.get("request_id")
+    }
+
+    modelo = modelo_em_uso()
+
+    dados = request.get_json(silent=True)
+    colunar = isinstance(dados, dict)
+
+    try:
+        if colunar:
+            entrada = ModeloInputColunar.model_validate(dados)
+            precos, avaliacoes = entrada.preco, entrada.avaliacao
+        else:
+            entrada = lista_modelo_input.validate_python(dados)
+            precos = [item.preco for item in entrada]
+            avaliacoes = [item.avaliacao for item in entrada]
+    except ValidationError as e:
+        abort(400, description=f"Entrada inválida: {e.error_count()} erro(s) de validação.")
+
+    app.logger.info(f"Predição em lote de {len(precos)} livros.", extra=extra_info)
+
+    inicio = time.perf_counter()
+    indices = prever_clusters(precos, avaliacoes, modelo).tolist()
+    registrar_inferencia("lote", len(indices), time.perf_counter() - inicio)
+    nomes = [nome_cluster(indice) for indice in indices]
+
+    if colunar:
+        resposta = jsonify({
+            "predicted_cluster_index": indices,
+            "predicted_cluster_name": nomes,
+            "model_version": modelo.versao
+        })
+    else:
+        resposta = jsonify([
+            {"predicted_cluster_index": indice, "predicted_cluster_name": nome, "model_version": modelo.versao}
+            for indice, nome in zip(indices, nomes)
+        ])
+
+    resposta.headers["X-Model-Version"] = modelo.versao
+    return resposta
+
 # if __name__ == '__main__':
 #     app.run(debug=True, port=1312)
\ No newline at end of file
@@ -0,0 +1,103 @@
+from sqlalchemy import text, inspect, func, Integer, Float
+from .modelo import Livro
+
+# Tamanho mínimo do termo para usar o índice de trigramas (FTS5 e pg_trgm)
+TAMANHO_MINIMO_TERMO = 3
+
+_indice_disponivel = {}
+
+
+def criar_indice_busca(conn):
+    """
+    Cria o índice de texto do título dos livros de acordo com o banco em uso:
+    tabela FTS5 com tokenizador de trigramas no SQLite e índice GIN com
+    pg_trgm no PostgreSQL.
+    """
+    dialeto = conn.dialect.name
+
+    if dialeto == "sqlite":
+        # Cria a tabela FTS5, se necessário, e indexa os livros já existentes
+        reconstruir_indice_busca(conn)
+
+    elif dialeto == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_livros_titulo_trgm ON livros USING gin (titulo gin_trgm_ops)"
+        ))
+
+    _indice_disponivel.clear()
+
+
+def reconstruir_indice_busca(conn):
+    """
+    Sincroniza o índice de texto com a tabela 'livros'. Deve ser chamada pela
+    carga dentro da mesma transação que altera os livros. No SQLite, a tabela
+    FTS5 é criada se ainda não existir (banco não migrado por scripts.init_db).
+    No PostgreSQL o índice GIN é mantido pelo próprio banco.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+
+    if not inspect(conn).has_table("livros_fts"):
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE livros_fts USING fts5("
+            "titulo, content='livros', content_rowid='id', tokenize='trigram')"
+        ))
+        _indice_disponivel.clear()
+
+    conn.execute(text("INSERT INTO livros_fts(livros_fts) VALUES('rebuild')"))
+
+
+def indice_busca_disponivel(bind):
+    """
+    Verifica (uma vez por processo) se o índice de texto foi criado no banco.
+    """
+    chave = str(bind.url)
+    if chave not in _indice_disponivel:
+        if bind.dialect.name == "sqlite":
+            _indice_disponivel[chave] = inspect(bind).has_table("livros_fts")
+        elif bind.dialect.name == "postgresql":
+            with bind.connect() as conn:
+                extensao = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+            _indice_disponivel[chave] = extensao is not None
+        else:
+            _indice_disponivel[chave] = False
+
+    return _indice_disponivel[chave]
+
+
+def expressao_fts(termo):
+    """
+    Transforma o termo digitado em uma frase do FTS5, escapando as aspas.
+    """
+    return '"' + termo.replace('"', '""') + '"'
+
+
+def filtrar_por_titulo(query, termo):
+    """
+    Filtra a query pelo termo no título (busca parcial, case-insensitive).
+
+    Quando o índice de texto está disponível, os resultados são ordenados por
+    relevância. Retorna a tupla (query, ordenacao) com as colunas usadas na
+    paginação por keyset.
+    """
+    bind = query.session.get_bind()
+
+    if len(termo) < TAMANHO_MINIMO_TERMO or not indice_busca_disponivel(bind):
+        return query.filter(Livro.titulo.ilike(f'%{termo}%')), [Livro.id]
+
+    if bind.dialect.name == "sqlite":
+        # O rank do FTS5 (bm25) é menor para os resultados mais relevantes
+        busca = (
+            text("SELECT rowid AS id, rank AS relevancia FROM livros_fts WHERE livros_fts MATCH :termo")
+            .bindparams(termo=expressao_fts(termo))
+            .columns(id=Integer, relevancia=Float)
+            .subquery("busca")
+        )
+        query = query.join(busca, busca.c.id == Livro.id).add_columns(busca.c.relevancia)
+        return query, [busca.c.relevancia, Livro.id]
+
+    # PostgreSQL: o ILIKE usa o índice GIN de trigramas e a similaridade define a relevância
+    relevancia = (-func.similarity(Livro.titulo, termo, type_=Float)).label("relevancia")
+    query = query.filter(Livro.titulo.ilike(f'%{termo}%')).add_columns(relevancia)
+    return query, [relevancia, Livro.id]
@@ -0,0 +1,246 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+from flask import request, current_app, g, has_request_context
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from .database import engine, DATABASE_URL
+from .modelo import VersaoCatalogo
+
+# Identifica o banco servido pela API, para que duas APIs no mesmo host não
+# compartilhem as respostas (as versões do catálogo dos dois bancos podem coincidir)
+IDENTIFICADOR_BANCO = hashlib.sha256(DATABASE_URL.encode("utf-8")).hexdigest()[:16]
+
+# Configurações do cache compartilhado entre os workers do gunicorn
+CACHE_ATIVO = os.environ.get("CACHE_CONSULTAS_ATIVO", "1") == "1"
+CACHE_CAMINHO = os.environ.get(
+    "CACHE_CONSULTAS_CAMINHO", os.path.join(tempfile.gettempdir(), f"api_livros_cache_{IDENTIFICADOR_BANCO}.db")
+)
+CACHE_TAMANHO_MAXIMO = int(os.environ.get("CACHE_CONSULTAS_MAX_MB", "64")) * 1024 * 1024
+
+# Por quanto tempo (em segundos) cada worker reaproveita a versão do catálogo lida
+# do banco. Com 0 (padrão), a versão é lida a cada requisição
+VERSAO_CATALOGO_TTL = float(os.environ.get("CATALOGO_VERSAO_TTL", "0"))
+
+# Cabeçalhos da resposta original que também são guardados no cache
+CABECALHOS_CACHEADOS = ("X-Next-Cursor", "Link")
+
+_versao_local = {"versao": None, "lido_em": 0.0}
+
+
+# Versão do catálogo
+def obter_versao_catalogo():
+    """
+    Retorna a versão atual do catálogo, lida do banco uma vez por requisição:
+    a chave do cache, o ETag e a escolha da réplica usam a mesma versão, e uma
+    recarga invalida o cache de todos os workers ao mesmo tempo. Com
+    VERSAO_CATALOGO_TTL > 0, cada worker reaproveita a versão lida por esse
+    intervalo, aceitando respostas antigas por até esse tempo após uma recarga.
+    """
+    if has_request_context() and "versao_catalogo" in g:
+        return g.versao_catalogo
+
+    agora = time.monotonic()
+    if _versao_local["versao"] is not None and agora - _versao_local["lido_em"] < VERSAO_CATALOGO_TTL:
+        versao = _versao_local["versao"]
+    else:
+        try:
+            with engine.connect() as conn:
+                versao = conn.execute(select(VersaoCatalogo.versao).where(VersaoCatalogo.id == 1)).scalar() or 0
+        except SQLAlchemyError:
+            # Banco ainda sem a tabela de versão (rode scripts.init_db)
+            versao = 0
+
+        _versao_local["versao"] = versao
+        _versao_local["lido_em"] = agora
+
+    if has_request_context():
+        g.versao_catalogo = versao
+    return versao
+
+
+def incrementar_versao_catalogo(db):
+    """
+    Incrementa a versão do catálogo dentro da transação da carga.
+    O novo valor passa a valer para todos os workers junto com o commit dos dados.
+    """
+    registro = db.get(VersaoCatalogo, 1)
+    if registro is None:
+        registro = VersaoCatalogo(id=1, versao=0)
+        db.add(registro)
+
+    registro.versao = (registro.versao or 0) + 1
+    registro.atualizado_em = datetime.now(timezone.utc)
+    return registro.versao
+
+
+# Cache de respostas em arquivo SQLite local
+class CacheCompartilhado:
+    """
+    Cache LRU de respostas guardado em um arquivo SQLite local, compartilhado por
+    todos os processos do host. Ao ultrapassar o tamanho máximo, as entradas
+    acessadas há mais tempo são removidas.
+    """
+
+    def __init__(self, caminho, tamanho_maximo):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self._local = threading.local()
+
+    def _conexao(self):
+        # Cada processo (e thread) abre a sua própria conexão, inclusive após o fork
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.caminho, timeout=1, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            "chave TEXT PRIMARY KEY, versao INTEGER NOT NULL, corpo BLOB NOT NULL, "
+            "cabecalhos TEXT NOT NULL, tamanho INTEGER NOT NULL, ultimo_acesso REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_respostas_ultimo_acesso ON respostas (ultimo_acesso)")
+
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def obter(self, chave):
+        """
+        Retorna a tupla (corpo, cabecalhos) da entrada ou None se ela não existir.
+        """
+        conn = self._conexao()
+        linha = conn.execute("SELECT corpo, cabecalhos FROM respostas WHERE chave = ?", (chave,)).fetchone()
+        if linha is None:
+            return None
+
+        conn.execute("UPDATE respostas SET ultimo_acesso = ? WHERE chave = ?", (time.time(), chave))
+        return linha[0], json.loads(linha[1])
+
+    def guardar(self, chave, versao, corpo, cabecalhos):
+        """
+        Guarda uma resposta, descartando as entradas de versões antigas do catálogo
+        e removendo as menos usadas recentemente até caber no tamanho máximo.
+        """
+        if len(corpo) > self.tamanho_maximo:
+            return
+
+        conn = self._conexao()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM respostas WHERE versao <> ?", (versao,))
+            conn.execute(
+                "INSERT OR REPLACE INTO respostas (chave, versao, corpo, cabecalhos, tamanho, ultimo_acesso) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, versao, corpo, json.dumps(cabecalhos), len(corpo), time.time()),
+            )
+
+            tamanho_total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+            if tamanho_total > self.tamanho_maximo:
+                removidas = conn.execute(
+                    "SELECT chave, tamanho FROM respostas WHERE chave <> ? ORDER BY ultimo_acesso", (chave,)
+                )
+                remover = []
+                for chave_antiga, tamanho in removidas:
+                    if tamanho_total <= self.tamanho_maximo:
+                        break
+                    remover.append((chave_antiga,))
+                    tamanho_total -= tamanho
+                conn.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+
+cache_consultas = CacheCompartilhado(CACHE_CAMINHO, CACHE_TAMANHO_MAXIMO)
+
+
+def chave_requisicao(versao):
+    """
+    Monta a chave do cache a partir do banco, da versão do catálogo, da rota,
+    dos parâmetros da requisição normalizados (ordenados por nome e por valor) e
+    do cabeçalho Accept, já que algumas rotas negociam o formato da resposta.
+    """
+    argumentos = sorted((nome, sorted(valores)) for nome, valores in request.args.lists())
+    identificador = json.dumps(
+        [IDENTIFICADOR_BANCO, versao, request.endpoint, request.view_args or {}, argumentos, request.headers.get("Accept", "")],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(identificador.encode("utf-8")).hexdigest()
+
+
+def cache_compartilhado(view):
+    """
+    Decorador que guarda as respostas 200 de uma rota de leitura no cache
+    compartilhado, usando a versão do catálogo na chave. Qualquer falha no
+    cache é registrada e a rota é executada normalmente.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not CACHE_ATIVO:
+            return view(*args, **kwargs)
+
+        versao = obter_versao_catalogo()
+        chave = chave_requisicao(versao)
+        extra_info = {"request_id": g.get("request_id")}
+
+        try:
+            entrada = cache_consultas.obter(chave)
+        except sqlite3.Error as e:
+            current_app.logger.warning(f"Falha ao ler o cache de consultas: {e}", extra=extra_info)
+            entrada = None
+
+        if entrada is not None:
+            corpo, cabecalhos = entrada
+            resposta = current_app.response_class(corpo, mimetype=cabecalhos.pop("mimetype"))
+            resposta.headers.update(cabecalhos)
+            return resposta
+
+        resposta = current_app.make_response(view(*args, **kwargs))
+
+        if resposta.status_code == 200 and not resposta.is_streamed:
+            cabecalhos = {nome: resposta.headers[nome] for nome in CABECALHOS_CACHEADOS if nome in resposta.headers}
+            cabecalhos["mimetype"] = resposta.mimetype
+            try:
+                cache_consultas.guardar(chave, versao, resposta.get_data(), cabecalhos)
+            except sqlite3.Error as e:
+                current_app.logger.warning(f"Falha ao gravar no cache de consultas: {e}", extra=extra_info)
+
+        return resposta
+
+    return wrapper
+
+
+def com_etag(view):
+    """
+    Decorador que adiciona um ETag forte, derivado da versão do catálogo e dos
+    parâmetros da requisição, e responde 304 quando o cliente já possui a versão
+    atual (If-None-Match), sem consultar o banco nem serializar a resposta.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = chave_requisicao(obter_versao_catalogo())
+
+        if request.if_none_match.contains(etag):
+            resposta = current_app.response_class(status=304)
+        else:
+            resposta = current_app.make_response(view(*args, **kwargs))
+            if resposta.status_code != 200:
+                return resposta
+
+        resposta.set_etag(etag)
+        resposta.headers["Cache-Control"] = "no-cache"
+        return resposta
+
+    return wrapper
@@ -0,0 +1,135 @@
+import os
+import time
+import logging
+from flask import g, current_app, has_app_context, has_request_context
+from sqlalchemy import event
+from .metricas import rota_atual
+
+# Duração (em ms) acima da qual uma consulta é registrada no log. Sem valor, o registro fica desativado
+CONSULTAS_LENTAS_MS = os.environ.get("CONSULTAS_LENTAS_MS")
+
+# Requisições com mais consultas que este limite são sinalizadas no log. Sem valor, fica desativado
+CONSULTAS_POR_REQUISICAO_MAX = os.environ.get("CONSULTAS_POR_REQUISICAO_MAX")
+
+# Captura o plano de execução (EXPLAIN) das consultas lentas
+CONSULTAS_LENTAS_EXPLAIN = os.environ.get("CONSULTAS_LENTAS_EXPLAIN", "1") == "1"
+
+# Tamanho máximo do texto dos parâmetros registrado no log
+TAMANHO_MAXIMO_PARAMETROS = 500
+
+LIMITE_CONSULTA_LENTA = float(CONSULTAS_LENTAS_MS) / 1000 if CONSULTAS_LENTAS_MS else None
+LIMITE_CONSULTAS_REQUISICAO = int(CONSULTAS_POR_REQUISICAO_MAX) if CONSULTAS_POR_REQUISICAO_MAX else None
+
+
+def _logger():
+    return current_app.logger if has_app_context() else logging.getLogger("api-livros")
+
+
+def _resumir_parametros(parametros, executemany):
+    if executemany:
+        texto = f"{len(parametros)} conjuntos; primeiro: {parametros[0]!r}" if parametros else "[]"
+    else:
+        texto = repr(parametros)
+    return texto if len(texto) <= TAMANHO_MAXIMO_PARAMETROS else texto[:TAMANHO_MAXIMO_PARAMETROS] + "..."
+
+
+def explicar(conn, statement, parametros):
+    """
+    Retorna o plano de execução de uma consulta de leitura (SQLite: EXPLAIN QUERY
+    PLAN; demais bancos: EXPLAIN), executado em um cursor separado para não
+    interferir no resultado da consulta original. No PostgreSQL, um savepoint
+    protege a transação em andamento caso o EXPLAIN falhe.
+    """
+    if (statement.split(None, 1) or [""])[0].upper() not in ("SELECT", "WITH"):
+        return None
+
+    sqlite = conn.dialect.name == "sqlite"
+    savepoint = conn.dialect.name == "postgresql"
+    cursor = conn.connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT explicar_consulta_lenta")
+        cursor.execute(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + statement, parametros)
+        linhas = cursor.fetchall()
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT explicar_consulta_lenta")
+    except Exception as e:
+        if savepoint:
+            cursor.execute("ROLLBACK TO SAVEPOINT explicar_consulta_lenta")
+        return [f"EXPLAIN indisponível: {e}"]
+    finally:
+        cursor.close()
+
+    # No SQLite, a última coluna traz a descrição de cada passo do plano
+    return [str(linha[-1]) if sqlite else " | ".join(str(valor) for valor in linha) for linha in linhas]
+
+
+def alertas_do_plano(plano):
+    """
+    Aponta no plano as varreduras completas de tabela e as ordenações feitas sem índice.
+    """
+    alertas = set()
+    for passo in plano or []:
+        texto = passo.strip().lstrip("->").strip()
+        if (texto.startswith("SCAN ") and " USING " not in texto and "VIRTUAL TABLE" not in texto) or texto.startswith("Seq Scan"):
+            alertas.add("varredura_completa")
+        if texto.startswith("USE TEMP B-TREE FOR ORDER BY") or texto.startswith("Sort "):
+            alertas.add("ordenacao_sem_indice")
+    return sorted(alertas)
+
+
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_perfil = time.perf_counter()
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    duracao = time.perf_counter() - context._inicio_perfil
+
+    if has_request_context():
+        g.consultas_banco = g.get("consultas_banco", 0) + 1
+        g.tempo_banco = g.get("tempo_banco", 0.0) + duracao
+
+    if LIMITE_CONSULTA_LENTA is None or duracao <= LIMITE_CONSULTA_LENTA:
+        return
+
+    plano = explicar(conn, statement, parameters) if CONSULTAS_LENTAS_EXPLAIN and not executemany else None
+    _logger().warning("Consulta lenta ao banco.", extra={
+        "request_id": g.get("request_id") if has_request_context() else None,
+        "rota": rota_atual(),
+        "duracao_ms": round(duracao * 1000, 2),
+        "sql": statement,
+        "parametros": _resumir_parametros(parameters, executemany),
+        "linhas": cursor.rowcount if cursor.rowcount >= 0 else None,
+        "plano": plano,
+        "alertas": alertas_do_plano(plano),
+    })
+
+
+def instrumentar_consultas_lentas(engine):
+    """
+    Ativa o registro de consultas lentas na engine, se CONSULTAS_LENTAS_MS ou
+    CONSULTAS_POR_REQUISICAO_MAX estiverem definidas. Desativado, não há custo.
+    """
+    if LIMITE_CONSULTA_LENTA is None and LIMITE_CONSULTAS_REQUISICAO is None:
+        return
+
+    event.listen(engine, "before_cursor_execute", _antes_da_consulta)
+    event.listen(engine, "after_cursor_execute", _depois_da_consulta)
+
+
+def sinalizar_excesso_de_consultas(metodo, duracao):
+    """
+    Registra no log as requisições que fizeram mais consultas que o limite configurado.
+    """
+    consultas = g.get("consultas_banco", 0)
+    if LIMITE_CONSULTAS_REQUISICAO is None or consultas <= LIMITE_CONSULTAS_REQUISICAO:
+        return
+
+    _logger().warning("Requisição com muitas consultas ao banco.", extra={
+        "request_id": g.get("request_id"),
+        "rota": rota_atual(),
+        "metodo": metodo,
+        "consultas": consultas,
+        "tempo_banco_ms": round(g.get("tempo_banco", 0.0) * 1000, 2),
+        "duracao_ms": round(duracao * 1000, 2),
+    })
@@ -1,22 +1,122 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 #habilitando o uso do postgre para utilizar o deploy no render
 
+def normalizar_url(url):
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
 # Define a URL de conexão para o banco de dados SQLite e PostgreSQL
-DATABASE_URL = os.environ.get('DATABASE_URL', "sqlite:///./data/livraria.db")
+DATABASE_URL = normalizar_url(os.environ.get('DATABASE_URL', "sqlite:///./data/livraria.db"))
+
+# Réplicas de leitura (URLs separadas por vírgula), usadas pelas rotas que apenas leem o catálogo
+DATABASE_READ_URL = os.environ.get("DATABASE_READ_URL", "")
+
+# Perfil de configuração da engine: "auto" escolhe pelo banco da URL ("sqlite" ou
+# "postgresql"); "padrao" usa as configurações padrão do SQLAlchemy
+DATABASE_PERFIL = os.environ.get("DATABASE_PERFIL", "auto")
+
+# Perfil SQLite: pragmas aplicados a cada nova conexão
+SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_MB = int(os.environ.get("SQLITE_MMAP_MB", "256"))
+SQLITE_CACHE_MB = int(os.environ.get("SQLITE_CACHE_MB", "64"))
+SQLITE_ESPERA_SEGUNDOS = float(os.environ.get("SQLITE_ESPERA_SEGUNDOS", "5"))
+
+# Perfil PostgreSQL: total de conexões da API, dividido entre os workers do gunicorn
+DATABASE_MAX_CONEXOES = int(os.environ.get("DATABASE_MAX_CONEXOES", "20"))
+DATABASE_POOL_ESPERA_SEGUNDOS = float(os.environ.get("DATABASE_POOL_ESPERA_SEGUNDOS", "10"))
+DATABASE_RECICLAR_SEGUNDOS = int(os.environ.get("DATABASE_RECICLAR_SEGUNDOS", "1800"))
+DATABASE_TEMPO_LIMITE_MS = int(os.environ.get("DATABASE_TEMPO_LIMITE_MS", "30000"))
+DATABASE_CONEXAO_ESPERA_SEGUNDOS = int(os.environ.get("DATABASE_CONEXAO_ESPERA_SEGUNDOS", "5"))
+
+
+def _perfil_padrao(url):
+    return {"connect_args": {"check_same_thread": False}} if url.startswith("sqlite") else {}
+
+
+def _perfil_sqlite(url):
+    """
+    WAL para que a carga do banco não bloqueie as leituras da API, mmap e cache
+    de páginas maiores e synchronous=NORMAL (seguro com WAL, sem fsync a cada commit).
+    """
+    return {"connect_args": {"check_same_thread": False, "timeout": SQLITE_ESPERA_SEGUNDOS}}
+
+
+def _aplicar_pragmas_sqlite(conexao, _):
+    cursor = conexao.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        # Valor negativo: tamanho do cache em KiB, e não em páginas
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+    finally:
+        cursor.close()
+
+
+def _perfil_postgresql(url):
+    """
+    Pool dimensionado por worker do gunicorn, sem ultrapassar DATABASE_MAX_CONEXOES
+    no total, conexões testadas antes do uso e recicladas periodicamente, e
+    statement_timeout no servidor para que nenhuma consulta prenda o worker.
+    O tempo limite de conexão evita que um servidor fora do ar prenda o worker.
+    """
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+    return {
+        "pool_size": max(1, DATABASE_MAX_CONEXOES // workers),
+        "max_overflow": 0,
+        "pool_timeout": DATABASE_POOL_ESPERA_SEGUNDOS,
+        "pool_recycle": DATABASE_RECICLAR_SEGUNDOS,
+        "pool_pre_ping": True,
+        "connect_args": {
+            "options": f"-c statement_timeout={DATABASE_TEMPO_LIMITE_MS}",
+            "connect_timeout": DATABASE_CONEXAO_ESPERA_SEGUNDOS,
+        },
+    }
+
+
+PERFIS = {
+    "padrao": _perfil_padrao,
+    "sqlite": _perfil_sqlite,
+    "postgresql": _perfil_postgresql,
+}
+
+
+def criar_engine(url, perfil=DATABASE_PERFIL):
+    """
+    Cria a engine do banco com as configurações do perfil informado.
+    """
+    if perfil == "auto":
+        perfil = "sqlite" if url.startswith("sqlite") else "postgresql" if url.startswith("postgresql") else "padrao"
+    if perfil not in PERFIS:
+        raise ValueError(f"Perfil de banco '{perfil}' desconhecido. Use 'auto' ou um de: {', '.join(PERFIS)}.")
+
+    nova_engine = create_engine(url, **PERFIS[perfil](url))
+    if perfil == "sqlite":
+        event.listen(nova_engine, "connect", _aplicar_pragmas_sqlite)
+
+    nova_engine.perfil = perfil
+    return nova_engine
 
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
 # Criar o motor do banco de dados.
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}) 
+engine = criar_engine(DATABASE_URL)
+
+# Engines das réplicas de leitura, escolhidas a cada requisição por api.replicas
+engines_leitura = [criar_engine(normalizar_url(url.strip())) for url in DATABASE_READ_URL.split(",") if url.strip()]
 
 
 # Criar uma sessão
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sessão das rotas de leitura, ligada na criação à engine escolhida (réplica ou principal)
+SessionLeitura = sessionmaker(autocommit=False, autoflush=False)
+
 # Criar base de referência para o SQL
-Base_tabela = declarative_base()
\ No newline at end of file
+Base_tabela = declarative_base()
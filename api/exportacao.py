@@ -0,0 +1,147 @@
+from flask import request, current_app
+from .replicas import engine_leitura
+from .modelo import Livro
+
+# Tipos de mídia aceitos para a exportação colunar
+MIMETYPE_ARROW = "application/vnd.apache.arrow.stream"
+MIMETYPE_PARQUET = "application/vnd.apache.parquet"
+
+# Colunas do dataset de treinamento, na ordem dos campos de esquema_livros
+COLUNAS_DATASET = (
+    Livro.id,
+    Livro.titulo,
+    Livro.preco,
+    Livro.avaliacao,
+    Livro.disponibilidade,
+    Livro.categoria,
+    Livro.url_imagem,
+)
+
+# Quantidade de linhas lidas do banco e escritas em cada record batch / row group
+TAMANHO_LOTE_EXPORTACAO = 50_000
+
+
+def formato_colunar_solicitado():
+    """
+    Verifica o cabeçalho Accept e retorna o tipo de mídia colunar preferido pelo
+    cliente, ou None quando a resposta deve continuar em JSON.
+    """
+    formato = request.accept_mimetypes.best_match(
+        ["application/json", MIMETYPE_ARROW, MIMETYPE_PARQUET], default="application/json"
+    )
+    return None if formato == "application/json" else formato
+
+
+class _ColetorBytes:
+    """
+    Destino de escrita do pyarrow que apenas acumula os bytes produzidos,
+    para que sejam enviados ao cliente a cada lote.
+    """
+
+    def __init__(self):
+        self.partes = []
+        self.closed = False
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        return len(dados)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drenar(self):
+        dados = b"".join(self.partes)
+        self.partes = []
+        return dados
+
+
+def _iterar_lotes(consulta, esquema, engine):
+    """
+    Executa a consulta com cursor no servidor e converte cada lote de linhas em
+    um RecordBatch, sem materializar o resultado completo em memória.
+    """
+    import pyarrow as pa
+
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=TAMANHO_LOTE_EXPORTACAO).execute(consulta)
+        for linhas in resultado.partitions():
+            colunas = list(zip(*linhas))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(colunas, esquema)],
+                schema=esquema,
+            )
+
+
+def _gerar_arrow(consulta, esquema, engine):
+    import pyarrow as pa
+
+    coletor = _ColetorBytes()
+    with pa.ipc.new_stream(pa.PythonFile(coletor, mode="w"), esquema) as escritor:
+        for lote in _iterar_lotes(consulta, esquema, engine):
+            escritor.write_batch(lote)
+            yield coletor.drenar()
+    yield coletor.drenar()
+
+
+def _gerar_parquet(consulta, esquema, engine):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    coletor = _ColetorBytes()
+    with pq.ParquetWriter(pa.PythonFile(coletor, mode="w"), esquema) as escritor:
+        for lote in _iterar_lotes(consulta, esquema, engine):
+            escritor.write_batch(lote)
+            yield coletor.drenar()
+    yield coletor.drenar()
+
+
+def resposta_colunar(consulta, esquema, formato, nome_arquivo):
+    """
+    Cria uma resposta em streaming no formato Arrow IPC ou Parquet a partir de
+    uma consulta SQLAlchemy Core. As colunas da consulta devem seguir a ordem
+    dos campos do esquema do pyarrow. A consulta é executada em uma réplica de
+    leitura, se houver.
+    """
+    engine = engine_leitura()
+    if formato == MIMETYPE_PARQUET:
+        gerador, extensao = _gerar_parquet(consulta, esquema, engine), "parquet"
+    else:
+        gerador, extensao = _gerar_arrow(consulta, esquema, engine), "arrows"
+
+    resposta = current_app.response_class(gerador, mimetype=formato)
+    resposta.headers["Content-Disposition"] = f'attachment; filename="{nome_arquivo}.{extensao}"'
+    resposta.headers["Vary"] = "Accept"
+    return resposta
+
+
+def esquema_livros():
+    """
+    Esquema colunar do dataset de treinamento, com os campos do SchemaLivro.
+    """
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("titulo", pa.string()),
+        ("preco", pa.float64()),
+        ("avaliacao", pa.string()),
+        ("disponibilidade", pa.string()),
+        ("categoria", pa.string()),
+        ("url_imagem", pa.string()),
+    ])
+
+
+def esquema_features():
+    """
+    Esquema colunar das features pré-processadas do modelo.
+    """
+    import pyarrow as pa
+
+    return pa.schema([
+        ("livro_id", pa.int64()),
+        ("preco", pa.float64()),
+        ("avaliacao_numerica", pa.int64()),
+    ])
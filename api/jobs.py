@@ -0,0 +1,316 @@
+import os
+import sys
+import time
+import uuid
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+from sqlalchemy import select, text
+from sqlalchemy.exc import SQLAlchemyError
+from .database import SessionLocal, engine
+from .modelo import JobPipeline
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava de arquivo, apenas a verificação pelo banco
+    fcntl = None
+
+# Arquivo de trava que garante um único pipeline em execução por host (SQLite e demais bancos)
+TRAVA_CAMINHO = os.environ.get("PIPELINE_TRAVA_CAMINHO", os.path.join(tempfile.gettempdir(), "api_livros_pipeline.lock"))
+
+# Chaves dos advisory locks do PostgreSQL, que valem para todos os hosts da API:
+# execução do pipeline e registro de um novo job
+CHAVE_TRAVA_PIPELINE = 41_700_001
+CHAVE_TRAVA_DISPARO = 41_700_002
+
+# Tempo (em segundos) para o subprocesso de um job obter a trava no PostgreSQL
+PIPELINE_INICIO_SEGUNDOS = float(os.environ.get("PIPELINE_INICIO_SEGUNDOS", "60"))
+
+# Intervalo mínimo (em segundos) entre as gravações de progresso do pipeline no banco
+INTERVALO_PROGRESSO = 1.0
+
+STATUS_ATIVOS = ("em_fila", "executando")
+
+
+def agora():
+    return datetime.now(timezone.utc)
+
+
+def _segundos(inicio, fim):
+    # O SQLite devolve as datas sem fuso horário; todas são gravadas em UTC
+    return (fim.replace(tzinfo=None) - inicio.replace(tzinfo=None)).total_seconds()
+
+
+# Trava de execução única
+def trava_no_banco():
+    """
+    Indica se a trava do pipeline é um advisory lock do PostgreSQL, válido para
+    todos os hosts. Nos demais bancos, a trava de arquivo vale apenas para o host.
+    """
+    return engine.dialect.name == "postgresql"
+
+
+def adquirir_trava():
+    """
+    Tenta obter a trava exclusiva do pipeline sem bloquear.
+
+    No PostgreSQL, retorna a conexão que detém o advisory lock (a trava vale
+    enquanto ela estiver aberta). Nos demais bancos, retorna o descritor do
+    arquivo de trava (a trava vale enquanto ele, ou uma cópia herdada por um
+    subprocesso, estiver aberto). Retorna None se outro pipeline já estiver em execução.
+    """
+    if trava_no_banco():
+        conexao = engine.connect()
+        obtida = conexao.execute(text("SELECT pg_try_advisory_lock(:chave)"), {"chave": CHAVE_TRAVA_PIPELINE}).scalar()
+        # O advisory lock é da sessão e continua valendo depois do commit
+        conexao.commit()
+        if obtida:
+            return conexao
+        conexao.close()
+        return None
+
+    fd = os.open(TRAVA_CAMINHO, os.O_RDWR | os.O_CREAT, 0o644)
+    if fcntl is None:
+        return fd
+
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def liberar_trava(trava):
+    """
+    Libera a trava obtida por adquirir_trava.
+    """
+    if isinstance(trava, int):
+        os.close(trava)
+        return
+
+    # A conexão volta ao pool, e o advisory lock continuaria com ela
+    trava.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": CHAVE_TRAVA_PIPELINE})
+    trava.commit()
+    trava.close()
+
+
+def pipeline_em_execucao():
+    """
+    Verifica se algum processo detém a trava do pipeline (em qualquer host, no
+    PostgreSQL; neste host, nos demais bancos).
+    """
+    trava = adquirir_trava()
+    if trava is None:
+        return True
+    liberar_trava(trava)
+    return False
+
+
+def job_interrompido(job):
+    """
+    Indica se um job ativo não tem mais nenhum processo com a trava, ou seja,
+    se o pipeline terminou sem registrar o resultado. No PostgreSQL, o
+    subprocesso obtém a trava ao iniciar, e um job em fila há menos de
+    PIPELINE_INICIO_SEGUNDOS ainda é considerado em andamento.
+    """
+    if not trava_no_banco() and fcntl is None:
+        return False
+    if pipeline_em_execucao():
+        return False
+    return not (
+        trava_no_banco() and job.status == "em_fila"
+        and _segundos(job.criado_em, agora()) < PIPELINE_INICIO_SEGUNDOS
+    )
+
+
+def marcar_interrompido(job):
+    job.status, job.fase, job.finalizado_em = "falhou", "falhou", agora()
+    job.mensagem = "O processo do pipeline terminou sem registrar o resultado."
+
+
+# Disparo e acompanhamento dos jobs
+def job_ativo(db):
+    """
+    Retorna o job mais recente ainda em fila ou em execução, se houver.
+    """
+    return db.scalars(
+        select(JobPipeline).where(JobPipeline.status.in_(STATUS_ATIVOS)).order_by(JobPipeline.criado_em.desc())
+    ).first()
+
+
+def disparar_pipeline(db, solicitado_por, argumentos=()):
+    """
+    Registra um novo job e inicia o pipeline em um subprocesso, que herda a
+    trava de execução única. Retorna a tupla (job, criado): se já houver um
+    pipeline em execução, nenhum processo é iniciado e o job ativo é retornado.
+
+    No PostgreSQL, o registro do job é serializado entre os hosts por um
+    advisory lock de transação, e o subprocesso obtém a trava ao iniciar.
+    """
+    if trava_no_banco():
+        return _disparar_com_trava_no_banco(db, solicitado_por, argumentos)
+
+    fd = adquirir_trava()
+    if fd is None or (fcntl is None and job_ativo(db) is not None):
+        if fd is not None:
+            os.close(fd)
+        return job_ativo(db), False
+
+    try:
+        job = JobPipeline(
+            id=str(uuid.uuid4()),
+            status="em_fila",
+            fase="iniciando",
+            solicitado_por=solicitado_por,
+            criado_em=agora(),
+        )
+        db.add(job)
+        db.commit()
+
+        try:
+            processo = subprocess.Popen(
+                [sys.executable, "-m", "scripts.update_pipe", "--job-id", job.id, *argumentos],
+                pass_fds=(fd,) if fcntl is not None else (),
+            )
+        except OSError as e:
+            job.status, job.fase, job.mensagem, job.finalizado_em = "falhou", "falhou", str(e)[:500], agora()
+            db.commit()
+            raise
+
+        job.pid = processo.pid
+        db.commit()
+
+        # Recolhe o processo ao terminar para não deixar zumbis no worker
+        threading.Thread(target=processo.wait, daemon=True).start()
+        return job, True
+
+    finally:
+        # O subprocesso mantém a trava com a sua cópia do descritor
+        os.close(fd)
+
+
+def _disparar_com_trava_no_banco(db, solicitado_por, argumentos):
+    # Liberado no commit: outro host só consulta os jobs depois que este job estiver gravado
+    db.execute(text("SELECT pg_advisory_xact_lock(:chave)"), {"chave": CHAVE_TRAVA_DISPARO})
+
+    ativo = job_ativo(db)
+    if ativo is not None and job_interrompido(ativo):
+        marcar_interrompido(ativo)
+    elif ativo is not None or pipeline_em_execucao():
+        db.commit()
+        return ativo, False
+
+    job = JobPipeline(
+        id=str(uuid.uuid4()),
+        status="em_fila",
+        fase="iniciando",
+        solicitado_por=solicitado_por,
+        criado_em=agora(),
+    )
+    db.add(job)
+    db.commit()
+
+    try:
+        processo = subprocess.Popen([sys.executable, "-m", "scripts.update_pipe", "--job-id", job.id, *argumentos])
+    except OSError as e:
+        job.status, job.fase, job.mensagem, job.finalizado_em = "falhou", "falhou", str(e)[:500], agora()
+        db.commit()
+        raise
+
+    job.pid = processo.pid
+    db.commit()
+
+    threading.Thread(target=processo.wait, daemon=True).start()
+    return job, True
+
+
+def obter_job(db, job_id):
+    """
+    Retorna o job pelo id. Um job ativo sem nenhum processo com a trava é
+    marcado como falho, pois o pipeline terminou sem registrar o resultado.
+    """
+    job = db.get(JobPipeline, job_id)
+    if job is not None and job.status in STATUS_ATIVOS and job_interrompido(job):
+        marcar_interrompido(job)
+        db.commit()
+    return job
+
+
+def resumo_job(job):
+    """
+    Monta a resposta do job com o progresso, a duração e a vazão do pipeline.
+    """
+    fim = job.finalizado_em or agora()
+    duracao = _segundos(job.iniciado_em, fim) if job.iniciado_em else 0.0
+
+    return {
+        "id": job.id,
+        "status": job.status,
+        "fase": job.fase,
+        "solicitado_por": job.solicitado_por,
+        "criado_em": job.criado_em.isoformat() if job.criado_em else None,
+        "iniciado_em": job.iniciado_em.isoformat() if job.iniciado_em else None,
+        "finalizado_em": job.finalizado_em.isoformat() if job.finalizado_em else None,
+        "duracao_segundos": round(duracao, 2),
+        "paginas_baixadas": job.paginas_baixadas,
+        "livros_coletados": job.livros_coletados,
+        "livros_gravados": job.livros_gravados,
+        "paginas_por_segundo": round(job.paginas_baixadas / duracao, 2) if duracao else 0.0,
+        "livros_por_segundo": round(job.livros_coletados / duracao, 2) if duracao else 0.0,
+        "inseridos": job.inseridos,
+        "atualizados": job.atualizados,
+        "excluidos": job.excluidos,
+        "mensagem": job.mensagem,
+    }
+
+
+class RelatorioJob:
+    """
+    Usado pelo pipeline para gravar a fase e o progresso do job no banco, em
+    uma sessão própria (fora da transação da carga) e no máximo uma vez a cada
+    INTERVALO_PROGRESSO segundos. Falhas ao gravar o progresso não interrompem o pipeline.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._pendente = {}
+        self._gravado_em = 0.0
+        self._lock = threading.Lock()
+
+    def atualizar(self, forcar=False, **campos):
+        with self._lock:
+            self._pendente.update(campos)
+            if not forcar and time.monotonic() - self._gravado_em < INTERVALO_PROGRESSO:
+                return
+            pendente, self._pendente = self._pendente, {}
+            self._gravado_em = time.monotonic()
+
+        db = SessionLocal()
+        try:
+            db.query(JobPipeline).filter(JobPipeline.id == self.job_id).update(pendente)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            print(f"Aviso: não foi possível atualizar o progresso do job {self.job_id}: {e}")
+            with self._lock:
+                self._pendente = {**pendente, **self._pendente}
+        finally:
+            db.close()
+
+    def iniciar(self):
+        self.atualizar(True, status="executando", fase="coleta", iniciado_em=agora(), pid=os.getpid())
+
+    def fase(self, fase, **campos):
+        self.atualizar(True, fase=fase, **campos)
+
+    def finalizar(self, sucesso, mensagem=None, **campos):
+        self.atualizar(
+            True,
+            status="concluido" if sucesso else "falhou",
+            fase="concluido" if sucesso else "falhou",
+            finalizado_em=agora(),
+            mensagem=mensagem[:500] if mensagem else None,
+            **campos,
+        )
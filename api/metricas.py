@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import uuid
+import tempfile
+import threading
+from flask import request, has_request_context
+from sqlalchemy import event
+
+# Pasta com um arquivo de métricas por processo, lida pela rota /metrics de qualquer worker
+METRICAS_DIR = os.environ.get("METRICAS_DIR", os.path.join(tempfile.gettempdir(), "api_livros_metricas"))
+
+# Intervalo (em segundos) entre as gravações do arquivo de métricas de cada worker
+METRICAS_INTERVALO = float(os.environ.get("METRICAS_INTERVALO_SEGUNDOS", "1"))
+
+# Limites superiores (em segundos) das faixas de cada histograma
+FAIXAS_REQUISICAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAIXAS_CONSULTA = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+FAIXAS_INFERENCIA = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01, 0.05, 0.25)
+
+# Nome -> (tipo, descrição, faixas do histograma)
+DEFINICOES = {
+    "api_requisicoes_total": ("counter", "Requisições atendidas, por rota, método e status.", None),
+    "api_requisicao_duracao_segundos": ("histogram", "Duração das requisições, por rota e método.", FAIXAS_REQUISICAO),
+    "api_db_consultas_total": ("counter", "Consultas executadas no banco, por rota e operação.", None),
+    "api_db_consulta_duracao_segundos": ("histogram", "Duração das consultas ao banco, por rota e operação.", FAIXAS_CONSULTA),
+    "api_db_pool_conexoes": ("gauge", "Conexões do pool do banco, por estado (soma dos workers ativos).", None),
+    "api_db_pool_tamanho": ("gauge", "Tamanho configurado do pool do banco (soma dos workers ativos).", None),
+    "api_inferencia_livros_total": ("counter", "Livros classificados pelo modelo nas rotas de predição.", None),
+    "api_inferencia_duracao_segundos": ("histogram", "Duração da inferência do modelo, por tipo de predição.", FAIXAS_INFERENCIA),
+}
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted(rotulos.items()))
+
+
+class Metricas:
+    """
+    Contadores e histogramas do processo, guardados em memória.
+
+    Uma thread grava o estado em um arquivo próprio do processo na pasta
+    METRICAS_DIR a cada METRICAS_INTERVALO segundos, e a rota /metrics soma os
+    arquivos de todos os workers. Os arquivos de workers que já terminaram
+    continuam sendo somados nos contadores e histogramas, para que os totais
+    nunca diminuam; os gauges consideram apenas os workers ativos.
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.engines = []
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _iniciar_processo(self):
+        # Cada processo (inclusive após o fork de um master com preload) começa do zero
+        self._pid = os.getpid()
+        self._arquivo = os.path.join(self.pasta, f"metricas_{self._pid}_{uuid.uuid4().hex[:8]}.json")
+        self._contadores = {}
+        self._histogramas = {}
+        self._alterado = False
+        threading.Thread(target=self._gravar_periodicamente, name="metricas", daemon=True).start()
+
+    def incrementar(self, nome, rotulos, valor=1):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._iniciar_processo()
+            chave = _chave(nome, rotulos)
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+            self._alterado = True
+
+    def observar(self, nome, rotulos, valor):
+        faixas = DEFINICOES[nome][2]
+        with self._lock:
+            if self._pid != os.getpid():
+                self._iniciar_processo()
+            chave = _chave(nome, rotulos)
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                # Contagem por faixa (a última é +Inf), soma e total de observações
+                histograma = self._histogramas[chave] = [[0] * (len(faixas) + 1), 0.0, 0]
+
+            for i, limite in enumerate(faixas):
+                if valor <= limite:
+                    break
+            else:
+                i = len(faixas)
+            histograma[0][i] += 1
+            histograma[1] += valor
+            histograma[2] += 1
+            self._alterado = True
+
+    def gauges(self):
+        """
+        Estado atual do pool de conexões de cada engine instrumentada.
+        """
+        gauges = {}
+        for engine, papel in self.engines:
+            pool = engine.pool
+            if not hasattr(pool, "checkedout"):
+                continue
+            rotulos = {"engine": engine.url.get_backend_name(), "papel": papel}
+            for estado, valor in (("em_uso", pool.checkedout()), ("ociosas", pool.checkedin())):
+                chave = _chave("api_db_pool_conexoes", {**rotulos, "estado": estado})
+                gauges[chave] = gauges.get(chave, 0) + valor
+            chave = _chave("api_db_pool_tamanho", rotulos)
+            gauges[chave] = gauges.get(chave, 0) + pool.size()
+        return gauges
+
+    def _estado(self):
+        with self._lock:
+            return {
+                "pid": self._pid,
+                "contadores": [[nome, dict(rotulos), valor] for (nome, rotulos), valor in self._contadores.items()],
+                "histogramas": [
+                    [nome, dict(rotulos), list(contagens), soma, total]
+                    for (nome, rotulos), (contagens, soma, total) in self._histogramas.items()
+                ],
+                "gauges": [[nome, dict(rotulos), valor] for (nome, rotulos), valor in self.gauges().items()],
+            }
+
+    def gravar(self):
+        """
+        Grava o estado do processo no seu arquivo de métricas (troca atômica).
+        """
+        if self._pid != os.getpid():
+            return
+
+        self._alterado = False
+        os.makedirs(self.pasta, exist_ok=True)
+        with open(f"{self._arquivo}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._estado(), f)
+        os.replace(f"{self._arquivo}.tmp", self._arquivo)
+
+    def _gravar_periodicamente(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(METRICAS_INTERVALO)
+            if self._alterado:
+                try:
+                    self.gravar()
+                except OSError as e:
+                    print(f"AVISO: não foi possível gravar as métricas do processo {pid}: {e}")
+
+    def limpar(self):
+        """
+        Remove os arquivos de métricas de execuções anteriores do servidor.
+        """
+        os.makedirs(self.pasta, exist_ok=True)
+        for arquivo in os.listdir(self.pasta):
+            if arquivo.startswith("metricas_"):
+                os.remove(os.path.join(self.pasta, arquivo))
+
+    def _estados(self):
+        """
+        Estado deste processo (lido da memória) e dos demais (lidos dos arquivos).
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                self._iniciar_processo()
+
+        estados = [self._estado()]
+        try:
+            arquivos = os.listdir(self.pasta)
+        except FileNotFoundError:
+            return estados
+
+        for arquivo in arquivos:
+            caminho = os.path.join(self.pasta, arquivo)
+            if not arquivo.endswith(".json") or caminho == self._arquivo:
+                continue
+            try:
+                with open(caminho, encoding="utf-8") as f:
+                    estados.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return estados
+
+    def exportar(self):
+        """
+        Soma as métricas de todos os processos no formato de texto do Prometheus.
+        """
+        contadores, histogramas, gauges = {}, {}, {}
+        for estado in self._estados():
+            for nome, rotulos, valor in estado["contadores"]:
+                chave = _chave(nome, rotulos)
+                contadores[chave] = contadores.get(chave, 0) + valor
+
+            for nome, rotulos, contagens, soma, total in estado["histogramas"]:
+                chave = _chave(nome, rotulos)
+                acumulado = histogramas.setdefault(chave, [[0] * len(contagens), 0.0, 0])
+                acumulado[0] = [a + b for a, b in zip(acumulado[0], contagens)]
+                acumulado[1] += soma
+                acumulado[2] += total
+
+            if estado["pid"] == self._pid or _processo_ativo(estado["pid"]):
+                for nome, rotulos, valor in estado["gauges"]:
+                    chave = _chave(nome, rotulos)
+                    gauges[chave] = gauges.get(chave, 0) + valor
+
+        linhas = []
+        for nome, (tipo, descricao, faixas) in DEFINICOES.items():
+            linhas.append(f"# HELP {nome} {descricao}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+
+            if tipo == "histogram":
+                for (_, rotulos), (contagens, soma, total) in sorted(i for i in histogramas.items() if i[0][0] == nome):
+                    acumulado = 0
+                    for limite, contagem in zip((*faixas, "+Inf"), contagens):
+                        acumulado += contagem
+                        linhas.append(f"{nome}_bucket{_rotulos((*rotulos, ('le', str(limite))))} {acumulado}")
+                    linhas.append(f"{nome}_sum{_rotulos(rotulos)} {soma}")
+                    linhas.append(f"{nome}_count{_rotulos(rotulos)} {total}")
+            else:
+                valores = contadores if tipo == "counter" else gauges
+                for (_, rotulos), valor in sorted(i for i in valores.items() if i[0][0] == nome):
+                    linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+
+        return "\n".join(linhas) + "\n"
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ""
+    escapados = (
+        (nome, str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for nome, valor in rotulos
+    )
+    return "{" + ",".join(f'{nome}="{valor}"' for nome, valor in escapados) + "}"
+
+
+def _processo_ativo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+metricas = Metricas(METRICAS_DIR)
+
+
+def rota_atual():
+    """
+    Modelo da rota da requisição em andamento (ex.: /api/v1/books/<int:livro_id>),
+    que mantém baixa a quantidade de séries das métricas.
+    """
+    if not has_request_context():
+        return "fora_de_requisicao"
+    return request.url_rule.rule if request.url_rule is not None else "desconhecida"
+
+
+# Instrumentação do banco
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    context._inicio_consulta = time.perf_counter()
+
+
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    duracao = time.perf_counter() - context._inicio_consulta
+    rotulos = {"rota": rota_atual(), "operacao": (statement.split(None, 1) or ["-"])[0].upper()}
+    metricas.incrementar("api_db_consultas_total", rotulos)
+    metricas.observar("api_db_consulta_duracao_segundos", rotulos, duracao)
+
+
+def instrumentar_engine(engine, papel="principal"):
+    """
+    Registra a contagem e a duração das consultas e o estado do pool de uma
+    engine. O papel ("principal" ou "replica") identifica o pool nos gauges.
+    """
+    event.listen(engine, "before_cursor_execute", _antes_da_consulta)
+    event.listen(engine, "after_cursor_execute", _depois_da_consulta)
+    metricas.engines.append((engine, papel))
+
+
+# Instrumentação das requisições e da inferência
+def registrar_requisicao(metodo, status, duracao):
+    rota = rota_atual()
+    metricas.incrementar("api_requisicoes_total", {"rota": rota, "metodo": metodo, "status": str(status)})
+    metricas.observar("api_requisicao_duracao_segundos", {"rota": rota, "metodo": metodo}, duracao)
+
+
+def registrar_inferencia(tipo, livros, duracao):
+    metricas.incrementar("api_inferencia_livros_total", {"tipo": tipo}, livros)
+    metricas.observar("api_inferencia_duracao_segundos", {"tipo": tipo}, duracao)
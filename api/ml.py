@@ -0,0 +1,387 @@
+import os
+import re
+import time
+import threading
+from datetime import datetime, timezone
+from sqlalchemy import update
+from .modelo import Livro
+
+# Pasta com as versões do modelo, uma subpasta por versão (models/v1, models/v2, ...)
+MODELOS_DIR = os.environ.get("MODELOS_DIR", "models")
+
+# Arquivo com o nome da versão servida pela API
+ARQUIVO_VERSAO_ATUAL = "ATUAL"
+
+# Intervalo mínimo (em segundos) entre as verificações do arquivo ATUAL em cada worker
+MODELOS_VERIFICAR_SEGUNDOS = float(os.environ.get("MODELOS_VERIFICAR_SEGUNDOS", "5"))
+
+ARQUIVO_MODELO = "kmeans_model.joblib"
+ARQUIVO_SCALER = "scaler.joblib"
+
+# Arrays do scaler e do K-Means usados na inferência, gerados a partir dos dois arquivos acima
+ARQUIVO_INFERENCIA = "inferencia.npz"
+
+# Mapeamento dos nomes dos clusters
+cluster_names = {
+    0: "Econômico",
+    1: "Custo-Benefício",
+    2: "Premium",
+    3: "Colecionador",
+    4: "Destaque"
+}
+
+# Mapeamento para feature engineering
+rating_map = {"One": 1, 
+              "Two": 2, 
+              "Three": 3, 
+              "Four": 4, 
+              "Five": 5}
+
+# Quantidade máxima de linhas enviadas de uma vez ao scaler e ao K-Means
+TAMANHO_LOTE_PREDICAO = 10_000
+
+
+class ModeloIndisponivel(Exception):
+    """
+    A versão pedida do modelo não existe ou os seus arquivos não puderam ser carregados.
+    """
+
+
+def compilar_modelo(kmeans, scaler):
+    """
+    Extrai do StandardScaler e do KMeans treinados os arrays usados na
+    inferência: média e escala das features e os centróides dos clusters.
+    """
+    import numpy as np
+
+    centroides = np.asarray(kmeans.cluster_centers_, dtype=np.float64)
+    total_features = centroides.shape[1]
+    media = scaler.mean_ if scaler.with_mean else np.zeros(total_features)
+    escala = scaler.scale_ if scaler.with_std else np.ones(total_features)
+
+    return {
+        "media": np.asarray(media, dtype=np.float64),
+        "escala": np.asarray(escala, dtype=np.float64),
+        "centroides": centroides,
+    }
+
+
+class ModeloCarregado:
+    """
+    Uma versão do modelo pronta para uso, reduzida aos arrays da inferência. Os
+    arrays nunca mudam depois de carregados, por isso a troca de versão é só a
+    troca da referência.
+    """
+
+    def __init__(self, versao, media, escala, centroides):
+        self.versao = versao
+        self.media = media
+        self.escala = escala
+        self.centroides = centroides
+        self.normas_centroides = (centroides ** 2).sum(axis=1)
+        self.carregado_em = datetime.now(timezone.utc)
+
+    def prever(self, features):
+        """
+        Retorna o índice do centróide mais próximo de cada linha de features.
+
+        Padroniza as features como o StandardScaler.transform e escolhe o menor
+        ||c||² - 2·x·c, como o KMeans.predict (o termo ||x||² é igual para todos
+        os centróides e não muda o resultado).
+        """
+        escalonadas = (features - self.media) / self.escala
+        return (self.normas_centroides - 2 * escalonadas @ self.centroides.T).argmin(axis=1)
+
+
+class RegistroModelos:
+    """
+    Mantém a versão do modelo servida pelo processo.
+
+    A versão em produção é a indicada no arquivo ATUAL da pasta de modelos. Cada
+    worker confere esse arquivo no máximo a cada MODELOS_VERIFICAR_SEGUNDOS e, se
+    ele mudou, carrega a nova versão e a coloca no lugar da anterior de uma só vez.
+    Se a nova versão não puder ser carregada, a anterior continua em uso.
+
+    A API lê de cada versão apenas o arquivo inferencia.npz, com os arrays do
+    scaler e do K-Means, usando só o numpy: o scikit-learn não é importado pelos
+    workers. Versões sem esse arquivo são compiladas na carga a partir dos
+    artefatos do scikit-learn (abertos com mmap_mode='r').
+    """
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.atual = None
+        self.erro = None
+        self._lock = threading.Lock()
+        self._verificado_em = None
+        self._assinatura = None
+
+    def versoes(self):
+        """
+        Lista as versões salvas na pasta de modelos, da mais antiga para a mais nova.
+        """
+        try:
+            nomes = os.listdir(self.pasta)
+        except FileNotFoundError:
+            return []
+
+        versoes = [
+            nome for nome in nomes
+            if re.fullmatch(r"v\d+", nome) and (
+                os.path.isfile(os.path.join(self.pasta, nome, ARQUIVO_INFERENCIA))
+                or self._tem_artefatos(nome)
+            )
+        ]
+        return sorted(versoes, key=lambda nome: int(nome[1:]))
+
+    def _tem_artefatos(self, versao):
+        return all(
+            os.path.isfile(os.path.join(self.pasta, versao, arquivo)) for arquivo in (ARQUIVO_MODELO, ARQUIVO_SCALER)
+        )
+
+    def proxima_versao(self):
+        versoes = self.versoes()
+        return f"v{int(versoes[-1][1:]) + 1}" if versoes else "v1"
+
+    def versao_em_producao(self):
+        """
+        Versão indicada no arquivo ATUAL ou, na falta dele, a mais recente.
+        """
+        try:
+            with open(os.path.join(self.pasta, ARQUIVO_VERSAO_ATUAL), encoding="utf-8") as f:
+                versao = f.read().strip()
+            if versao:
+                return versao
+        except FileNotFoundError:
+            pass
+
+        versoes = self.versoes()
+        return versoes[-1] if versoes else None
+
+    def promover(self, versao):
+        """
+        Grava a versão no arquivo ATUAL. A troca do arquivo é atômica, e os
+        workers passam a servir a versão na próxima verificação.
+        """
+        if versao not in self.versoes():
+            raise ModeloIndisponivel(f"Versão '{versao}' não encontrada em '{self.pasta}'.")
+
+        caminho = os.path.join(self.pasta, ARQUIVO_VERSAO_ATUAL)
+        with open(f"{caminho}.tmp", "w", encoding="utf-8") as f:
+            f.write(f"{versao}\n")
+        os.replace(f"{caminho}.tmp", caminho)
+
+    def carregar_artefatos(self, versao):
+        """
+        Lê o KMeans e o StandardScaler treinados de uma versão (importa o scikit-learn).
+        """
+        import joblib
+
+        pasta_versao = os.path.join(self.pasta, versao)
+        kmeans = joblib.load(os.path.join(pasta_versao, ARQUIVO_MODELO), mmap_mode="r")
+        scaler = joblib.load(os.path.join(pasta_versao, ARQUIVO_SCALER), mmap_mode="r")
+        return kmeans, scaler
+
+    def compilar(self, versao):
+        """
+        Gera o arquivo inferencia.npz de uma versão a partir dos artefatos do scikit-learn.
+        """
+        import numpy as np
+
+        caminho = os.path.join(self.pasta, versao, ARQUIVO_INFERENCIA)
+        with open(f"{caminho}.tmp", "wb") as f:
+            np.savez(f, **compilar_modelo(*self.carregar_artefatos(versao)))
+        os.replace(f"{caminho}.tmp", caminho)
+        return caminho
+
+    def carregar(self, versao):
+        """
+        Carrega e valida uma versão do modelo, sem colocá-la em uso.
+        """
+        # Importado apenas na primeira carga
+        import numpy as np
+
+        caminho = os.path.join(self.pasta, versao, ARQUIVO_INFERENCIA)
+        try:
+            if os.path.isfile(caminho):
+                with np.load(caminho) as arrays:
+                    modelo = ModeloCarregado(versao, arrays["media"], arrays["escala"], arrays["centroides"])
+            else:
+                print(f"AVISO: versão '{versao}' sem {ARQUIVO_INFERENCIA}; gere-o com python -m scripts.compilar_modelo {versao}.")
+                modelo = ModeloCarregado(versao, **compilar_modelo(*self.carregar_artefatos(versao)))
+
+            # Os arrays devem corresponder às duas features (preço e avaliação)
+            if modelo.centroides.ndim != 2 or not (modelo.centroides.shape[1] == len(modelo.media) == len(modelo.escala) == 2):
+                raise ValueError("os arrays do modelo não correspondem às features (preço, avaliação)")
+            modelo.prever(np.zeros((1, 2)))
+        except Exception as e:
+            raise ModeloIndisponivel(f"Não foi possível carregar a versão '{versao}' do modelo: {e}") from e
+
+        return modelo
+
+    def _assinatura_atual(self):
+        try:
+            estado = os.stat(os.path.join(self.pasta, ARQUIVO_VERSAO_ATUAL))
+            return estado.st_mtime_ns, estado.st_size
+        except FileNotFoundError:
+            return None
+
+    def recarregar(self, versao=None):
+        """
+        Carrega a versão informada (ou a versão em produção) e a coloca em uso.
+        Retorna a tupla (anterior, nova). Em caso de falha, a versão anterior
+        continua em uso e ModeloIndisponivel é lançada.
+        """
+        with self._lock:
+            self._assinatura = self._assinatura_atual()
+            self._verificado_em = time.monotonic()
+
+            versao = versao or self.versao_em_producao()
+            anterior = self.atual
+            if versao is None:
+                self.erro = f"Nenhuma versão do modelo encontrada em '{self.pasta}'."
+                raise ModeloIndisponivel(self.erro)
+
+            try:
+                novo = self.carregar(versao)
+            except ModeloIndisponivel as e:
+                self.erro = str(e)
+                raise
+
+            self.atual, self.erro = novo, None
+            print(f"Modelo de ML versão '{versao}' carregado com sucesso.")
+            return anterior, novo
+
+    def verificar(self):
+        """
+        Recarrega o modelo se o arquivo ATUAL mudou desde a última verificação.
+        """
+        if self._verificado_em is not None and time.monotonic() - self._verificado_em < MODELOS_VERIFICAR_SEGUNDOS:
+            return
+
+        self._verificado_em = time.monotonic()
+        if self.atual is not None and self._assinatura_atual() == self._assinatura:
+            return
+
+        versao = self.versao_em_producao()
+        if self.atual is not None and self.atual.versao == versao:
+            self._assinatura = self._assinatura_atual()
+            return
+
+        try:
+            self.recarregar(versao)
+        except ModeloIndisponivel as e:
+            print(f"AVISO: {e}")
+            print("O endpoint de predição continuará usando a versão já carregada, se houver.")
+
+    def obter(self):
+        """
+        Retorna o modelo em uso (carregando-o no primeiro acesso) ou None.
+        """
+        self.verificar()
+        return self.atual
+
+
+registro_modelos = RegistroModelos(MODELOS_DIR)
+
+
+def modelo_atual():
+    """
+    Retorna a versão do modelo em uso neste processo, ou None se nenhuma pôde ser carregada.
+    """
+    return registro_modelos.obter()
+
+
+def modelos_disponiveis():
+    """
+    Indica se há um modelo e um scaler carregados.
+    """
+    return modelo_atual() is not None
+
+
+def nome_cluster(indice):
+    """
+    Retorna o nome de negócio de um cluster.
+    """
+    return cluster_names.get(int(indice), "Desconhecido")
+
+
+def prever_clusters(precos, avaliacoes, modelo=None):
+    """
+    Prevê o cluster de vários livros de uma só vez.
+
+    Monta a matriz de features (preço, avaliação numérica) e calcula os clusters
+    com operações vetorizadas, por lote de TAMANHO_LOTE_PREDICAO linhas. Retorna um
+    array com os índices dos clusters, na mesma ordem da entrada. Sem um modelo
+    informado, usa a versão em uso no processo.
+    """
+    import numpy as np
+
+    modelo = modelo or modelo_atual()
+    avaliacoes_numericas = np.fromiter(
+        (rating_map.get(avaliacao, 0) for avaliacao in avaliacoes), dtype=np.float64, count=len(avaliacoes)
+    )
+    features = np.column_stack([np.asarray(precos, dtype=np.float64), avaliacoes_numericas])
+
+    clusters = np.empty(len(features), dtype=np.int64)
+    for inicio in range(0, len(features), TAMANHO_LOTE_PREDICAO):
+        lote = features[inicio:inicio + TAMANHO_LOTE_PREDICAO]
+        clusters[inicio:inicio + TAMANHO_LOTE_PREDICAO] = modelo.prever(lote)
+
+    return clusters
+
+
+def indice_cluster(valor):
+    """
+    Converte o nome de um cluster (ex.: "Premium") ou o seu índice em texto
+    para o índice numérico. Retorna None se o valor não corresponder a um cluster.
+    Os índices válidos são os centróides do modelo em produção (ou os nomes
+    conhecidos, sem modelo carregado).
+    """
+    # isdecimal e não isdigit: caracteres como '²' são dígitos, mas int() os rejeita
+    if valor.isdecimal():
+        indice = int(valor)
+        modelo = modelo_atual()
+        total_clusters = len(modelo.centroides) if modelo is not None else len(cluster_names)
+        return indice if indice < total_clusters else None
+
+    for indice, nome in cluster_names.items():
+        if nome.lower() == valor.lower():
+            return indice
+    return None
+
+
+def reclassificar_livros(db, apenas_pendentes=False, modelo=None):
+    """
+    Calcula o cluster dos livros do banco e grava na coluna 'cluster'.
+
+    Os livros são lidos em lotes por id e cada lote é classificado com uma única
+    chamada vetorizada ao modelo. Com apenas_pendentes=True, só os livros ainda
+    sem cluster são classificados. Todos os lotes usam a mesma versão do modelo,
+    mesmo que outra seja carregada no meio da reclassificação. Retorna a
+    quantidade de livros classificados.
+    """
+    modelo = modelo or modelo_atual()
+    ultimo_id = 0
+    total = 0
+
+    query = db.query(Livro.id, Livro.preco, Livro.avaliacao)
+    if apenas_pendentes:
+        query = query.filter(Livro.cluster.is_(None))
+
+    while True:
+        linhas = (
+            query.filter(Livro.id > ultimo_id)
+            .order_by(Livro.id)
+            .limit(TAMANHO_LOTE_PREDICAO)
+            .all()
+        )
+        if not linhas:
+            return total
+
+        ids, precos, avaliacoes = zip(*linhas)
+        clusters = prever_clusters(precos, avaliacoes, modelo)
+        db.execute(update(Livro), [{"id": id_livro, "cluster": int(cluster)} for id_livro, cluster in zip(ids, clusters)])
+
+        ultimo_id = ids[-1]
+        total += len(ids)
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
 from api.database import Base_tabela
 
@@ -15,9 +15,20 @@ class Livro(Base_tabela):
     titulo = Column(String(255), nullable=False, index=True)
     preco = Column(Float, nullable=False)
     avaliacao = Column(String(50))
+    # Avaliação numérica (1 a 5, 0 se desconhecida), preenchida pela carga do banco
+    avaliacao_num = Column(Integer)
     disponibilidade = Column(String(100))
     categoria = Column(String(50), index=True)
     url_imagem = Column(String(500))
+    cluster = Column(Integer, index=True)
+
+    # Índices na mesma ordem da paginação por keyset das rotas de listagem, para
+    # que o filtro e a ordenação sejam resolvidos por uma única varredura ordenada
+    __table_args__ = (
+        Index('ix_livros_avaliacao_num_titulo', 'avaliacao_num', 'titulo', 'id'),
+        Index('ix_livros_preco', 'preco', 'id'),
+        Index('ix_livros_categoria_preco', 'categoria', 'preco', 'id'),
+    )
 
     def __repr__(self):
         return f"<Livro(id={self.id}, titulo='{self.titulo}')>"
@@ -34,4 +45,96 @@ class Usuario(Base_tabela):
     password = Column(String(255), nullable=False)
 
     def __repr__(self):
-        return f"<Usuario(username='{self.username}')>"
\ No newline at end of file
+        return f"<Usuario(username='{self.username}')>"
+
+
+class VersaoCatalogo(Base_tabela):
+    """
+    Tabela de linha única com a versão do catálogo de livros.
+    A versão é incrementada pela carga do banco e invalida os caches da API.
+    """
+
+    __tablename__ = 'catalogo_versao'
+
+    id = Column(Integer, primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(DateTime)
+
+    def __repr__(self):
+        return f"<VersaoCatalogo(versao={self.versao})>"
+
+
+# Tabelas de agregados, recalculadas a cada carga do catálogo
+class EstatisticaGeral(Base_tabela):
+    """
+    Tabela de linha única com o total de livros e o preço médio da coleção.
+    """
+
+    __tablename__ = 'estatisticas_gerais'
+
+    id = Column(Integer, primary_key=True)
+    total_livros = Column(Integer, nullable=False)
+    preco_medio = Column(Float)
+
+
+class EstatisticaAvaliacao(Base_tabela):
+    """
+    Quantidade de livros por avaliação.
+    """
+
+    __tablename__ = 'estatisticas_avaliacoes'
+
+    avaliacao = Column(String(50), primary_key=True)
+    total_livros = Column(Integer, nullable=False)
+
+
+class EstatisticaCategoria(Base_tabela):
+    """
+    Quantidade de livros e preço médio por categoria. Também serve como a lista de categorias.
+    """
+
+    __tablename__ = 'estatisticas_categorias'
+
+    categoria = Column(String(50), primary_key=True)
+    total_livros = Column(Integer, nullable=False)
+    preco_medio = Column(Float)
+
+
+class EstatisticaCluster(Base_tabela):
+    """
+    Quantidade de livros, preço médio e avaliação média por cluster do modelo K-Means.
+    """
+
+    __tablename__ = 'estatisticas_clusters'
+
+    cluster = Column(Integer, primary_key=True)
+    total_livros = Column(Integer, nullable=False)
+    preco_medio = Column(Float)
+    avaliacao_media = Column(Float)
+
+class JobPipeline(Base_tabela):
+    """
+    Execução do pipeline de atualização disparada pela API, com a fase atual e
+    o progresso reportado pelo próprio pipeline.
+    """
+
+    __tablename__ = 'jobs_pipeline'
+
+    id = Column(String(36), primary_key=True)
+    status = Column(String(20), nullable=False)
+    fase = Column(String(30), nullable=False)
+    solicitado_por = Column(String(20))
+    pid = Column(Integer)
+    criado_em = Column(DateTime, nullable=False)
+    iniciado_em = Column(DateTime)
+    finalizado_em = Column(DateTime)
+    paginas_baixadas = Column(Integer, nullable=False, default=0)
+    livros_coletados = Column(Integer, nullable=False, default=0)
+    livros_gravados = Column(Integer, nullable=False, default=0)
+    inseridos = Column(Integer)
+    atualizados = Column(Integer)
+    excluidos = Column(Integer)
+    mensagem = Column(String(500))
+
+    def __repr__(self):
+        return f"<JobPipeline(id='{self.id}', status='{self.status}')>"
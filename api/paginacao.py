@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+import math
+from flask import request, abort, jsonify, url_for
+from sqlalchemy import and_, or_, Integer, Float, Numeric, String
+
+# Tamanho padrão e máximo de página para as rotas de listagem
+TAMANHO_PAGINA_PADRAO = 100
+TAMANHO_PAGINA_MAXIMO = 1000
+
+
+def codificar_cursor(valores):
+    """
+    Codifica os valores da última linha de uma página em um cursor opaco (base64 de JSON).
+    """
+    bruto = json.dumps(list(valores), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(bruto).decode("ascii").rstrip("=")
+
+
+def valor_compativel(coluna, valor):
+    """
+    Verifica se um valor do cursor pode ser comparado com a coluna de ordenação:
+    inteiro para colunas inteiras, número finito para as demais colunas
+    numéricas e texto para as de texto. Nulo só é aceito em colunas que o permitem.
+    """
+    if valor is None:
+        return getattr(coluna, "nullable", False)
+    if isinstance(valor, bool):
+        return False
+    if isinstance(coluna.type, Integer):
+        return isinstance(valor, int)
+    if isinstance(coluna.type, (Numeric, Float)):
+        return isinstance(valor, (int, float)) and math.isfinite(valor)
+    if isinstance(coluna.type, String):
+        return isinstance(valor, str)
+    return False
+
+
+def decodificar_cursor(cursor, colunas):
+    """
+    Decodifica um cursor recebido na query string, abortando com 400 se ele for
+    inválido ou se algum valor não for compatível com a coluna de ordenação.
+    """
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + preenchimento))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        abort(400, description="Parâmetro 'cursor' inválido.")
+
+    if not isinstance(valores, list) or len(valores) != len(colunas):
+        abort(400, description="Parâmetro 'cursor' inválido.")
+
+    if not all(valor_compativel(coluna, valor) for coluna, valor in zip(colunas, valores)):
+        abort(400, description="Parâmetro 'cursor' inválido.")
+
+    return valores
+
+
+def ler_paginacao(colunas):
+    """
+    Lê os parâmetros 'limit', 'cursor' e 'after_id' da requisição.
+
+    'after_id' só é aceito quando a ordenação é apenas pelo id, caso em que é
+    equivalente ao cursor. Retorna a tupla (limite, valores_do_cursor).
+    """
+    limite = request.args.get("limit", TAMANHO_PAGINA_PADRAO)
+    try:
+        limite = int(limite)
+    except (TypeError, ValueError):
+        abort(400, description="Parâmetro 'limit' deve ser um número inteiro.")
+
+    if limite < 1 or limite > TAMANHO_PAGINA_MAXIMO:
+        abort(400, description=f"Parâmetro 'limit' deve estar entre 1 e {TAMANHO_PAGINA_MAXIMO}.")
+
+    cursor = request.args.get("cursor")
+    after_id = request.args.get("after_id")
+
+    if cursor:
+        return limite, decodificar_cursor(cursor, colunas)
+
+    if after_id:
+        if len(colunas) != 1:
+            abort(400, description="Use o parâmetro 'cursor' para paginar esta rota.")
+        try:
+            return limite, [int(after_id)]
+        except ValueError:
+            abort(400, description="Parâmetro 'after_id' deve ser um número inteiro.")
+
+    return limite, None
+
+
+def condicao_apos(colunas, valores):
+    """
+    Monta a condição de keyset (c1, c2, ...) > (v1, v2, ...) de forma portável
+    entre SQLite e PostgreSQL, permitindo o uso dos índices das colunas. O termo
+    redundante c1 >= v1 faz o banco iniciar a leitura do índice na posição do
+    cursor, em vez de percorrer as páginas anteriores.
+    """
+    coluna, valor = colunas[0], valores[0]
+    if len(colunas) == 1:
+        return coluna > valor
+    return and_(coluna >= valor, or_(coluna > valor, and_(coluna == valor, condicao_apos(colunas[1:], valores[1:]))))
+
+
+def paginar(query, colunas, limite, cursor):
+    """
+    Aplica a paginação por keyset em uma query ordenada pelas colunas informadas.
+
+    Busca uma linha a mais que o limite para saber se existe próxima página.
+    Retorna a tupla (linhas, proximo_cursor), com proximo_cursor None na última página.
+    """
+    if cursor is not None:
+        query = query.filter(condicao_apos(colunas, cursor))
+
+    linhas = query.order_by(*colunas).limit(limite + 1).all()
+
+    if len(linhas) <= limite:
+        return linhas, None
+
+    linhas = linhas[:limite]
+    ultima = linhas[-1]
+    proximo_cursor = codificar_cursor(getattr(ultima, coluna.key) for coluna in colunas)
+
+    return linhas, proximo_cursor
+
+
+def resposta_paginada(resultado, proximo_cursor):
+    """
+    Serializa a página e informa o cursor da próxima página nos cabeçalhos
+    'X-Next-Cursor' e 'Link', mantendo o corpo da resposta como uma lista.
+    """
+    resposta = jsonify(resultado)
+    aplicar_cabecalhos_paginacao(resposta, proximo_cursor)
+    return resposta
+
+
+def aplicar_cabecalhos_paginacao(resposta, proximo_cursor):
+    """
+    Adiciona os cabeçalhos de paginação a uma resposta já construída.
+    """
+    if proximo_cursor is None:
+        return resposta
+
+    argumentos = request.args.to_dict(flat=True)
+    argumentos.pop("after_id", None)
+    argumentos["cursor"] = proximo_cursor
+
+    proxima_url = url_for(request.endpoint, **(request.view_args or {}), **argumentos)
+
+    resposta.headers["X-Next-Cursor"] = proximo_cursor
+    resposta.headers["Link"] = f'<{proxima_url}>; rel="next"'
+    return resposta
@@ -0,0 +1,150 @@
+import os
+import time
+import logging
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.exc import SQLAlchemyError, OperationalError
+from .database import engine, engines_leitura
+from .modelo import VersaoCatalogo
+from .cache import obter_versao_catalogo
+
+# Intervalo (em segundos) entre as verificações de saúde de cada réplica
+REPLICAS_VERIFICAR_SEGUNDOS = float(os.environ.get("REPLICAS_VERIFICAR_SEGUNDOS", "10"))
+
+
+def _logger():
+    return current_app.logger if has_app_context() else logging.getLogger("api-livros")
+
+
+class Replica:
+    """
+    Estado de uma réplica de leitura neste processo.
+    """
+
+    def __init__(self, numero, engine):
+        self.numero = numero
+        self.engine = engine
+        # None até a primeira verificação
+        self.saudavel = None
+        self.versao = None
+        self.erro = None
+        self.verificada_em = None
+        # Verdadeiro enquanto uma requisição verifica a réplica (uma de cada vez)
+        self.verificando = False
+
+    def atualizada(self, versao_principal):
+        """
+        Indica se a réplica pode atender leituras: saudável na última verificação
+        e já com a versão do catálogo do principal.
+        """
+        return bool(self.saudavel) and (self.versao or 0) >= versao_principal
+
+
+class RoteadorLeitura:
+    """
+    Escolhe a engine das rotas de leitura: as réplicas saudáveis em rodízio ou,
+    se nenhuma estiver disponível, o banco principal.
+
+    Uma réplica é saudável quando responde e já tem a versão do catálogo do
+    banco principal. Uma réplica atrasada serviria dados antigos, que o cache
+    de respostas gravaria com a versão nova. Cada réplica é verificada a cada
+    REPLICAS_VERIFICAR_SEGUNDOS e, também, assim que a versão do catálogo no
+    principal passa da última versão vista nela. Um erro de conexão durante as
+    consultas tira a réplica do rodízio até a próxima verificação.
+
+    A verificação acontece fora do lock e por uma requisição de cada vez: as
+    demais usam o último estado conhecido, de modo que uma réplica lenta ou
+    fora do ar atrasa apenas a requisição que a verifica.
+    """
+
+    def __init__(self, principal, engines):
+        self.principal = principal
+        self.replicas = [Replica(numero, engine) for numero, engine in enumerate(engines)]
+        self._proxima = 0
+        self._lock = threading.Lock()
+
+        for replica in self.replicas:
+            event.listen(replica.engine, "handle_error", self._ao_falhar(replica))
+
+    def _ao_falhar(self, replica):
+        def marcar_indisponivel(contexto):
+            if contexto.is_disconnect or isinstance(contexto.sqlalchemy_exception, OperationalError):
+                self._alterar_estado(replica, False, str(contexto.original_exception).splitlines()[0])
+        return marcar_indisponivel
+
+    def _alterar_estado(self, replica, saudavel, erro=None):
+        if replica.saudavel is not False and not saudavel:
+            _logger().warning("Réplica de leitura fora do rodízio.", extra={"replica": replica.numero, "erro": erro})
+        elif saudavel and not replica.saudavel:
+            _logger().info("Réplica de leitura disponível.", extra={"replica": replica.numero, "versao": replica.versao})
+        replica.saudavel = saudavel
+        replica.erro = erro
+
+    def verificar(self, replica, versao_principal):
+        """
+        Confere se a réplica responde e se já tem a versão do catálogo do principal.
+        """
+        try:
+            with replica.engine.connect() as conn:
+                versao = conn.execute(select(VersaoCatalogo.versao).where(VersaoCatalogo.id == 1)).scalar() or 0
+        except SQLAlchemyError as e:
+            self._alterar_estado(replica, False, str(e).splitlines()[0])
+        else:
+            replica.versao = versao
+            if versao >= versao_principal:
+                self._alterar_estado(replica, True)
+            else:
+                self._alterar_estado(replica, False, f"Réplica atrasada: versão do catálogo {versao}, principal {versao_principal}.")
+        replica.verificada_em = time.monotonic()
+
+    def engine_leitura(self):
+        """
+        Engine usada pela próxima requisição de leitura.
+        """
+        if not self.replicas:
+            return self.principal
+
+        versao = obter_versao_catalogo()
+        with self._lock:
+            inicio = self._proxima
+            self._proxima = (self._proxima + 1) % len(self.replicas)
+
+        for deslocamento in range(len(self.replicas)):
+            replica = self.replicas[(inicio + deslocamento) % len(self.replicas)]
+
+            vencida = replica.verificada_em is None or time.monotonic() - replica.verificada_em >= REPLICAS_VERIFICAR_SEGUNDOS
+            atrasada = replica.saudavel and (replica.versao or 0) < versao
+            if (vencida or atrasada) and self._iniciar_verificacao(replica):
+                try:
+                    self.verificar(replica, versao)
+                finally:
+                    replica.verificando = False
+
+            if replica.atualizada(versao):
+                return replica.engine
+
+        return self.principal
+
+    def _iniciar_verificacao(self, replica):
+        with self._lock:
+            if replica.verificando:
+                return False
+            replica.verificando = True
+            return True
+
+    def estado(self):
+        """
+        Resumo das réplicas para a rota de saúde (sem as URLs nem as mensagens de erro).
+        """
+        return [
+            {"replica": replica.numero, "saudavel": replica.saudavel, "versao_catalogo": replica.versao}
+            for replica in self.replicas
+        ]
+
+
+roteador_leitura = RoteadorLeitura(engine, engines_leitura)
+
+
+def engine_leitura():
+    return roteador_leitura.engine_leitura()
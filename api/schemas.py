@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import List
+from pydantic import BaseModel, model_validator
 
 class SchemaLivro(BaseModel):
     """
@@ -21,4 +22,19 @@ class ModeloInput(BaseModel):
     """
 
     preco:float
-    avaliacao: str
\ No newline at end of file
+    avaliacao: str
+
+class ModeloInputColunar(BaseModel):
+    """
+    Entrada em formato colunar para a predição em lote: uma lista de preços e
+    uma lista de avaliações, com o mesmo tamanho.
+    """
+
+    preco: List[float]
+    avaliacao: List[str]
+
+    @model_validator(mode="after")
+    def valida_tamanhos(self):
+        if len(self.preco) != len(self.avaliacao):
+            raise ValueError("As listas 'preco' e 'avaliacao' devem ter o mesmo tamanho.")
+        return self
\ No newline at end of file
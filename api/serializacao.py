@@ -0,0 +1,49 @@
+import os
+import json
+from flask import current_app
+from .modelo import Livro
+from .schemas import SchemaLivro
+from .paginacao import resposta_paginada, aplicar_cabecalhos_paginacao
+
+# Modo de serialização das listas de livros: "rapido" (padrão) ou "pydantic"
+MODO_SERIALIZACAO = os.environ.get("SERIALIZADOR_LIVROS", "rapido")
+
+# Campos do SchemaLivro em ordem alfabética, a mesma ordem em que o jsonify
+# (sort_keys=True) escreve as chaves. Assim o JSON gerado é idêntico byte a byte.
+CAMPOS_LIVRO = tuple(sorted(SchemaLivro.model_fields))
+COLUNAS_LIVRO = tuple(getattr(Livro, campo) for campo in CAMPOS_LIVRO)
+
+# Mesmas opções do provedor JSON padrão do Flask no modo compacto
+_encoder = json.JSONEncoder(ensure_ascii=True, separators=(",", ":"))
+
+
+def query_livros(db):
+    """
+    Cria uma query que seleciona apenas as colunas do SchemaLivro como tuplas,
+    sem instanciar objetos do ORM.
+    """
+    return db.query(*COLUNAS_LIVRO)
+
+
+def serializar_livros(linhas):
+    """
+    Codifica as linhas (tuplas na ordem de CAMPOS_LIVRO) diretamente em JSON,
+    sem validação do Pydantic linha a linha.
+    """
+    return _encoder.encode([dict(zip(CAMPOS_LIVRO, linha)) for linha in linhas])
+
+
+def resposta_livros(linhas, proximo_cursor=None):
+    """
+    Monta a resposta de uma rota de listagem de livros a partir das linhas
+    retornadas por query_livros.
+    """
+    json_provider = current_app.json
+    modo_compacto = not ((json_provider.compact is None and current_app.debug) or json_provider.compact is False)
+
+    if MODO_SERIALIZACAO == "pydantic" or not modo_compacto:
+        resultado = [SchemaLivro.model_validate(linha).model_dump() for linha in linhas]
+        return resposta_paginada(resultado, proximo_cursor)
+
+    resposta = current_app.response_class(f"{serializar_livros(linhas)}\n", mimetype=json_provider.mimetype)
+    return aplicar_cabecalhos_paginacao(resposta, proximo_cursor)
@@ -0,0 +1,347 @@
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timezone
+
+# Adicionar o diretório raiz do projeto ao sys.path
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(RAIZ)
+
+from benchmarks.inicializacao import porta_livre, memoria, workers_do, TEMPO_LIMITE_BOOT
+
+# Termos usados na busca por título (curtos, comuns e raros)
+TERMOS_BUSCA = ["the", "love", "light", "history", "girl", "secret", "night", "world", "python", "xyz"]
+
+AVALIACOES = ["One", "Two", "Three", "Four", "Five"]
+
+
+def cenarios(total_livros, credenciais=None):
+    """
+    Rotas de /api/v1 exercitadas pelo teste de carga: nome -> função que recebe
+    um gerador aleatório e retorna (método, caminho, corpo, autenticada).
+    'credenciais' é o corpo JSON enviado à rota de login.
+    As rotas que alteram o estado do servidor (scraping, jobs e troca de
+    modelo) ficam de fora.
+    """
+    def livro_aleatorio(aleatorio):
+        return aleatorio.randint(1, max(total_livros, 1))
+
+    def faixa_de_preco(aleatorio):
+        minimo = round(aleatorio.uniform(10, 55), 2)
+        return f"/api/v1/books/price-range?min={minimo}&max={round(minimo + aleatorio.uniform(0.5, 5), 2)}"
+
+    def lote_predicao(aleatorio):
+        return json.dumps([
+            {"preco": round(aleatorio.uniform(10, 60), 2), "avaliacao": aleatorio.choice(AVALIACOES)}
+            for _ in range(100)
+        ])
+
+    return {
+        "health": lambda a: ("GET", "/api/v1/health", None, False),
+        "metrics": lambda a: ("GET", "/api/v1/metrics", None, False),
+        "books": lambda a: ("GET", f"/api/v1/books?after_id={livro_aleatorio(a)}", None, False),
+        "books/<id>": lambda a: ("GET", f"/api/v1/books/{livro_aleatorio(a)}", None, False),
+        "categories": lambda a: ("GET", "/api/v1/categories", None, False),
+        "books/search": lambda a: ("GET", f"/api/v1/books/search?titulo={a.choice(TERMOS_BUSCA)}", None, False),
+        "stats/overview": lambda a: ("GET", "/api/v1/stats/overview", None, False),
+        "stats/categories": lambda a: ("GET", "/api/v1/stats/categories", None, False),
+        "stats/clusters": lambda a: ("GET", "/api/v1/stats/clusters", None, False),
+        "books/top-rated": lambda a: ("GET", "/api/v1/books/top-rated", None, False),
+        "books/price-range": lambda a: ("GET", faixa_de_preco(a), None, False),
+        "auth/login": lambda a: ("POST", "/api/v1/auth/login", credenciais, False),
+        "admin/test": lambda a: ("GET", "/api/v1/admin/test", None, True),
+        "admin/models": lambda a: ("GET", "/api/v1/admin/models", None, True),
+        "ml/training-data": lambda a: ("GET", f"/api/v1/ml/training-data?after_id={livro_aleatorio(a)}", None, True),
+        "ml/features": lambda a: ("GET", "/api/v1/ml/features", None, False),
+        "ml/features/<id>": lambda a: ("GET", f"/api/v1/ml/features/{livro_aleatorio(a)}", None, False),
+        "ml/predictions": lambda a: (
+            "POST", "/api/v1/ml/predictions",
+            json.dumps({"preco": round(a.uniform(10, 60), 2), "avaliacao": a.choice(AVALIACOES)}), False,
+        ),
+        "ml/predictions/batch": lambda a: ("POST", "/api/v1/ml/predictions/batch", lote_predicao(a), False),
+    }
+
+
+def requisitar(porta, metodo, caminho, corpo=None, token=None, tempo_limite=30):
+    """
+    Faz uma requisição em uma conexão nova e retorna (status, corpo da resposta).
+    """
+    cabecalhos = {"Content-Type": "application/json"}
+    if token:
+        cabecalhos["Authorization"] = f"Bearer {token}"
+
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=tempo_limite)
+    try:
+        conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+        resposta = conexao.getresponse()
+        return resposta.status, resposta.read()
+    finally:
+        conexao.close()
+
+
+def percentil(valores_ordenados, p):
+    """
+    Percentil p (0 a 100) de uma lista já ordenada, com o método do vizinho mais próximo.
+    """
+    if not valores_ordenados:
+        return None
+    indice = max(0, min(len(valores_ordenados) - 1, round(p / 100 * len(valores_ordenados) + 0.5) - 1))
+    return valores_ordenados[indice]
+
+
+def executar_cenario(porta, gerar, concorrencia, duracao, token, tempo_limite, semente):
+    """
+    Dispara requisições de um cenário em 'concorrencia' threads durante
+    'duracao' segundos (ao menos uma por thread). Retorna as latências (em
+    segundos), a quantidade de erros e o tempo total da execução.
+    """
+    latencias = []
+    erros = [0]
+    lock = threading.Lock()
+    fim = time.perf_counter() + duracao
+
+    def trabalhar(numero):
+        aleatorio = random.Random(semente * 1000 + numero)
+        minhas_latencias = []
+        meus_erros = 0
+        while True:
+            metodo, caminho, corpo, autenticada = gerar(aleatorio)
+            inicio = time.perf_counter()
+            try:
+                status, _ = requisitar(porta, metodo, caminho, corpo, token if autenticada else None, tempo_limite)
+            except (OSError, http.client.HTTPException):
+                status = None
+            minhas_latencias.append(time.perf_counter() - inicio)
+            if status is None or status >= 400:
+                meus_erros += 1
+            if time.perf_counter() >= fim:
+                break
+        with lock:
+            latencias.extend(minhas_latencias)
+            erros[0] += meus_erros
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabalhar, args=(i,)) for i in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencias, erros[0], time.perf_counter() - inicio
+
+
+def memoria_do_servidor(pid_master):
+    """
+    RSS somado do master e dos workers e PSS somado (em MB).
+    """
+    rss_total, pss_total = 0.0, 0.0
+    for pid in [pid_master] + workers_do(pid_master):
+        rss, pss = memoria(pid)
+        rss_total += rss or 0
+        pss_total += pss or 0
+    return round(rss_total, 1), round(pss_total, 1) if pss_total else None
+
+
+def iniciar_servidor(banco, workers, pasta, ambiente_extra=None):
+    """
+    Sobe o gunicorn com o gunicorn.conf.py do projeto apontando para o banco
+    informado, com cache e métricas em uma pasta temporária própria.
+    """
+    porta = porta_livre()
+    url = banco if "://" in banco else f"sqlite:///{os.path.abspath(banco)}"
+    ambiente = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "WEB_CONCURRENCY": str(workers),
+        "CACHE_CONSULTAS_CAMINHO": os.path.join(pasta, "cache.db"),
+        "METRICAS_DIR": os.path.join(pasta, "metricas"),
+        **(ambiente_extra or {}),
+    }
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{porta}", "api.app:app"],
+        cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    inicio = time.perf_counter()
+    while True:
+        if time.perf_counter() - inicio > TEMPO_LIMITE_BOOT or processo.poll() is not None:
+            processo.kill()
+            raise RuntimeError("O gunicorn não respondeu a tempo.")
+        try:
+            requisitar(porta, "GET", "/api/v1/health", tempo_limite=1)
+            return processo, porta
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.05)
+
+
+def versao_do_codigo():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar(args):
+    """
+    Executa todos os cenários selecionados contra um gunicorn local e retorna o resultado da execução.
+    """
+    selecionados = {
+        nome: gerar for nome, gerar in cenarios(0).items()
+        if (not args.rotas or any(filtro in nome for filtro in args.rotas))
+        and not any(filtro in nome for filtro in args.ignorar)
+    }
+
+    with tempfile.TemporaryDirectory() as pasta:
+        processo, porta = iniciar_servidor(args.banco, args.workers, pasta)
+        try:
+            _, corpo = requisitar(porta, "GET", "/api/v1/stats/overview")
+            total_livros = json.loads(corpo)["total_livros"]
+            corpo_login = json.dumps({"username": args.usuario, "password": args.senha})
+            todos = cenarios(total_livros, corpo_login)
+
+            status, corpo = requisitar(porta, "POST", "/api/v1/auth/login", corpo_login)
+            token = json.loads(corpo)["access_token"] if status == 200 else None
+            if token is None:
+                print(f"AVISO: login de '{args.usuario}' recusado ({status}). As rotas autenticadas vão falhar.")
+
+            print(f"{total_livros:,} livros, {args.workers} workers, {args.concorrencia} conexões simultâneas, "
+                  f"{args.duracao:g}s por rota\n")
+            print(f"{'rota':<22} {'req/s':>9} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'erros':>7} {'RSS (MB)':>9}")
+
+            rotas = {}
+            for nome in selecionados:
+                gerar = todos[nome]
+
+                # Aquecimento: uma requisição por worker antes da medição
+                executar_cenario(porta, gerar, args.workers, 0, token, args.tempo_limite, args.semente)
+                latencias, erros, tempo = executar_cenario(
+                    porta, gerar, args.concorrencia, args.duracao, token, args.tempo_limite, args.semente,
+                )
+                latencias.sort()
+                rss, pss = memoria_do_servidor(processo.pid)
+
+                rotas[nome] = {
+                    "requisicoes": len(latencias),
+                    "erros": erros,
+                    "vazao": round(len(latencias) / tempo, 1),
+                    "p50_ms": round(percentil(latencias, 50) * 1000, 2) if latencias else None,
+                    "p95_ms": round(percentil(latencias, 95) * 1000, 2) if latencias else None,
+                    "p99_ms": round(percentil(latencias, 99) * 1000, 2) if latencias else None,
+                    "rss_mb": rss,
+                    "pss_mb": pss,
+                }
+                r = rotas[nome]
+                print(f"{nome:<22} {r['vazao']:>9.1f} {r['p50_ms'] or 0:>10.2f} {r['p95_ms'] or 0:>10.2f} "
+                      f"{r['p99_ms'] or 0:>10.2f} {erros:>7} {rss:>9.1f}")
+        finally:
+            processo.send_signal(signal.SIGTERM)
+            processo.wait(timeout=30)
+
+    return {
+        "gerado_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "codigo": versao_do_codigo(),
+        "ambiente": {"python": platform.python_version(), "sistema": platform.platform(), "cpus": os.cpu_count()},
+        "configuracao": {
+            "livros": total_livros,
+            "workers": args.workers,
+            "concorrencia": args.concorrencia,
+            "duracao": args.duracao,
+            "cache": os.environ.get("CACHE_CONSULTAS_ATIVO", "1") == "1",
+        },
+        "rotas": rotas,
+    }
+
+
+def comparar(resultado, base, tolerancia):
+    """
+    Compara o resultado com uma execução de referência. Uma rota regride quando
+    o p95 ou a memória sobem, ou a vazão cai, mais que a tolerância, ou quando
+    passa a ter erros. Retorna a lista de regressões.
+    """
+    if resultado["configuracao"] != base["configuracao"]:
+        print(f"\nAVISO: configuração diferente da referência: {base['configuracao']}")
+
+    print(f"\nComparação com a referência de {base['gerado_em']} ({base.get('codigo') or 'código desconhecido'}):")
+    print(f"{'rota':<22} {'req/s':>9} {'p95':>9} {'RSS':>9}")
+
+    def variacao(atual, anterior):
+        return (atual - anterior) / anterior if atual is not None and anterior else 0.0
+
+    regressoes = []
+    for nome, atual in resultado["rotas"].items():
+        anterior = base["rotas"].get(nome)
+        if anterior is None:
+            continue
+
+        vazao = variacao(atual["vazao"], anterior["vazao"])
+        p95 = variacao(atual["p95_ms"], anterior["p95_ms"])
+        rss = variacao(atual["rss_mb"], anterior["rss_mb"])
+        print(f"{nome:<22} {vazao:>+8.0%} {p95:>+8.0%} {rss:>+8.0%}")
+
+        if vazao < -tolerancia:
+            regressoes.append(f"{nome}: vazão {anterior['vazao']} -> {atual['vazao']} req/s")
+        if p95 > tolerancia:
+            regressoes.append(f"{nome}: p95 {anterior['p95_ms']} -> {atual['p95_ms']} ms")
+        if rss > tolerancia:
+            regressoes.append(f"{nome}: RSS {anterior['rss_mb']} -> {atual['rss_mb']} MB")
+        if atual["erros"] and not anterior["erros"]:
+            regressoes.append(f"{nome}: {atual['erros']} erros")
+
+    return regressoes
+
+
+def main():
+    """
+    Teste de carga da API: sobe o gunicorn local com o banco informado (por
+    exemplo, um catálogo de benchmarks.catalogo_sintetico), exercita cada rota
+    de /api/v1 com a concorrência configurada e registra latência (p50, p95,
+    p99), vazão e memória. O resultado pode ser salvo em JSON e comparado com
+    uma execução anterior; o comando termina com código 1 se houver regressão.
+    """
+    parser = argparse.ArgumentParser(description="Teste de carga das rotas da API.")
+    parser.add_argument("--banco", default=os.path.join("data", "livraria.db"), help="Banco SQLite ou URL do banco.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concorrencia", type=int, default=8, help="Conexões simultâneas por rota.")
+    parser.add_argument("--duracao", type=float, default=10, help="Segundos de carga por rota.")
+    parser.add_argument("--rotas", nargs="*", default=[], help="Executa apenas as rotas que contêm estes trechos.")
+    parser.add_argument("--ignorar", nargs="*", default=[], help="Ignora as rotas que contêm estes trechos.")
+    parser.add_argument("--tempo-limite", type=float, default=30, help="Tempo máximo (em segundos) de cada requisição.")
+    parser.add_argument("--usuario", default=os.environ.get("ADMIN_USERNAME", "bruno"))
+    parser.add_argument("--senha", default=os.environ.get("ADMIN_PASSWORD", "benchmark"))
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--salvar", help="Arquivo JSON onde o resultado será gravado.")
+    parser.add_argument("--base", help="Resultado JSON de referência para a detecção de regressões.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Variação tolerada em relação à referência (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    resultado = executar(args)
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\nResultado gravado em '{args.salvar}'.")
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        regressoes = comparar(resultado, base, args.tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressões acima de {args.tolerancia:.0%}:")
+            for regressao in regressoes:
+                print(f"    {regressao}")
+            sys.exit(1)
+        print("\nNenhuma regressão.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import argparse
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from sqlalchemy import create_engine, event, func, select, text
+from sqlalchemy.orm import sessionmaker
+from werkzeug.security import generate_password_hash
+from api.database import Base_tabela
+from api.modelo import Livro, Usuario
+from api.busca import criar_indice_busca
+from api.agregados import recalcular_agregados
+from api.cache import incrementar_versao_catalogo
+from api.ml import modelos_disponiveis, reclassificar_livros, rating_map
+
+# Catálogo real usado como referência para as distribuições do catálogo sintético
+CATALOGO_REFERENCIA = os.path.join("data", "livraria.db")
+
+# Quantidade de livros gerados e inseridos por vez
+TAMANHO_LOTE_GERACAO = 50_000
+
+# Usuário criado no catálogo sintético para as rotas autenticadas do teste de carga
+USUARIO_PADRAO = "bruno"
+SENHA_PADRAO = "benchmark"
+
+
+def ler_distribuicoes(caminho):
+    """
+    Lê do catálogo de referência os títulos, a frequência de cada categoria e
+    de cada avaliação e a faixa de preços, para que o catálogo sintético tenha
+    a mesma forma do catálogo real.
+    """
+    engine = create_engine(f"sqlite:///{caminho}")
+    try:
+        with engine.connect() as conn:
+            titulos = conn.execute(select(Livro.titulo).order_by(Livro.id)).scalars().all()
+            categorias = conn.execute(select(Livro.categoria, func.count()).group_by(Livro.categoria)).all()
+            avaliacoes = conn.execute(select(Livro.avaliacao, func.count()).group_by(Livro.avaliacao)).all()
+            preco_minimo, preco_maximo = conn.execute(select(func.min(Livro.preco), func.max(Livro.preco))).one()
+    finally:
+        engine.dispose()
+
+    if not titulos:
+        raise RuntimeError(f"O catálogo de referência '{caminho}' está vazio.")
+
+    def pesos(contagens):
+        valores, quantidades = zip(*sorted(contagens, key=lambda item: str(item[0])))
+        quantidades = np.asarray(quantidades, dtype=np.float64)
+        return list(valores), quantidades / quantidades.sum()
+
+    return {
+        "titulos": titulos,
+        "categorias": pesos(categorias),
+        "avaliacoes": pesos(avaliacoes),
+        "precos": (preco_minimo, preco_maximo),
+    }
+
+
+def gerar_livros(total, distribuicoes, semente=42):
+    """
+    Gera os livros sintéticos em lotes (listas de dicionários), sempre na mesma
+    ordem para a mesma semente. Categorias e avaliações seguem as frequências do
+    catálogo de referência e os preços são uniformes na mesma faixa, como no
+    books.toscrape.com. Os títulos repetem os títulos reais com um número de
+    série, mantendo os trigramas realistas para a busca.
+    """
+    gerador = np.random.default_rng(semente)
+    titulos = distribuicoes["titulos"]
+    categorias, pesos_categorias = distribuicoes["categorias"]
+    avaliacoes, pesos_avaliacoes = distribuicoes["avaliacoes"]
+    preco_minimo, preco_maximo = distribuicoes["precos"]
+
+    for inicio in range(0, total, TAMANHO_LOTE_GERACAO):
+        tamanho = min(TAMANHO_LOTE_GERACAO, total - inicio)
+        indices_titulos = gerador.integers(0, len(titulos), tamanho)
+        indices_categorias = gerador.choice(len(categorias), tamanho, p=pesos_categorias)
+        indices_avaliacoes = gerador.choice(len(avaliacoes), tamanho, p=pesos_avaliacoes)
+        precos = np.round(gerador.uniform(preco_minimo, preco_maximo, tamanho), 2)
+
+        yield [
+            {
+                "titulo": f"{titulos[t]} #{i}",
+                "preco": float(preco),
+                "avaliacao": avaliacoes[a],
+                "avaliacao_num": rating_map.get(avaliacoes[a], 0),
+                "disponibilidade": "In stock",
+                "categoria": categorias[c],
+                "url_imagem": f"https://books.toscrape.com/media/cache/sintetico/{i:08x}.jpg",
+            }
+            for i, t, c, a, preco in zip(
+                range(inicio + 1, inicio + tamanho + 1),
+                indices_titulos.tolist(), indices_categorias.tolist(), indices_avaliacoes.tolist(), precos.tolist(),
+            )
+        ]
+
+
+def criar_catalogo(caminho, total, semente=42, referencia=CATALOGO_REFERENCIA,
+                   usuario=USUARIO_PADRAO, senha=SENHA_PADRAO, ao_gravar_lote=None):
+    """
+    Cria um banco SQLite completo com 'total' livros sintéticos: tabelas, índice
+    de busca, clusters do modelo em produção, agregados, versão do catálogo e
+    um usuário administrador. Retorna a engine do banco criado.
+    """
+    if os.path.exists(caminho):
+        raise FileExistsError(f"O arquivo '{caminho}' já existe.")
+
+    distribuicoes = ler_distribuicoes(referencia)
+    engine = create_engine(f"sqlite:///{caminho}")
+
+    # Banco descartável: dispensa o journal e o fsync durante a geração
+    @event.listens_for(engine, "connect")
+    def _pragmas(conexao, _):
+        cursor = conexao.cursor()
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.close()
+
+    Base_tabela.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for lote in gerar_livros(total, distribuicoes, semente):
+            conn.execute(Livro.__table__.insert(), lote)
+            if ao_gravar_lote:
+                ao_gravar_lote(len(lote))
+        criar_indice_busca(conn)
+
+    db = sessionmaker(bind=engine)()
+    try:
+        if modelos_disponiveis():
+            reclassificar_livros(db)
+        else:
+            print("AVISO: Modelos de ML não carregados. A coluna 'cluster' ficará vazia.")
+        recalcular_agregados(db)
+        incrementar_versao_catalogo(db)
+        db.add(Usuario(username=usuario, password=generate_password_hash(senha)))
+        db.commit()
+    finally:
+        db.close()
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+
+    return engine
+
+
+def main():
+    """
+    Gera catálogos sintéticos de livros para os benchmarks e o teste de carga.
+    """
+    parser = argparse.ArgumentParser(description="Gera um catálogo sintético de livros em um banco SQLite.")
+    parser.add_argument("destino", help="Caminho do banco SQLite a ser criado.")
+    parser.add_argument("--livros", type=int, default=100_000, help="Quantidade de livros (ex.: 10000, 100000, 1000000, 10000000).")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--referencia", default=CATALOGO_REFERENCIA, help="Catálogo real usado como referência das distribuições.")
+    parser.add_argument("--usuario", default=USUARIO_PADRAO)
+    parser.add_argument("--senha", default=SENHA_PADRAO)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    gravados = 0
+
+    def progresso(quantidade):
+        nonlocal gravados
+        gravados += quantidade
+        print(f"\r{gravados:>12,} / {args.livros:,} livros", end="\n" if gravados == args.livros else "", flush=True)
+
+    engine = criar_catalogo(args.destino, args.livros, args.semente, args.referencia,
+                            args.usuario, args.senha, progresso)
+    engine.dispose()
+    print(f"Catálogo '{args.destino}' criado em {time.perf_counter() - inicio:.1f}s "
+          f"({os.path.getsize(args.destino) / 1024 / 1024:.0f} MB).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import argparse
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scripts.extratores import EXTRATORES
+
+PASTA_FIXTURES = os.path.join("data", "fixtures", "books_toscrape")
+BASE_URL = "https://books.toscrape.com/"
+
+
+def carregar_paginas(pasta):
+    """
+    Lê as páginas salvas e as separa em listagens (catálogo e categorias) e
+    páginas de detalhe dos livros. Retorna um dicionário tipo -> [(url, html)].
+    """
+    paginas = {"listagem": [], "detalhe": []}
+    for raiz, _, arquivos in os.walk(pasta):
+        for arquivo in sorted(arquivos):
+            caminho = os.path.join(raiz, arquivo)
+            relativo = os.path.relpath(caminho, pasta).replace(os.sep, "/")
+            with open(caminho, encoding="utf-8") as f:
+                html = f.read()
+
+            listagem = relativo == "index.html" or relativo.startswith("catalogue/category/") or "/" not in relativo[len("catalogue/"):]
+            paginas["listagem" if listagem else "detalhe"].append((BASE_URL + relativo, html))
+
+    return paginas
+
+
+def extrair_tudo(extrator, tipo, paginas):
+    """
+    Aplica as extrações usadas pelo scraper em cada página do tipo informado.
+    """
+    if tipo == "listagem":
+        return [(extrator.livros(html, url, BASE_URL), extrator.categorias(html, url)) for url, html in paginas]
+    return [extrator.categoria(html) for _, html in paginas]
+
+
+def medir(extrator, tipo, paginas, repeticoes):
+    """
+    Retorna o melhor tempo (em segundos) entre as repetições e a última saída gerada.
+    """
+    melhor = float("inf")
+    saida = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = extrair_tudo(extrator, tipo, paginas)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, saida
+
+
+def main():
+    """
+    Mede as páginas por segundo de cada backend de extração nas páginas salvas
+    do site e confere se todos extraem os mesmos registros que o BeautifulSoup.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de extração do scraper.")
+    parser.add_argument("--pasta", default=PASTA_FIXTURES, help="Pasta com as páginas salvas do site.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    paginas = carregar_paginas(args.pasta)
+    referencia = EXTRATORES["bs4"]
+    todos_iguais = True
+
+    print(f"{'backend':<10} {'páginas':<10} {'qtde':>6} {'páginas/s':>12} {'ganho':>8} {'registros iguais':>18}")
+    for tipo, lista in paginas.items():
+        tempo_referencia, saida_referencia = medir(referencia, tipo, lista, args.repeticoes)
+
+        for nome, extrator in EXTRATORES.items():
+            tempo, saida = (tempo_referencia, saida_referencia) if extrator is referencia else medir(extrator, tipo, lista, args.repeticoes)
+            iguais = saida == saida_referencia
+            todos_iguais = todos_iguais and iguais
+            print(f"{nome:<10} {tipo:<10} {len(lista):>6} {len(lista) / tempo:>12.1f} {tempo_referencia / tempo:>7.1f}x {str(iguais):>18}")
+
+    sys.exit(0 if todos_iguais else 1)
+
+
+if __name__ == "__main__":
+    main()
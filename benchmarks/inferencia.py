@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import random
+import argparse
+import warnings
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from api.database import SessionLocal
+from api.modelo import Livro
+from api.ml import registro_modelos, prever_clusters, rating_map
+
+AVALIACOES = list(rating_map) + ["N/A"]
+
+
+def ler_catalogo():
+    """
+    Retorna os preços e as avaliações de todos os livros do banco.
+    """
+    db = SessionLocal()
+    try:
+        linhas = db.query(Livro.preco, Livro.avaliacao).order_by(Livro.id).all()
+    finally:
+        db.close()
+    return [preco for preco, _ in linhas], [avaliacao for _, avaliacao in linhas]
+
+
+def gerar_sinteticos(total):
+    """
+    Gera livros aleatórios cobrindo uma faixa de preços maior que a do catálogo,
+    para conferir também os pontos próximos das fronteiras entre clusters.
+    """
+    gerador = random.Random(42)
+    precos = [round(gerador.uniform(0, 200), 2) for _ in range(total)]
+    avaliacoes = [gerador.choice(AVALIACOES) for _ in range(total)]
+    return precos, avaliacoes
+
+
+def prever_sklearn(kmeans, scaler, precos, avaliacoes):
+    """
+    Caminho original: StandardScaler.transform + KMeans.predict.
+    """
+    features = np.column_stack([
+        np.asarray(precos, dtype=np.float64),
+        np.array([rating_map.get(avaliacao, 0) for avaliacao in avaliacoes], dtype=np.float64),
+    ])
+    return kmeans.predict(scaler.transform(features))
+
+
+def medir(funcao, repeticoes, chamadas=1):
+    """
+    Retorna o melhor tempo médio (em segundos) por chamada entre as repetições.
+    """
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            funcao()
+        melhor = min(melhor, (time.perf_counter() - inicio) / chamadas)
+    return melhor
+
+
+def main():
+    """
+    Confere se o kernel de inferência da API atribui os mesmos clusters que o
+    scikit-learn em todo o catálogo do banco e em livros sintéticos, e compara
+    a latência de uma predição individual e a vazão em lote dos dois caminhos.
+    """
+    parser = argparse.ArgumentParser(description="Verificação e benchmark do kernel de inferência do K-Means.")
+    parser.add_argument("--versao", default=None, help="Versão do modelo (padrão: a versão em produção).")
+    parser.add_argument("--sinteticos", type=int, default=1_000_000, help="Quantidade de livros sintéticos.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    # Avisos do scikit-learn sobre a versão do pickle e os nomes das features
+    warnings.simplefilter("ignore")
+
+    versao = args.versao or registro_modelos.versao_em_producao()
+    kmeans, scaler = registro_modelos.carregar_artefatos(versao)
+    modelo = registro_modelos.carregar(versao)
+    print(f"Versão do modelo: {versao}")
+
+    todos_iguais = True
+    for nome, (precos, avaliacoes) in (("catálogo", ler_catalogo()), ("sintéticos", gerar_sinteticos(args.sinteticos))):
+        referencia = prever_sklearn(kmeans, scaler, precos, avaliacoes)
+        kernel = prever_clusters(precos, avaliacoes, modelo)
+        diferentes = int((referencia != kernel).sum())
+        todos_iguais = todos_iguais and diferentes == 0
+        print(f"{nome:<11} {len(precos):>9} livros, {diferentes} clusters diferentes do scikit-learn")
+
+    precos, avaliacoes = ler_catalogo()
+    individual_sklearn = medir(lambda: prever_sklearn(kmeans, scaler, [35.5], ["Four"]), args.repeticoes, 2_000)
+    individual_kernel = medir(lambda: prever_clusters([35.5], ["Four"], modelo), args.repeticoes, 2_000)
+    lote_sklearn = medir(lambda: prever_sklearn(kmeans, scaler, precos, avaliacoes), args.repeticoes)
+    lote_kernel = medir(lambda: prever_clusters(precos, avaliacoes, modelo), args.repeticoes)
+
+    print(f"\n{'caminho':<14} {'1 livro (µs)':>13} {f'lote de {len(precos)} (livros/s)':>30}")
+    print(f"{'scikit-learn':<14} {individual_sklearn * 1e6:>13.1f} {len(precos) / lote_sklearn:>30,.0f}")
+    print(f"{'kernel':<14} {individual_kernel * 1e6:>13.1f} {len(precos) / lote_kernel:>30,.0f}")
+    print(f"{'ganho':<14} {individual_sklearn / individual_kernel:>12.1f}x {lote_sklearn / lote_kernel:>29.1f}x")
+
+    sys.exit(0 if todos_iguais else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import os
+import re
+import sys
+import time
+import json
+import socket
+import signal
+import argparse
+import statistics
+import subprocess
+import urllib.error
+import urllib.request
+
+# Adicionar o diretório raiz do projeto ao sys.path
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(RAIZ)
+
+ROTA_SAUDE = "/api/v1/health"
+ROTA_PREDICAO = "/api/v1/ml/predictions"
+CORPO_PREDICAO = json.dumps({"preco": 35.5, "avaliacao": "Four"}).encode("utf-8")
+
+# Tempo máximo (em segundos) para o gunicorn responder à primeira requisição
+TEMPO_LIMITE_BOOT = 60
+
+
+def medir_importacao(repeticoes):
+    """
+    Importa api.app em processos novos com -X importtime. Retorna a mediana do
+    tempo de importação de api.app e, da última execução, os módulos importados
+    diretamente por ele com o tempo acumulado de cada um (em segundos).
+    """
+    tempos = []
+    filhos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import api.app"],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stderr
+
+        filhos = []
+        for linha in saida.splitlines():
+            encontrado = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)$", linha)
+            if not encontrado:
+                continue
+            acumulado, recuo, modulo = int(encontrado[1]) / 1e6, len(encontrado[2]), encontrado[3]
+            if modulo == "api.app":
+                tempos.append(acumulado)
+            elif recuo == 3:
+                filhos.append((acumulado, modulo))
+
+    return statistics.median(tempos), sorted(filhos, reverse=True)
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def requisitar(url, corpo=None):
+    requisicao = urllib.request.Request(url, data=corpo, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(requisicao, timeout=10) as resposta:
+        resposta.read()
+        return resposta.status
+
+
+def memoria(pid):
+    """
+    RSS e PSS do processo em MB. O PSS divide as páginas compartilhadas entre os
+    processos que as usam, mostrando o ganho do copy-on-write (apenas Linux).
+    """
+    valores = {}
+    for arquivo, campos in (("status", ("VmRSS",)), ("smaps_rollup", ("Pss",))):
+        try:
+            with open(f"/proc/{pid}/{arquivo}") as f:
+                for linha in f:
+                    nome, _, valor = linha.partition(":")
+                    if nome in campos:
+                        valores[nome] = int(valor.split()[0]) / 1024
+        except OSError:
+            pass
+    return valores.get("VmRSS"), valores.get("Pss")
+
+
+def workers_do(pid_master):
+    try:
+        with open(f"/proc/{pid_master}/task/{pid_master}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+
+def medir_boot(preload, workers):
+    """
+    Sobe o gunicorn com o gunicorn.conf.py do projeto e mede o tempo até a
+    primeira resposta, o tempo da primeira predição e a memória de cada processo
+    depois que todos os workers já atenderam predições.
+    """
+    porta = porta_livre()
+    base = f"http://127.0.0.1:{porta}"
+    ambiente = {**os.environ, "GUNICORN_PRELOAD": "1" if preload else "0", "WEB_CONCURRENCY": str(workers)}
+
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{porta}", "api.app:app"],
+        cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if time.perf_counter() - inicio > TEMPO_LIMITE_BOOT or processo.poll() is not None:
+                raise RuntimeError("O gunicorn não respondeu a tempo.")
+            try:
+                requisitar(base + ROTA_SAUDE)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        primeira_requisicao = time.perf_counter() - inicio
+
+        inicio_predicao = time.perf_counter()
+        requisitar(base + ROTA_PREDICAO, CORPO_PREDICAO)
+        primeira_predicao = time.perf_counter() - inicio_predicao
+
+        # Predições suficientes para que todos os workers tenham usado o modelo
+        for _ in range(workers * 20):
+            requisitar(base + ROTA_PREDICAO, CORPO_PREDICAO)
+
+        return {
+            "primeira_requisicao": primeira_requisicao,
+            "primeira_predicao": primeira_predicao,
+            "master": memoria(processo.pid),
+            "workers": [memoria(pid) for pid in workers_do(processo.pid)],
+        }
+
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        processo.wait(timeout=30)
+
+
+def formatar_mb(valor):
+    return f"{valor:.1f}" if valor is not None else "n/d"
+
+
+def main():
+    """
+    Mede o custo de inicialização da API: o tempo de importação de api.app
+    (com -X importtime) e, com o gunicorn, o tempo até a primeira requisição,
+    o tempo da primeira predição e a memória por worker, com e sem preload_app.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização da API.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções da medição de importação.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modulos", type=int, default=10, help="Quantidade de módulos listados na importação.")
+    args = parser.parse_args()
+
+    tempo, filhos = medir_importacao(args.repeticoes)
+    print(f"Importação de api.app: {tempo * 1000:.0f} ms (mediana de {args.repeticoes} processos)")
+    for acumulado, modulo in filhos[:args.modulos]:
+        print(f"    {modulo:<28} {acumulado * 1000:>8.1f} ms")
+
+    print(f"\n{'preload':<8} {'1ª requisição':>14} {'1ª predição':>12} {'master RSS':>11} "
+          f"{'worker RSS':>11} {'worker PSS':>11} {'PSS total':>10}")
+    for preload in (False, True):
+        resultado = medir_boot(preload, args.workers)
+        rss = [valor for valor, _ in resultado["workers"] if valor is not None]
+        pss = [valor for _, valor in resultado["workers"] if valor is not None]
+        pss_total = sum(pss) + (resultado["master"][1] or 0) if pss else None
+        print(
+            f"{'sim' if preload else 'não':<8} {resultado['primeira_requisicao'] * 1000:>11.0f} ms "
+            f"{resultado['primeira_predicao'] * 1000:>9.0f} ms {formatar_mb(resultado['master'][0]):>8} MB "
+            f"{formatar_mb(statistics.mean(rss) if rss else None):>8} MB "
+            f"{formatar_mb(statistics.mean(pss) if pss else None):>8} MB {formatar_mb(pss_total):>7} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import tempfile
+import multiprocessing
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.carga import cenarios, requisitar, executar_cenario, iniciar_servidor, percentil
+
+# Rotas de leitura sorteadas a cada requisição
+ROTAS_LEITURA = ["books", "books/<id>", "books/top-rated", "books/price-range", "stats/overview"]
+
+# Disponibilidade gravada nas recargas ímpares, para que todos os livros sejam atualizados
+MARCA_RECARGA = " (recarga)"
+
+
+def recarregar_continuamente(url, perfil, iniciada, parar, recargas):
+    """
+    Executada em outro processo: recarrega o catálogo com scripts.popular_db até
+    receber o sinal de parada, alternando a disponibilidade de todos os livros,
+    de modo que cada carga atualize o catálogo inteiro (staging, índice de busca,
+    clusters, agregados e versão). Termina sempre com o catálogo original.
+    """
+    os.environ["DATABASE_URL"] = url
+    os.environ["DATABASE_PERFIL"] = perfil
+
+    from api.database import SessionLocal
+    from api.modelo import Livro
+    from scripts.popular_db import carregar_livros, CAMPOS_LIVRO
+
+    db = SessionLocal()
+    try:
+        originais = [
+            dict(zip(CAMPOS_LIVRO, linha))
+            for linha in db.query(*(getattr(Livro, campo) for campo in CAMPOS_LIVRO)).order_by(Livro.id)
+        ]
+        db.rollback()
+
+        iniciada.set()
+        while not parar.is_set() or recargas.value % 2:
+            marca = MARCA_RECARGA if recargas.value % 2 == 0 else ""
+            carregar_livros(db, (
+                dict(livro, disponibilidade=livro["disponibilidade"].removesuffix(MARCA_RECARGA) + marca)
+                for livro in originais
+            ))
+            db.commit()
+            recargas.value += 1
+    finally:
+        db.close()
+
+
+def medir_perfil(banco, perfil, args):
+    """
+    Sobe o gunicorn com o perfil de banco informado e mede as leituras antes e
+    durante uma sequência de recargas do catálogo feitas por outro processo.
+    """
+    url = banco if "://" in banco else f"sqlite:///{os.path.abspath(banco)}"
+    resultados = {}
+
+    with tempfile.TemporaryDirectory() as pasta:
+        ambiente = {"DATABASE_PERFIL": perfil, "CACHE_CONSULTAS_ATIVO": "0"}
+        processo, porta = iniciar_servidor(banco, args.workers, pasta, ambiente)
+        try:
+            _, corpo = requisitar(porta, "GET", "/api/v1/stats/overview")
+            todos = cenarios(json.loads(corpo)["total_livros"])
+            rotas = [todos[nome] for nome in ROTAS_LEITURA]
+
+            def gerar(aleatorio):
+                return aleatorio.choice(rotas)(aleatorio)
+
+            executar_cenario(porta, gerar, args.workers, 0, None, args.tempo_limite, args.semente)
+
+            for fase in ("sem carga", "durante a carga"):
+                contexto = multiprocessing.get_context("spawn")
+                iniciada, parar, recargas = contexto.Event(), contexto.Event(), contexto.Value("i", 0)
+                recarga = None
+                if fase == "durante a carga":
+                    recarga = contexto.Process(target=recarregar_continuamente, args=(url, perfil, iniciada, parar, recargas))
+                    recarga.start()
+                    iniciada.wait()
+
+                latencias, erros, tempo = executar_cenario(
+                    porta, gerar, args.concorrencia, args.duracao, None, args.tempo_limite, args.semente,
+                )
+
+                if recarga is not None:
+                    parar.set()
+                    recarga.join()
+                    if recarga.exitcode != 0:
+                        raise RuntimeError(f"A recarga do catálogo falhou (código {recarga.exitcode}).")
+
+                latencias.sort()
+                resultados[fase] = {
+                    "vazao": len(latencias) / tempo,
+                    "p50_ms": percentil(latencias, 50) * 1000,
+                    "p95_ms": percentil(latencias, 95) * 1000,
+                    "p99_ms": percentil(latencias, 99) * 1000,
+                    "maximo_ms": latencias[-1] * 1000,
+                    "erros": erros,
+                    "recargas": recargas.value,
+                }
+        finally:
+            processo.send_signal(signal.SIGTERM)
+            processo.wait(timeout=30)
+
+    return resultados
+
+
+def main():
+    """
+    Compara os perfis de banco de api/database.py pela vazão e latência das
+    leituras da API com e sem uma recarga do catálogo em andamento. Sem --banco,
+    cada perfil usa a sua cópia de um catálogo sintético.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark de leituras da API durante a recarga do catálogo.")
+    parser.add_argument("--banco", help="URL de um banco descartável (ex.: PostgreSQL). O catálogo é recarregado e restaurado.")
+    parser.add_argument("--livros", type=int, default=100_000, help="Tamanho do catálogo sintético (sem --banco).")
+    parser.add_argument("--perfis", nargs="+", default=["padrao", "auto"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--duracao", type=float, default=15, help="Segundos de leitura em cada fase.")
+    parser.add_argument("--tempo-limite", type=float, default=30, help="Tempo máximo (em segundos) de cada requisição.")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        if args.banco is None:
+            from benchmarks.catalogo_sintetico import criar_catalogo
+
+            modelo_catalogo = os.path.join(pasta, "catalogo.db")
+            criar_catalogo(modelo_catalogo, args.livros, args.semente).dispose()
+
+        print(f"{'perfil':<11} {'fase':<16} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} "
+              f"{'máx. (ms)':>10} {'erros':>6} {'recargas':>9}")
+        for perfil in args.perfis:
+            banco = args.banco
+            if banco is None:
+                banco = os.path.join(pasta, f"catalogo_{perfil}.db")
+                shutil.copyfile(modelo_catalogo, banco)
+
+            for fase, r in medir_perfil(banco, perfil, args).items():
+                print(f"{perfil:<11} {fase:<16} {r['vazao']:>8.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                      f"{r['p99_ms']:>9.1f} {r['maximo_ms']:>10.1f} {r['erros']:>6} {r['recargas']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, jsonify
+from sqlalchemy.orm import sessionmaker
+from api.modelo import Livro
+from api.schemas import SchemaLivro
+from api.serializacao import query_livros, serializar_livros
+from benchmarks.catalogo_sintetico import criar_catalogo
+
+
+def caminho_antigo(db):
+    """
+    Caminho original: objetos do ORM, validação do Pydantic, model_dump e jsonify.
+    """
+    livros = db.query(Livro).order_by(Livro.id).all()
+    livros_serializado = [SchemaLivro.model_validate(livro) for livro in livros]
+    resultado = [livro.model_dump() for livro in livros_serializado]
+    return jsonify(resultado).get_data()
+
+
+def caminho_rapido(db):
+    """
+    Caminho rápido: tuplas das colunas codificadas diretamente em JSON.
+    """
+    linhas = query_livros(db).order_by(Livro.id).all()
+    return f"{serializar_livros(linhas)}\n".encode("utf-8")
+
+
+def medir(funcao, db, repeticoes):
+    """
+    Retorna o menor tempo (em segundos) entre as repetições e a última saída gerada.
+    """
+    melhor = float("inf")
+    saida = None
+    for _ in range(repeticoes):
+        db.expunge_all()
+        inicio = time.perf_counter()
+        saida = funcao(db)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, saida
+
+
+def main():
+    """
+    Compara os caminhos de serialização antigo e rápido para 1k, 100k e 1M linhas.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark da serialização das listas de livros.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+
+    print(f"{'linhas':>10} {'antigo (s)':>12} {'rápido (s)':>12} {'ganho':>8} {'bytes iguais':>14}")
+    for total in args.tamanhos:
+        with tempfile.TemporaryDirectory() as pasta:
+            engine = criar_catalogo(os.path.join(pasta, "bench.db"), total)
+            db = sessionmaker(bind=engine)()
+
+            with app.app_context():
+                tempo_antigo, saida_antiga = medir(caminho_antigo, db, args.repeticoes)
+                tempo_rapido, saida_rapida = medir(caminho_rapido, db, args.repeticoes)
+
+            db.close()
+            engine.dispose()
+
+        print(f"{total:>10} {tempo_antigo:>12.4f} {tempo_rapido:>12.4f} {tempo_antigo / tempo_rapido:>7.1f}x {str(saida_antiga == saida_rapida):>14}")
+
+
+if __name__ == "__main__":
+    main()
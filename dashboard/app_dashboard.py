@@ -12,22 +12,55 @@ st.set_page_config(
 )
 API_BASE_URL = "https://turetto-api-livros-3a30130b990d.herokuapp.com/"
 
+# Respostas já recebidas, indexadas pela URL e parâmetros, para revalidar com ETag
+if "respostas_api" not in st.session_state:
+    st.session_state.respostas_api = {}
+
+def get_json(url, params=None):
+    """
+    Faz um GET condicional (If-None-Match) e reaproveita a resposta anterior
+    quando a API responde 304. Retorna a tupla (dados, cabecalhos).
+    """
+    chave = (url, tuple(sorted((params or {}).items())))
+    anterior = st.session_state.respostas_api.get(chave)
+
+    headers = {"If-None-Match": anterior["etag"]} if anterior else {}
+    response = requests.get(url, params=params, headers=headers)
+
+    if response.status_code == 304 and anterior:
+        return anterior["dados"], anterior["cabecalhos"]
+
+    response.raise_for_status()  # lança um erro para status ruins (4xx ou 5xx)
+    dados = response.json()
+    cabecalhos = dict(response.headers)
+
+    if response.headers.get("ETag"):
+        st.session_state.respostas_api[chave] = {"etag": response.headers["ETag"], "dados": dados, "cabecalhos": cabecalhos}
+
+    return dados, cabecalhos
+
 def get_stats_overview():
     """Busca as estatísticas gerais da API."""
     try:
-        response = requests.get(f"{API_BASE_URL}/api/v1/stats/overview")
-        response.raise_for_status()  # lança um erro para status ruins (4xx ou 5xx)
-        return response.json()
+        dados, _ = get_json(f"{API_BASE_URL}/api/v1/stats/overview")
+        return dados
     except requests.exceptions.RequestException as e:
         st.error(f"Erro ao buscar estatísticas gerais: {e}")
         return None
 
 def get_all_books():
-    """Busca todos os livros da API."""
+    """Busca todos os livros da API, percorrendo as páginas pelo cursor."""
     try:
-        response = requests.get(f"{API_BASE_URL}/api/v1/books")
-        response.raise_for_status()
-        return response.json()
+        livros = []
+        params = {"limit": 1000}
+        while True:
+            pagina, cabecalhos = get_json(f"{API_BASE_URL}/api/v1/books", params=dict(params))
+            livros.extend(pagina)
+
+            proximo_cursor = cabecalhos.get("X-Next-Cursor")
+            if not proximo_cursor:
+                return livros
+            params["cursor"] = proximo_cursor
     except requests.exceptions.RequestException as e:
         st.error(f"Erro ao buscar a lista de livros: {e}")
         return None
@@ -0,0 +1,35 @@
+import os
+
+# Configuração do gunicorn usada pelo Procfile. A porta ($PORT) e a quantidade
+# de workers ($WEB_CONCURRENCY) seguem os padrões do próprio gunicorn.
+
+# Importa a aplicação uma única vez no master; os workers são criados por fork
+# e compartilham o código e o modelo já carregados (copy-on-write)
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+
+def on_starting(server):
+    # Os contadores começam do zero a cada inicialização do servidor
+    from api.metricas import metricas
+    metricas.limpar()
+
+
+def when_ready(server):
+    # Com preload_app, roda no master depois da importação da aplicação e antes do fork dos workers
+    if preload_app:
+        from api.app import aquecer
+        aquecer()
+
+
+def post_fork(server, worker):
+    # Conexões abertas no master não podem ser usadas pelos workers
+    if preload_app:
+        from api.database import engine, engines_leitura
+        for engine_do_master in (engine, *engines_leitura):
+            engine_do_master.dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Grava as métricas do worker que está saindo, para que continuem nos totais
+    from api.metricas import metricas
+    metricas.gravar()
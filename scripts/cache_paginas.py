@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import tempfile
+import threading
+
+# Configurações do cache de páginas do scraper
+CACHE_CAMINHO = os.environ.get("SCRAPER_CACHE_CAMINHO", os.path.join(tempfile.gettempdir(), "scraper_paginas_cache.db"))
+CACHE_TAMANHO_MAXIMO = int(os.environ.get("SCRAPER_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+
+class CachePaginas:
+    """
+    Cache LRU das páginas baixadas pelo scraper, guardado em um arquivo SQLite.
+
+    Cada entrada guarda o HTML comprimido, os validadores HTTP (ETag e
+    Last-Modified) usados nas requisições condicionais e os registros já
+    extraídos da página, para que uma página inalterada não precise ser
+    processada de novo. Ao ultrapassar o tamanho máximo, as páginas acessadas
+    há mais tempo são removidas.
+    """
+
+    def __init__(self, caminho=CACHE_CAMINHO, tamanho_maximo=CACHE_TAMANHO_MAXIMO):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self._local = threading.local()
+
+    def _conexao(self):
+        # Cada thread do scraper abre a sua própria conexão
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        conn = sqlite3.connect(self.caminho, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS paginas ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, corpo BLOB NOT NULL, "
+            "resultados TEXT NOT NULL, tamanho INTEGER NOT NULL, ultimo_acesso REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_paginas_ultimo_acesso ON paginas (ultimo_acesso)")
+
+        self._local.conn = conn
+        return conn
+
+    def obter(self, url):
+        """
+        Retorna a entrada da página (etag, last_modified, corpo e resultados) ou
+        None se ela não estiver no cache.
+        """
+        conn = self._conexao()
+        linha = conn.execute(
+            "SELECT etag, last_modified, corpo, resultados FROM paginas WHERE url = ?", (url,)
+        ).fetchone()
+        if linha is None:
+            return None
+
+        conn.execute("UPDATE paginas SET ultimo_acesso = ? WHERE url = ?", (time.time(), url))
+        return {
+            "etag": linha[0],
+            "last_modified": linha[1],
+            "corpo": zlib.decompress(linha[2]).decode("utf-8"),
+            "resultados": json.loads(linha[3]),
+        }
+
+    def guardar(self, url, etag, last_modified, corpo, resultados):
+        """
+        Guarda a página baixada e os registros extraídos dela, removendo as
+        páginas menos usadas recentemente até caber no tamanho máximo.
+        """
+        corpo = zlib.compress(corpo.encode("utf-8"))
+        resultados = json.dumps(resultados, separators=(",", ":"))
+        tamanho = len(corpo) + len(resultados)
+        if tamanho > self.tamanho_maximo:
+            return
+
+        conn = self._conexao()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO paginas (url, etag, last_modified, corpo, resultados, tamanho, ultimo_acesso) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, corpo, resultados, tamanho, time.time()),
+            )
+
+            tamanho_total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM paginas").fetchone()[0]
+            if tamanho_total > self.tamanho_maximo:
+                antigas = conn.execute(
+                    "SELECT url, tamanho FROM paginas WHERE url <> ? ORDER BY ultimo_acesso", (url,)
+                )
+                remover = []
+                for url_antiga, tamanho_antiga in antigas:
+                    if tamanho_total <= self.tamanho_maximo:
+                        break
+                    remover.append((url_antiga,))
+                    tamanho_total -= tamanho_antiga
+                conn.executemany("DELETE FROM paginas WHERE url = ?", remover)
+
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    def guardar_resultados(self, url, resultados):
+        """
+        Atualiza apenas os registros extraídos de uma página que já está no cache.
+        """
+        resultados = json.dumps(resultados, separators=(",", ":"))
+        self._conexao().execute(
+            "UPDATE paginas SET resultados = ?, tamanho = length(corpo) + ? WHERE url = ?",
+            (resultados, len(resultados), url),
+        )
@@ -0,0 +1,33 @@
+import os
+import sys
+import argparse
+
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.ml import registro_modelos, ARQUIVO_INFERENCIA
+
+
+def main(argv=None):
+    """
+    Gera o arquivo inferencia.npz das versões do modelo a partir dos artefatos
+    do scikit-learn. Sem versões informadas, compila as que ainda não o têm.
+    """
+    parser = argparse.ArgumentParser(description="Compila as versões do modelo para a inferência da API.")
+    parser.add_argument('versoes', nargs='*', help="Versões a compilar (ex.: v1 v2).")
+    args = parser.parse_args(argv)
+
+    versoes = args.versoes or [
+        versao for versao in registro_modelos.versoes()
+        if not os.path.isfile(os.path.join(registro_modelos.pasta, versao, ARQUIVO_INFERENCIA))
+    ]
+    if not versoes:
+        print("Todas as versões já estão compiladas.")
+        return
+
+    for versao in versoes:
+        print(f"Versão '{versao}' compilada em: {registro_modelos.compilar(versao)}")
+
+
+if __name__ == "__main__":
+    main()
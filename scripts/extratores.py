@@ -0,0 +1,297 @@
+import os
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+# Backend de extração usado pelo scraper quando nenhum é informado
+EXTRATOR_PADRAO = os.environ.get("SCRAPER_PARSER", "rapido")
+
+
+class ExtratorBS4:
+    """
+    Extração original: monta a árvore completa da página com o BeautifulSoup e
+    procura os elementos com find/find_all.
+    """
+
+    def livros(self, html, url_pagina, base_url):
+        soup = BeautifulSoup(html, 'html.parser')
+
+        livros = []
+        for livro in soup.find_all('article', class_='product_pod'):
+            preco = livro.find('p', class_='price_color').text
+            livros.append({
+                'titulo': livro.h3.a['title'],
+                'preco': float(preco.replace('£', '')),
+                'avaliacao': livro.find('p', class_='star-rating')['class'][1],
+                'disponibilidade': livro.find('p', class_='instock availability').text.strip(),
+                'url_imagem': urljoin(base_url, livro.find('img')['src']), # juntando com a URL base
+                'url_detalhe': urljoin(url_pagina, livro.h3.a['href'])
+            })
+
+        # procura pelo link da próxima página
+        url_proxima = None
+        next_li = soup.find('li', class_='next')
+        if next_li and next_li.a and next_li.a['href']:
+            url_proxima = urljoin(url_pagina, next_li.a['href'])
+
+        return livros, url_proxima
+
+    def categorias(self, html, url_pagina):
+        soup = BeautifulSoup(html, 'html.parser')
+        lateral = soup.find('div', class_='side_categories')
+        if lateral is None or lateral.ul is None or lateral.ul.li is None or lateral.ul.li.ul is None:
+            return []
+
+        return [
+            (link.text.strip(), urljoin(url_pagina, link['href']))
+            for link in lateral.ul.li.ul.find_all('a')
+        ]
+
+    def categoria(self, html):
+        try:
+            soup_categoria = BeautifulSoup(html, 'html.parser')
+            return soup_categoria.find('ul', class_='breadcrumb').find_all('li')[2].a.text
+        except (AttributeError, IndexError):
+            return "N/A"
+
+
+# Elementos HTML sem tag de fechamento
+ELEMENTOS_VAZIOS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'
+}
+
+
+class _FimDaExtracao(Exception):
+    """
+    Interrompe o parser assim que os elementos procurados foram lidos.
+    """
+
+
+class _ParserPorNivel(HTMLParser):
+    """
+    Base dos parsers do backend rápido. Mantém a pilha de elementos abertos
+    (fechando os que ficaram sem tag de fechamento) e chama abrir/fechar com o
+    nível de cada elemento, sem montar nenhuma árvore.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.pilha = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ELEMENTOS_VAZIOS:
+            self.vazio(tag, attrs)
+            return
+        self.pilha.append(tag)
+        self.abrir(tag, attrs, (attrs.get('class') or '').split(), len(self.pilha))
+
+    def handle_startendtag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in ELEMENTOS_VAZIOS:
+            self.vazio(tag, attrs)
+        else:
+            self.handle_starttag(tag, attrs.items())
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self.pilha:
+            return
+        while self.pilha:
+            nivel = len(self.pilha)
+            aberta = self.pilha.pop()
+            self.fechar(aberta, nivel)
+            if aberta == tag:
+                return
+
+    def vazio(self, tag, attrs):
+        pass
+
+    def abrir(self, tag, attrs, classes, nivel):
+        pass
+
+    def fechar(self, tag, nivel):
+        pass
+
+    def extrair(self, html):
+        try:
+            self.feed(html)
+            self.close()
+        except _FimDaExtracao:
+            pass
+        return self
+
+
+class _ParserListagem(_ParserPorNivel):
+    """
+    Lê de uma página de listagem os campos de cada article.product_pod, o link
+    da próxima página e o índice de categorias da barra lateral.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.livros = []
+        self.proxima = None
+        self.categorias = []
+
+        self._livro = None
+        self._campo = None
+        self._texto = None
+
+        # Nível em que foi aberto cada elemento de interesse
+        self._nivel_livro = self._nivel_h3 = self._nivel_campo = None
+        self._nivel_next = None
+        self._nivel_lateral = self._nivel_lista = self._nivel_grupo = self._nivel_subgrupo = self._nivel_link = None
+
+        # Elementos que o BeautifulSoup encontraria com find (apenas o primeiro de cada)
+        self._next_visto = self._lateral_vista = False
+        self._link = None
+
+    def handle_data(self, data):
+        if self._texto is not None:
+            self._texto.append(data)
+
+    def vazio(self, tag, attrs):
+        if tag == 'img' and self._livro is not None and 'img' not in self._livro:
+            self._livro['img'] = attrs['src']
+
+    def abrir(self, tag, attrs, classes, nivel):
+        livro = self._livro
+
+        if livro is not None:
+            if tag == 'h3' and self._nivel_h3 is None and 'h3' not in livro:
+                self._nivel_h3 = nivel
+                livro['h3'] = True
+            elif tag == 'a' and self._nivel_h3 is not None and 'titulo' not in livro:
+                livro['titulo'] = attrs['title']
+                livro['href'] = attrs['href']
+            elif tag == 'p' and self._nivel_campo is None:
+                if 'price_color' in classes and 'preco' not in livro:
+                    self._iniciar_campo('preco', nivel)
+                elif 'star-rating' in classes and 'avaliacao' not in livro:
+                    livro['avaliacao'] = classes[1]
+                elif attrs.get('class') == 'instock availability' and 'disponibilidade' not in livro:
+                    self._iniciar_campo('disponibilidade', nivel)
+            return
+
+        if tag == 'article' and 'product_pod' in classes:
+            self._livro = {}
+            self._nivel_livro = nivel
+
+        elif tag == 'li' and 'next' in classes and not self._next_visto:
+            self._next_visto = True
+            self._nivel_next = nivel
+        elif tag == 'a' and self._nivel_next is not None and self.proxima is None:
+            self.proxima = attrs.get('href') or ''
+
+        elif tag == 'div' and 'side_categories' in classes and not self._lateral_vista:
+            self._lateral_vista = True
+            self._nivel_lateral = nivel
+        elif self._nivel_lateral is not None:
+            if tag == 'ul' and self._nivel_lista is None:
+                self._nivel_lista = nivel
+            elif tag == 'li' and self._nivel_lista is not None and self._nivel_grupo is None:
+                self._nivel_grupo = nivel
+            elif tag == 'ul' and self._nivel_grupo is not None and self._nivel_subgrupo is None:
+                self._nivel_subgrupo = nivel
+            elif tag == 'a' and self._nivel_subgrupo is not None and self._nivel_link is None:
+                self._nivel_link = nivel
+                self._link = attrs['href']
+                self._texto = []
+
+    def _iniciar_campo(self, campo, nivel):
+        self._nivel_campo = nivel
+        self._campo = campo
+        self._texto = []
+
+    def fechar(self, tag, nivel):
+        if nivel == self._nivel_campo:
+            self._livro[self._campo] = ''.join(self._texto)
+            self._nivel_campo = self._texto = None
+        elif nivel == self._nivel_h3:
+            self._nivel_h3 = None
+        elif nivel == self._nivel_livro:
+            self.livros.append(self._livro)
+            self._livro = self._nivel_livro = None
+        elif nivel == self._nivel_next:
+            self._nivel_next = None
+        elif nivel == self._nivel_link:
+            self.categorias.append((''.join(self._texto).strip(), self._link))
+            self._nivel_link = self._texto = None
+        elif nivel in (self._nivel_subgrupo, self._nivel_grupo, self._nivel_lista, self._nivel_lateral):
+            # Apenas o primeiro grupo de categorias é lido, como no BeautifulSoup
+            self._nivel_lateral = None
+
+
+class _ParserBreadcrumb(_ParserPorNivel):
+    """
+    Lê o texto do link do terceiro item do primeiro ul.breadcrumb e interrompe
+    a leitura da página logo em seguida.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.categoria = "N/A"
+        self._nivel_breadcrumb = self._nivel_item = None
+        self._itens = 0
+        self._texto = None
+
+    def handle_data(self, data):
+        if self._texto is not None:
+            self._texto.append(data)
+
+    def abrir(self, tag, attrs, classes, nivel):
+        if self._nivel_breadcrumb is None:
+            if tag == 'ul' and 'breadcrumb' in classes:
+                self._nivel_breadcrumb = nivel
+        elif tag == 'li':
+            self._itens += 1
+            if self._itens == 3:
+                self._nivel_item = nivel
+        elif tag == 'a' and self._nivel_item is not None and self._texto is None:
+            self._texto = []
+
+    def fechar(self, tag, nivel):
+        if tag == 'a' and self._texto is not None:
+            self.categoria = ''.join(self._texto)
+            raise _FimDaExtracao
+        if nivel in (self._nivel_item, self._nivel_breadcrumb):
+            raise _FimDaExtracao
+
+
+class ExtratorRapido:
+    """
+    Extração com o HTMLParser da biblioteca padrão: percorre a página uma única
+    vez guardando apenas os campos usados pelo scraper, sem montar a árvore do
+    documento. Nas páginas de detalhe, a leitura para no breadcrumb.
+    """
+
+    def livros(self, html, url_pagina, base_url):
+        parser = _ParserListagem().extrair(html)
+
+        livros = [
+            {
+                'titulo': livro['titulo'],
+                'preco': float(livro['preco'].replace('£', '')),
+                'avaliacao': livro['avaliacao'],
+                'disponibilidade': livro['disponibilidade'].strip(),
+                'url_imagem': urljoin(base_url, livro['img']),
+                'url_detalhe': urljoin(url_pagina, livro['href'])
+            }
+            for livro in parser.livros
+        ]
+        url_proxima = urljoin(url_pagina, parser.proxima) if parser.proxima else None
+        return livros, url_proxima
+
+    def categorias(self, html, url_pagina):
+        parser = _ParserListagem().extrair(html)
+        return [(nome, urljoin(url_pagina, href)) for nome, href in parser.categorias]
+
+    def categoria(self, html):
+        return _ParserBreadcrumb().extrair(html).categoria
+
+
+EXTRATORES = {
+    'bs4': ExtratorBS4(),
+    'rapido': ExtratorRapido(),
+}
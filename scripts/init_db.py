@@ -1,5 +1,65 @@
-from api.database import engine, Base_tabela
-from api.modelo import Livro
+from sqlalchemy import inspect, text, update
+from api.database import engine, Base_tabela, SessionLocal
+from api.modelo import Livro, EstatisticaGeral, VersaoCatalogo
+from api.busca import criar_indice_busca
+from api.agregados import avaliacao_numerica, recalcular_agregados
+from api.cache import incrementar_versao_catalogo
+from api.ml import modelos_disponiveis, reclassificar_livros
+
+def aplicar_migracoes():
+    """
+    Adiciona às tabelas já existentes as colunas e os índices novos dos modelos,
+    para atualizar bancos criados por versões anteriores sem perder os dados.
+    Também preenche o que a API lê pronto e que esses bancos ainda não têm:
+    clusters, tabelas de estatísticas e versão do catálogo.
+    """
+    inspetor = inspect(engine)
+
+    with engine.begin() as conn:
+        for tabela in Base_tabela.metadata.sorted_tables:
+            if not inspetor.has_table(tabela.name):
+                continue
+
+            colunas_existentes = {coluna["name"] for coluna in inspetor.get_columns(tabela.name)}
+            for coluna in tabela.columns:
+                if coluna.name not in colunas_existentes:
+                    tipo = coluna.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {tabela.name} ADD COLUMN {coluna.name} {tipo}"))
+                    print(f"Coluna '{tabela.name}.{coluna.name}' adicionada.")
+
+            for indice in tabela.indexes:
+                indice.create(bind=conn, checkfirst=True)
+
+        # Livros carregados antes da criação da coluna 'avaliacao_num'
+        if inspetor.has_table(Livro.__tablename__):
+            preenchidos = conn.execute(
+                update(Livro)
+                .where(Livro.avaliacao_num.is_(None))
+                .values(avaliacao_num=avaliacao_numerica(Livro.avaliacao))
+            ).rowcount
+            if preenchidos:
+                print(f"Coluna 'livros.avaliacao_num' preenchida em {preenchidos} livros.")
+
+    if not inspetor.has_table(Livro.__tablename__):
+        return
+
+    db = SessionLocal()
+    try:
+        # Livros carregados antes da criação da coluna 'cluster'
+        classificados = reclassificar_livros(db, apenas_pendentes=True) if modelos_disponiveis() else 0
+        if classificados:
+            print(f"Coluna 'livros.cluster' preenchida em {classificados} livros.")
+
+        # Bancos criados antes das tabelas de estatísticas e da versão do catálogo
+        sem_agregados = db.get(EstatisticaGeral, 1) is None
+        if classificados or sem_agregados:
+            recalcular_agregados(db)
+            print("Tabelas de estatísticas calculadas.")
+        if classificados or sem_agregados or db.get(VersaoCatalogo, 1) is None:
+            print(f"Versão do catálogo atualizada para {incrementar_versao_catalogo(db)}.")
+        db.commit()
+    finally:
+        db.close()
 
 def criar_banco_de_dados():
     """
@@ -8,7 +68,13 @@ def criar_banco_de_dados():
 
     print("Criando tabela no banco de dados...")    
     Base_tabela.metadata.create_all(bind=engine)
+    aplicar_migracoes()
     print("Tabelas criadas com sucesso.")
 
+    print("Criando índice de busca por título...")
+    with engine.begin() as conn:
+        criar_indice_busca(conn)
+    print("Índice de busca criado com sucesso.")
+
 if __name__ == "__main__":    
     criar_banco_de_dados()
\ No newline at end of file
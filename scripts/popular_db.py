@@ -1,41 +1,224 @@
+import io
 import csv
+import time
+from itertools import islice
+from sqlalchemy import Table, Column, Integer, String, Float, MetaData, Index
+from sqlalchemy import select, insert, update, delete, exists, and_, or_, func, text
 from api.database import SessionLocal
-from api.modelo import Livro
+from api.modelo import Livro, EstatisticaGeral, VersaoCatalogo
+from api.cache import incrementar_versao_catalogo
+from api.busca import reconstruir_indice_busca
+from api.agregados import recalcular_agregados, avaliacao_numerica
+from api.ml import modelos_disponiveis, reclassificar_livros
+
+# Quantidade de linhas enviadas por vez para a tabela de staging
+TAMANHO_LOTE_CARGA = 5_000
+
+# Colunas com os dados de um livro, na ordem do CSV
+CAMPOS_LIVRO = ['titulo', 'preco', 'avaliacao', 'disponibilidade', 'categoria', 'url_imagem']
+
+# Chave natural usada para comparar a carga nova com os livros já existentes
+CHAVE_NATURAL = ['titulo', 'url_imagem']
+
+# Tabela temporária que recebe a carga antes da comparação com a tabela 'livros'
+metadata_staging = MetaData()
+livros_staging = Table(
+    'livros_staging', metadata_staging,
+    Column('ordem', Integer, primary_key=True, autoincrement=False),
+    Column('titulo', String(255), nullable=False),
+    Column('preco', Float, nullable=False),
+    Column('avaliacao', String(50)),
+    Column('disponibilidade', String(100)),
+    Column('categoria', String(50)),
+    Column('url_imagem', String(500)),
+    Index('ix_livros_staging_chave', *CHAVE_NATURAL),
+    prefixes=['TEMPORARY'],
+)
+
+
+def converter_linha(row):
+    """
+    Converte uma linha do CSV para os tipos da tabela 'livros'.
+    """
+    return {
+        'titulo': row['titulo'],
+        'preco': float(row['preco']),
+        'avaliacao': row['avaliacao'],
+        'disponibilidade': row['disponibilidade'],
+        'categoria': row['categoria'],
+        'url_imagem': row['url_imagem']
+    }
+
+
+def _copiar_lote_postgres(conn, lote):
+    """
+    Envia um lote para a tabela de staging com COPY, bem mais rápido que INSERTs no PostgreSQL.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for linha in lote:
+        writer.writerow([linha['ordem']] + [linha[campo] for campo in CAMPOS_LIVRO])
+    buffer.seek(0)
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY livros_staging (ordem, {', '.join(CAMPOS_LIVRO)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def inserir_staging(conn, registros, ao_gravar_lote=None):
+    """
+    Grava os registros na tabela de staging em lotes (COPY no PostgreSQL e
+    executemany nos demais bancos). Retorna a quantidade de linhas gravadas.
+    """
+    total = 0
+    registros = iter(registros)
+
+    while True:
+        lote = [dict(registro, ordem=total + i) for i, registro in enumerate(islice(registros, TAMANHO_LOTE_CARGA))]
+        if not lote:
+            return total
+
+        if conn.dialect.name == 'postgresql':
+            _copiar_lote_postgres(conn, lote)
+        else:
+            conn.execute(insert(livros_staging), lote)
+
+        total += len(lote)
+        if ao_gravar_lote:
+            ao_gravar_lote(len(lote))
+
+
+def aplicar_diferencas(conn):
+    """
+    Compara a staging com a tabela 'livros' pela chave natural e aplica apenas
+    as exclusões, atualizações e inserções necessárias.
+    Retorna um dicionário com a quantidade de linhas de cada operação.
+    """
+    staging = livros_staging.c
+    mesma_chave = and_(*(getattr(Livro, campo) == staging[campo] for campo in CHAVE_NATURAL))
+
+    # Mantém apenas a primeira ocorrência de cada chave natural da carga
+    primeiras = select(func.min(staging.ordem)).group_by(*(staging[campo] for campo in CHAVE_NATURAL))
+    conn.execute(delete(livros_staging).where(staging.ordem.not_in(primeiras)))
+
+    excluidos = conn.execute(
+        delete(Livro).where(~exists().where(mesma_chave))
+    ).rowcount
+
+    campos_alteraveis = [campo for campo in CAMPOS_LIVRO if campo not in CHAVE_NATURAL]
+    atualizados = conn.execute(
+        update(Livro)
+        .where(mesma_chave)
+        .where(or_(*(getattr(Livro, campo).is_distinct_from(staging[campo]) for campo in campos_alteraveis)))
+        .values({
+            **{campo: staging[campo] for campo in campos_alteraveis},
+            'avaliacao_num': avaliacao_numerica(staging['avaliacao']),
+            'cluster': None,
+        })
+    ).rowcount
+
+    inseridos = conn.execute(
+        insert(Livro).from_select(
+            CAMPOS_LIVRO + ['avaliacao_num'],
+            select(*(staging[campo] for campo in CAMPOS_LIVRO), avaliacao_numerica(staging['avaliacao']))
+            .where(~exists().where(mesma_chave))
+            .order_by(staging.ordem)
+        )
+    ).rowcount
+
+    return {'inseridos': inseridos, 'atualizados': atualizados, 'excluidos': excluidos}
+
+
+def estado_derivado_pendente(db):
+    """
+    Indica se falta algum dado derivado dos livros: estatísticas, versão do
+    catálogo ou clusters (quando há modelo carregado). É o caso de bancos
+    criados antes dessas tabelas e colunas, que devem ser completados mesmo
+    por uma carga sem alterações nos livros.
+    """
+    if not db.query(exists().where(EstatisticaGeral.id == 1)).scalar():
+        return True
+    if not db.query(exists().where(VersaoCatalogo.id == 1)).scalar():
+        return True
+    return modelos_disponiveis() and db.query(exists().where(Livro.cluster.is_(None))).scalar()
+
+
+def carregar_livros(db, registros, ao_gravar_lote=None):
+    """
+    Carrega os registros na tabela 'livros' de forma incremental e atômica.
+
+    Os registros vão para uma tabela de staging e só as diferenças são aplicadas.
+    Índice de busca, clusters, agregados e versão do catálogo são atualizados
+    na mesma transação, de modo que a API nunca vê o catálogo vazio ou parcial.
+    Uma carga sem alterações não faz mais nada, a menos que falte algum desses
+    dados (estado_derivado_pendente). O commit fica a cargo de quem chama.
+    Retorna o resumo da carga.
+    """
+    conn = db.connection()
+    if conn.dialect.name == 'postgresql':
+        # A carga é uma única transação longa; o limite de tempo das consultas vale apenas para a API
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+
+    # No SQLite, o CREATE da tabela temporária não entra na transação: após uma
+    # carga desfeita, a tabela continua na conexão e é recriada aqui
+    livros_staging.drop(bind=conn, checkfirst=True)
+    livros_staging.create(bind=conn)
+
+    recebidos = inserir_staging(conn, registros, ao_gravar_lote)
+    resumo = aplicar_diferencas(conn)
+    livros_staging.drop(bind=conn)
+
+    resumo['recebidos'] = recebidos
+    resumo['versao'] = None
+
+    alterado = resumo['inseridos'] or resumo['atualizados'] or resumo['excluidos']
+    if not alterado and not estado_derivado_pendente(db):
+        return resumo
+
+    reconstruir_indice_busca(conn)
+
+    if modelos_disponiveis():
+        resumo['classificados'] = reclassificar_livros(db, apenas_pendentes=True)
+    else:
+        print("AVISO: Modelos de ML não carregados. A coluna 'cluster' ficará vazia.")
+
+    recalcular_agregados(db)
+    resumo['versao'] = incrementar_versao_catalogo(db)
+    return resumo
+
 
 def main():
     """
-    Lê os dados do arquivo livros.csv e os insere na tabela 'livros'
+    Lê os dados do arquivo livros.csv e atualiza a tabela 'livros'
     no banco de dados 'livraria'
     """
     print("Iniciando a população do banco de dados...")
-       
+    inicio = time.perf_counter()
+
     db = SessionLocal()
     
     try:    
         with open('data/livros.csv', mode='r', encoding='utf-8') as file:            
             reader = csv.DictReader(file)
-
-            db.query(Livro).delete()
+            resumo = carregar_livros(db, (converter_linha(row) for row in reader))
             db.commit()
-            print("Tabela 'livros' limpa.")
-            
-            livros_para_adicionar = []
-            for row in reader:                
-                livro_obj = Livro(
-                    titulo=row['titulo'],
-                    preco=float(row['preco']),
-                    avaliacao=row['avaliacao'],
-                    disponibilidade=row['disponibilidade'],
-                    categoria=row['categoria'],
-                    url_imagem=row['url_imagem']
-                )
-                livros_para_adicionar.append(livro_obj)
-                        
-            db.add_all(livros_para_adicionar)     
-            db.commit()            
-            
-            total_livros = db.query(Livro).count()
-            print(f"Banco de dados populado com sucesso! Total de livros: {total_livros}")
+
+        print(
+            f"Carga concluída em {time.perf_counter() - inicio:.2f}s: {resumo['recebidos']} livros lidos, "
+            f"{resumo['inseridos']} inseridos, {resumo['atualizados']} atualizados, {resumo['excluidos']} excluídos."
+        )
+        if resumo['versao'] is None:
+            print("Nenhuma alteração no catálogo.")
+        else:
+            print(f"Versão do catálogo atualizada para {resumo['versao']}.")
+
+        total_livros = db.query(Livro).count()
+        print(f"Banco de dados populado com sucesso! Total de livros: {total_livros}")
 
     except Exception as e:
         print(f"Ocorreu um erro: {e}")        
@@ -45,4 +228,4 @@ def main():
         print("Sessão fechada.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,13 +1,27 @@
 import os
+import sys
+import argparse
 import joblib
 import pandas as pd
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 
-def main():
+# Adicionar o diretório raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.ml import registro_modelos, ARQUIVO_MODELO, ARQUIVO_SCALER
+
+def main(argv=None):
     """
     Função para treinar o modelo de clusterização e salvar os modelos para uso na API.
+
+    Cada treino gera uma nova versão em models/<versão>. Com --promover, a versão
+    passa a ser servida pela API sem reinício.
     """
+    parser = argparse.ArgumentParser(description="Treina o modelo K-Means e salva uma nova versão.")
+    parser.add_argument('--promover', action='store_true',
+                        help="Coloca a nova versão em produção (arquivo models/ATUAL).")
+    args = parser.parse_args(argv)
 
     try:
         df = pd.read_csv('data/livros.csv')
@@ -32,18 +46,28 @@ def main():
     kmeans.fit(features_scaled)
     print("Modelo K-Means treinado com sucesso.")
 
-    # Criar a pasta para armazenar os modelos
-    output_dir = 'models'
+    # Criar a pasta da nova versão do modelo
+    versao = registro_modelos.proxima_versao()
+    output_dir = os.path.join(registro_modelos.pasta, versao)
     os.makedirs(output_dir, exist_ok=True)
 
-    model_path = os.path.join(output_dir, 'kmeans_model.joblib')
-    scaler_path = os.path.join(output_dir, 'scaler.joblib')
+    model_path = os.path.join(output_dir, ARQUIVO_MODELO)
+    scaler_path = os.path.join(output_dir, ARQUIVO_SCALER)
 
+    # Sem compressão, para que a API possa mapear os arrays do disco (mmap_mode)
     joblib.dump(kmeans, model_path)
     joblib.dump(scaler, scaler_path)
 
     print(f"Modelo salvo em: {model_path}")
     print(f"Scaler salvo em: {scaler_path}")
+    print(f"Arrays de inferência salvos em: {registro_modelos.compilar(versao)}")
+
+    if args.promover:
+        registro_modelos.promover(versao)
+        print(f"Versão '{versao}' em produção. Os workers da API passam a usá-la em alguns segundos.")
+        print("Para reclassificar os livros do banco com a nova versão, use POST /api/v1/admin/models/reload.")
+    else:
+        print(f"Para colocar a versão '{versao}' em produção, use POST /api/v1/admin/models/reload com {{\"versao\": \"{versao}\"}}.")
     print("\nTreinamento concluído!")
 
 if __name__ == "__main__":
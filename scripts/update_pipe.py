@@ -1,33 +1,235 @@
 import sys
 import os
-import subprocess
+import csv
+import time
+import queue
+import argparse
+import threading
 
 # Adicionar o diretório raiz do projeto ao sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from api.database import SessionLocal
+from api.modelo import Livro
+from api.jobs import RelatorioJob, adquirir_trava, trava_no_banco
+from scripts.cache_paginas import CachePaginas
+from scripts.popular_db import carregar_livros
+from scripts.extratores import EXTRATORES, EXTRATOR_PADRAO
+from scripts.webscraper import (
+    ESTRATEGIAS, BASE_URL, CABECALHO_CSV, CONCORRENCIA_PADRAO, TAXA_PADRAO, ClienteHTTP, usar_extrator
+)
+
+# Livros que podem aguardar na fila entre a coleta e a gravação no banco
+TAMANHO_FILA = 2_000
+
+_FIM_DA_COLETA = object()
+
+
+class ColetaIncompleta(Exception):
+    """
+    A coleta terminou sem conseguir baixar todas as páginas de listagem e de
+    detalhe, ou sem nenhum livro.
+    """
+
+
+def _colocar(fila, item, parar):
+    """
+    Coloca o item na fila, esperando enquanto ela estiver cheia.
+    Retorna False se o consumidor tiver desistido da coleta.
+    """
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produzir(registros, fila, parar):
+    """
+    Executa a coleta em uma thread própria, enviando os livros para a fila.
+    Erros da coleta são repassados ao consumidor pela própria fila.
+    """
+    try:
+        for registro in registros:
+            if not _colocar(fila, registro, parar):
+                return
+    except Exception as e:
+        _colocar(fila, e, parar)
+    finally:
+        _colocar(fila, _FIM_DA_COLETA, parar)
+
+
+def _consumir(fila):
+    """
+    Gera os livros recebidos da coleta até o fim da fila.
+    """
+    while True:
+        item = fila.get()
+        if item is _FIM_DA_COLETA:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def _acompanhar(registros, cliente, relatorio):
+    """
+    Repassa os livros adiante, reportando o progresso da coleta ao job. Ao fim
+    da coleta, o job passa para a fase de carga (diferenças, índices e agregados).
+    """
+    coletados = 0
+    for registro in registros:
+        coletados += 1
+        relatorio.atualizar(livros_coletados=coletados, paginas_baixadas=cliente.requisicoes)
+        yield registro
+
+    relatorio.fase('carga', livros_coletados=coletados, paginas_baixadas=cliente.requisicoes)
+
+
+def _gravar_csv(registros, writer):
+    """
+    Repassa os livros adiante, gravando cada um também no CSV.
+    """
+    for registro in registros:
+        writer.writerow(registro)
+        yield registro
+
+
 # Criando função para orquestrar atualização do pipeline
-def run_pipeline():
+def run_pipeline(estrategia='detalhe', concorrencia=CONCORRENCIA_PADRAO, taxa=TAXA_PADRAO,
+                 base_url=BASE_URL, saida_csv=None, usar_cache=True, job_id=None):
     """
-    Executa o pipeline completo: scraping e depois população do banco.
+    Executa o pipeline completo em um único processo: os livros coletados pelo
+    scraper passam por uma fila limitada direto para a carga incremental do
+    banco, que grava em lotes enquanto a coleta continua. O CSV é opcional.
+
+    A carga só é confirmada se a coleta terminar completa. Com job_id, a fase e
+    o progresso são gravados no job correspondente. Retorna True em caso de sucesso.
     """
-    python_executable = sys.executable
+    print("\n--- INICIANDO PIPELINE DE ATUALIZAÇÃO DE DADOS ---")
+    inicio = time.perf_counter()
+    relatorio = RelatorioJob(job_id) if job_id else None
+    if relatorio:
+        relatorio.iniciar()
+
+    cliente = ClienteHTTP(concorrencia, taxa, cache=CachePaginas() if usar_cache else None)
+    fila = queue.Queue(maxsize=TAMANHO_FILA)
+    parar = threading.Event()
+    coleta = threading.Thread(
+        target=_produzir,
+        args=(ESTRATEGIAS[estrategia](base_url, concorrencia, taxa, cliente=cliente), fila, parar),
+        name="coleta",
+        daemon=True,
+    )
+
+    arquivo_csv = None
+    registros = _consumir(fila)
+    if relatorio:
+        registros = _acompanhar(registros, cliente, relatorio)
+    if saida_csv:
+        # O CSV é gravado em um arquivo temporário e só substitui o anterior se o pipeline terminar bem
+        arquivo_csv = open(f"{saida_csv}.tmp", mode='w', newline='', encoding='utf-8')
+        writer = csv.DictWriter(arquivo_csv, fieldnames=CABECALHO_CSV)
+        writer.writeheader()
+        registros = _gravar_csv(registros, writer)
+
+    gravados = 0
+
+    def ao_gravar_lote(quantidade):
+        nonlocal gravados
+        gravados += quantidade
+        print(f"[CARGA] {gravados} livros enviados ao banco ({time.perf_counter() - inicio:.1f}s).")
+        if relatorio:
+            relatorio.atualizar(livros_gravados=gravados)
+
+    db = SessionLocal()
     try:
-        print("\n--- INICIANDO PIPELINE DE ATUALIZAÇÃO DE DADOS ---")
-
-        # 1. Executa o Web Scraper 
-        print("\n[PASSO 1/2] Executando o Web Scraper (Isso pode demorar)...")        
-        subprocess.run([python_executable, "-m", "scripts.webscraper"], check=True)
-        print("[PASSO 1/2] Web Scraper concluído com sucesso.")
-        
-        # 2. Executa a Carga no Banco 
-        print("\n[PASSO 2/2] Executando a carga no banco de dados...")
-        subprocess.run([python_executable, "-m", "scripts.popular_db"], check=True)
-        print("[PASSO 2/2] Carga no banco de dados concluída com sucesso.")
-        
-        print("\n--- PIPELINE FINALIZADO COM SUCESSO ---")
-        
+        print(f"\n[COLETA + CARGA] Estratégia '{estrategia}', {concorrencia} conexões, até {taxa:g} requisições/s.")
+        coleta.start()
+        resumo = carregar_livros(db, registros, ao_gravar_lote)
+
+        if cliente.falhas:
+            raise ColetaIncompleta(f"{cliente.falhas} página(s) de listagem ou de detalhe não puderam ser baixadas")
+        if not resumo['recebidos']:
+            raise ColetaIncompleta("nenhum livro foi coletado")
+
+        db.commit()
+
+        if arquivo_csv:
+            arquivo_csv.close()
+            os.replace(f"{saida_csv}.tmp", saida_csv)
+            print(f"Dados salvos em '{saida_csv}'.")
+
+        print(
+            f"Carga concluída: {resumo['recebidos']} livros coletados, {resumo['inseridos']} inseridos, "
+            f"{resumo['atualizados']} atualizados, {resumo['excluidos']} excluídos."
+        )
+        print(f"Requisições realizadas: {cliente.requisicoes} ({cliente.nao_modificadas} páginas não modificadas).")
+        print(f"Total de livros no banco: {db.query(Livro).count()}")
+        print(f"\n--- PIPELINE FINALIZADO COM SUCESSO EM {time.perf_counter() - inicio:.1f}s ---")
+        if relatorio:
+            relatorio.finalizar(
+                True, paginas_baixadas=cliente.requisicoes, livros_coletados=resumo['recebidos'],
+                livros_gravados=resumo['recebidos'], inseridos=resumo['inseridos'],
+                atualizados=resumo['atualizados'], excluidos=resumo['excluidos'],
+            )
+        return True
+
     except Exception as e:
+        db.rollback()
         print(f"\n ERRO NO PIPELINE: {e} ")
+        print("Nenhuma alteração foi aplicada ao banco de dados.")
+        if relatorio:
+            relatorio.finalizar(False, f"{e}. Nenhuma alteração foi aplicada ao banco de dados.",
+                                paginas_baixadas=cliente.requisicoes)
+        return False
+
+    finally:
+        parar.set()
+        coleta.join(timeout=5)
+        cliente.fechar()
+        db.close()
+        if arquivo_csv and not arquivo_csv.closed:
+            arquivo_csv.close()
+            os.remove(f"{saida_csv}.tmp")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline de atualização: coleta do site e carga no banco.")
+    parser.add_argument('--estrategia', choices=list(ESTRATEGIAS), default='detalhe',
+                        help="Estratégia de coleta do scraper.")
+    parser.add_argument('--concorrencia', type=int, default=CONCORRENCIA_PADRAO,
+                        help="Quantidade de requisições simultâneas.")
+    parser.add_argument('--taxa', type=float, default=TAXA_PADRAO,
+                        help="Máximo de requisições por segundo em cada host.")
+    parser.add_argument('--base-url', default=BASE_URL, help="URL do site.")
+    parser.add_argument('--csv', nargs='?', const='data/livros.csv', default=None,
+                        help="Também grava os livros coletados em CSV (padrão: data/livros.csv).")
+    parser.add_argument('--sem-cache', action='store_true', help="Não usa o cache de páginas do scraper.")
+    parser.add_argument('--parser', choices=list(EXTRATORES), default=EXTRATOR_PADRAO,
+                        help="Backend de extração do HTML usado pelo scraper.")
+    parser.add_argument('--job-id', default=None,
+                        help="Job registrado pela API; fora do PostgreSQL, a trava de execução única é herdada do processo da API.")
+    args = parser.parse_args(argv)
+    usar_extrator(args.parser)
+
+    # Execuções manuais (e, no PostgreSQL, também os jobs da API) obtêm a trava
+    # aqui; ela é liberada quando o processo termina
+    trava = None
+    if args.job_id is None or trava_no_banco():
+        trava = adquirir_trava()
+        if trava is None:
+            print("Já existe um pipeline de atualização em execução.")
+            if args.job_id is not None:
+                RelatorioJob(args.job_id).finalizar(False, "Já existe um pipeline de atualização em execução.")
+            sys.exit(1)
+
+    sucesso = run_pipeline(args.estrategia, args.concorrencia, args.taxa, args.base_url, args.csv,
+                           not args.sem_cache, args.job_id)
+    sys.exit(0 if sucesso else 1)
+
 
 if __name__ == "__main__":
-    run_pipeline()
\ No newline at end of file
+    main()
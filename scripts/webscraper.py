@@ -1,115 +1,507 @@
+import os
 import csv
-import requests
-import random
 import time
-from bs4 import BeautifulSoup 
-from urllib.parse import urljoin
-
-def main():
-    # Configurações do script
-    BASE_URL = "https://books.toscrape.com/"
-    next_page_url = "catalogue/page-1.html"
-
-    USER_AGENTS = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.1 Safari/605.1.15',
-        'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/111.0'
-    ]
-
-    # Lista para armazenar os dados
+import random
+import argparse
+import threading
+import requests
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import urljoin, urlparse
+from scripts.cache_paginas import CachePaginas, CACHE_CAMINHO
+from scripts.extratores import EXTRATORES, EXTRATOR_PADRAO
+
+# Configurações do script
+BASE_URL = os.environ.get("SCRAPER_BASE_URL", "https://books.toscrape.com/")
+PAGINA_INICIAL = "catalogue/page-1.html"
+PAGINA_INDICE = "index.html"
+ARQUIVO_SAIDA = 'data/livros.csv'
+CABECALHO_CSV = ['titulo', 'preco', 'avaliacao', 'disponibilidade', 'categoria', 'url_imagem']
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/109.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.1 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/111.0'
+]
+
+# Versão das funções de extração: alterá-la descarta os registros extraídos guardados no cache de páginas
+VERSAO_EXTRACAO = 1
+
+# Padrões do modo concorrente: requisições simultâneas e requisições por segundo em cada host
+CONCORRENCIA_PADRAO = 8
+TAXA_PADRAO = 5.0
+
+# Livros aguardando a página de detalhe, por thread, antes de a coleta esperar o consumidor
+JANELA_POR_THREAD = 4
+
+
+def cabecalhos_aleatorios():
+    """
+    Retorna os cabeçalhos HTTP com um User-Agent sorteado.
+    """
+    return {'User-Agent': random.choice(USER_AGENTS)}
+
+
+# Extração dos dados das páginas, delegada ao backend escolhido (veja scripts/extratores.py)
+extrator = EXTRATORES[EXTRATOR_PADRAO]
+
+
+def usar_extrator(nome):
+    """
+    Define o backend de extração usado pelo scraper ('rapido' ou 'bs4').
+    """
+    global extrator
+    extrator = EXTRATORES[nome]
+
+
+def extrair_livros(html, url_pagina, base_url):
+    """
+    Extrai os livros de uma página de listagem.
+
+    Retorna a tupla (livros, url_proxima_pagina). Cada livro traz os campos do
+    CSV, exceto a categoria, e a chave 'url_detalhe' com a página do livro.
+    """
+    return extrator.livros(html, url_pagina, base_url)
+
+
+def extrair_categorias(html, url_pagina):
+    """
+    Extrai o índice de categorias da barra lateral do site.
+
+    Retorna a lista de tuplas (nome, url) na ordem em que aparecem, sem a
+    categoria geral 'Books'.
+    """
+    return extrator.categorias(html, url_pagina)
+
+
+def extrair_categoria(html):
+    """
+    Extrai a categoria do livro a partir do breadcrumb da página de detalhe.
+    """
+    return extrator.categoria(html)
+
+
+# Controle de taxa e conexões do modo concorrente
+class LimitadorTaxa:
+    """
+    Token bucket por host: cada host recebe no máximo 'taxa' requisições por
+    segundo, permitindo rajadas de até 'capacidade' requisições.
+    """
+
+    def __init__(self, taxa, capacidade=None):
+        self.taxa = taxa
+        self.capacidade = capacidade or max(1.0, taxa)
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def aguardar(self, url):
+        """
+        Bloqueia a thread até existir uma ficha disponível para o host da URL.
+        """
+        host = urlparse(url).netloc
+
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                fichas, atualizado_em = self._baldes.get(host, (self.capacidade, agora))
+                fichas = min(self.capacidade, fichas + (agora - atualizado_em) * self.taxa)
+
+                if fichas >= 1:
+                    self._baldes[host] = (fichas - 1, agora)
+                    return
+
+                self._baldes[host] = (fichas, agora)
+                espera = (1 - fichas) / self.taxa
+
+            time.sleep(espera)
+
+
+def criar_sessao(tamanho_pool):
+    """
+    Cria uma sessão HTTP com pool de conexões reaproveitáveis e novas tentativas
+    automáticas para erros temporários do servidor.
+    """
+    tentativas = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool, max_retries=tentativas)
+
+    sessao = requests.Session()
+    sessao.mount('http://', adaptador)
+    sessao.mount('https://', adaptador)
+    return sessao
+
+
+class ClienteHTTP:
+    """
+    Sessão HTTP compartilhada pelas threads da coleta, com o limitador de taxa e
+    a contagem de requisições feitas.
+
+    Com um CachePaginas, as páginas já baixadas são pedidas com requisições
+    condicionais (If-None-Match / If-Modified-Since) e, quando o servidor
+    responde 304, os registros extraídos na execução anterior são reaproveitados.
+    """
+
+    def __init__(self, concorrencia=CONCORRENCIA_PADRAO, taxa=TAXA_PADRAO, cache=None):
+        self.sessao = criar_sessao(concorrencia)
+        self.limitador = LimitadorTaxa(taxa)
+        self.cache = cache
+        self.requisicoes = 0
+        self.nao_modificadas = 0
+        self.reaproveitadas = 0
+        self.falhas = 0
+        self._lock = threading.Lock()
+
+    def _contar(self, contador):
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def registrar_falha(self):
+        """
+        Registra uma página de listagem ou de detalhe que não pôde ser baixada,
+        indicando que a coleta terminou incompleta.
+        """
+        self._contar('falhas')
+
+    def _requisitar(self, url, headers=None):
+        self.limitador.aguardar(url)
+        self._contar('requisicoes')
+
+        response = self.sessao.get(url, headers={**cabecalhos_aleatorios(), **(headers or {})}, timeout=15)
+        response.encoding = 'utf-8'
+        response.raise_for_status()
+        return response
+
+    def baixar(self, url):
+        """
+        Baixa a página respeitando o limite de taxa e retorna o HTML.
+        """
+        return self._requisitar(url).text
+
+    def extrair(self, url, funcao, *args, revalidar=True):
+        """
+        Baixa a página e aplica a função de extração funcao(html, *args).
+
+        Retorna a tupla (resultado, inalterada). Com revalidar=False, uma página
+        que já está no cache é reaproveitada sem nenhuma requisição.
+        """
+        if self.cache is None:
+            return funcao(self.baixar(url), *args), False
+
+        extracao = f"{funcao.__name__}:{VERSAO_EXTRACAO}"
+        entrada = self.cache.obter(url)
+
+        if entrada is not None and not revalidar and extracao in entrada['resultados']:
+            self._contar('reaproveitadas')
+            return entrada['resultados'][extracao], True
+
+        headers = {}
+        if entrada is not None:
+            if entrada['etag']:
+                headers['If-None-Match'] = entrada['etag']
+            if entrada['last_modified']:
+                headers['If-Modified-Since'] = entrada['last_modified']
+
+        response = self._requisitar(url, headers)
+
+        if response.status_code == 304 and entrada is not None:
+            self._contar('nao_modificadas')
+            if extracao not in entrada['resultados']:
+                entrada['resultados'][extracao] = funcao(entrada['corpo'], *args)
+                self.cache.guardar_resultados(url, entrada['resultados'])
+            return entrada['resultados'][extracao], True
+
+        resultado = funcao(response.text, *args)
+        self.cache.guardar(
+            url,
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            response.text,
+            {extracao: resultado},
+        )
+        return resultado, False
+
+    def fechar(self):
+        self.sessao.close()
+
+
+# Estratégias de coleta
+def raspar_sequencial(base_url):
+    """
+    Coleta original: uma requisição por vez, com pausas fixas entre elas.
+    """
     dados_livros = []
+    next_page_url = urljoin(base_url, PAGINA_INICIAL)
 
-    # Web Scrapping
     while next_page_url:
-
-        # Constrói a URL completa
-        url_completa = urljoin(BASE_URL, next_page_url)
+        url_completa = next_page_url
         print(f"Extração em: {url_completa}")
 
-        random_user_agent = random.choice(USER_AGENTS)
-        headers = {'User-Agent': random_user_agent}
-        
+        headers = cabecalhos_aleatorios()
+
         try:
             response = requests.get(url_completa, headers=headers, timeout=10)
             response.encoding = 'utf-8'
             response.raise_for_status()
             time.sleep(1)
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            livros = soup.find_all('article', class_='product_pod')
+            livros, next_page_url = extrair_livros(response.text, url_completa, base_url)
 
             if not livros:
                 print("Nenhum livro encontrado nesta página.")
                 break
 
             for livro in livros:
-                titulo = livro.h3.a['title']
-                preco = livro.find('p', class_='price_color').text
-                preco = float(preco.replace('£', ''))
-                avaliacao = livro.find('p', class_='star-rating')['class'][1]
-                disponibilidade = livro.find('p', class_='instock availability').text.strip()                        
-                url_imagem = urljoin(BASE_URL, livro.find('img')['src']) # juntando com a URL base
-
                 # Adicionando a busca pela categoria do livro
-                url_categoria = urljoin(url_completa, livro.h3.a['href'])
-
-                response_categoria = requests.get(url_categoria, headers=headers, timeout=15)
-                response.encoding = 'utf-8'
-
-                try:
-                    soup_categoria = BeautifulSoup(response_categoria.text, 'html.parser')
-                    categoria = soup_categoria.find('ul', class_='breadcrumb').find_all('li')[2].a.text
-                    
-                except (AttributeError, IndexError):
-                    categoria = "N/A"
-
-                # Adiciona os dados a lista
-                dados_livros.append({
-                    'titulo': titulo,
-                    'preco': preco,
-                    'avaliacao': avaliacao,
-                    'disponibilidade': disponibilidade,
-                    'categoria': categoria,
-                    'url_imagem': url_imagem
-                })
+                response_categoria = requests.get(livro.pop('url_detalhe'), headers=headers, timeout=15)
+                response_categoria.encoding = 'utf-8'
+                livro['categoria'] = extrair_categoria(response_categoria.text)
+
+                dados_livros.append(livro)
                 time.sleep(0.5)
 
-            # procura pelo link da próxima página
-            next_li = soup.find('li', class_='next')
-            if next_li and next_li.a and next_li.a['href']:
-                next_page_url = urljoin(url_completa, next_li.a['href'])
-            else:
+            if not next_page_url:
                 print("Fim da paginação.")
-                next_page_url = None
 
         except requests.exceptions.RequestException as e:
             print(f"Erro ao acessar a página {url_completa}: {e}")
             break
 
+    return dados_livros
+
+
+def iterar_livros_concorrente(base_url, concorrencia=CONCORRENCIA_PADRAO, taxa=TAXA_PADRAO, cliente=None):
+    """
+    Coleta concorrente: as páginas de listagem são percorridas em sequência e as
+    páginas de detalhe são baixadas em paralelo por um pool de threads, com uma
+    única sessão HTTP e o limitador de taxa no lugar das pausas fixas.
+
+    Gera os livros na mesma ordem da coleta sequencial, à medida que ficam
+    prontos. No máximo JANELA_POR_THREAD * concorrencia livros aguardam a
+    categoria ao mesmo tempo, de modo que um consumidor lento desacelera a coleta.
+    """
+    cliente = cliente or ClienteHTTP(concorrencia, taxa)
+    limite_pendentes = JANELA_POR_THREAD * concorrencia
+
+    def buscar_categoria(url_detalhe, revalidar):
+        try:
+            return cliente.extrair(url_detalhe, extrair_categoria, revalidar=revalidar)[0]
+        except requests.exceptions.RequestException as e:
+            print(f"Erro ao acessar a página {url_detalhe}: {e}")
+            cliente.registrar_falha()
+            return "N/A"
+
+    pendentes = deque()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        next_page_url = urljoin(base_url, PAGINA_INICIAL)
+
+        while next_page_url:
+            url_completa = next_page_url
+            print(f"Extração em: {url_completa}")
+
+            try:
+                (livros, next_page_url), inalterada = cliente.extrair(url_completa, extrair_livros, url_completa, base_url)
+            except requests.exceptions.RequestException as e:
+                print(f"Erro ao acessar a página {url_completa}: {e}")
+                cliente.registrar_falha()
+                break
+
+            if not livros:
+                print("Nenhum livro encontrado nesta página.")
+                break
+
+            # Se a listagem não mudou, a categoria dos seus livros é reaproveitada do cache sem nova requisição
+            for livro in livros:
+                pendentes.append((livro, executor.submit(buscar_categoria, livro.pop('url_detalhe'), not inalterada)))
+
+                while len(pendentes) > limite_pendentes:
+                    livro_pronto, futuro = pendentes.popleft()
+                    livro_pronto['categoria'] = futuro.result()
+                    yield livro_pronto
+
+            if not next_page_url:
+                print("Fim da paginação.")
+
+        while pendentes:
+            livro_pronto, futuro = pendentes.popleft()
+            livro_pronto['categoria'] = futuro.result()
+            yield livro_pronto
+
+
+def iterar_livros_por_categoria(base_url, concorrencia=CONCORRENCIA_PADRAO, taxa=TAXA_PADRAO, cliente=None):
+    """
+    Coleta pelas páginas de categoria: lê o índice de categorias da página
+    inicial e percorre a listagem de cada categoria, atribuindo a categoria a
+    todos os livros encontrados. Não baixa as páginas de detalhe, o que reduz o
+    número de requisições em cerca de 20 vezes.
+
+    As categorias são percorridas em paralelo (no máximo 'concorrencia' por vez)
+    e os livros saem agrupados por categoria, na ordem do índice do site.
+    """
+    cliente = cliente or ClienteHTTP(concorrencia, taxa)
+
+    def raspar_categoria(nome, url_categoria):
+        livros_categoria = []
+        next_page_url = url_categoria
+
+        while next_page_url:
+            url_completa = next_page_url
+            print(f"Extração em: {url_completa}")
+
+            try:
+                (livros, next_page_url), _ = cliente.extrair(url_completa, extrair_livros, url_completa, base_url)
+            except requests.exceptions.RequestException as e:
+                print(f"Erro ao acessar a página {url_completa}: {e}")
+                cliente.registrar_falha()
+                break
+
+            for livro in livros:
+                del livro['url_detalhe']
+                livro['categoria'] = nome
+                livros_categoria.append(livro)
+
+        return livros_categoria
+
+    url_indice = urljoin(base_url, PAGINA_INDICE)
+    try:
+        categorias, _ = cliente.extrair(url_indice, extrair_categorias, url_indice)
+    except requests.exceptions.RequestException as e:
+        print(f"Erro ao acessar a página {url_indice}: {e}")
+        cliente.registrar_falha()
+        return
+
+    if not categorias:
+        print("Nenhuma categoria encontrada no índice.")
+        return
+
+    pendentes = deque()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        for nome, url in categorias:
+            pendentes.append(executor.submit(raspar_categoria, nome, url))
+
+            if len(pendentes) > concorrencia:
+                yield from pendentes.popleft().result()
+
+        while pendentes:
+            yield from pendentes.popleft().result()
+
+    print("Fim da paginação.")
+
+
+def chave_registro(livro):
+    """
+    Representação de um registro do CSV usada para comparar as estratégias.
+    """
+    return tuple(str(livro[campo]) for campo in CABECALHO_CSV)
+
+
+def comparar_estrategias(base_url, concorrencia=CONCORRENCIA_PADRAO, taxa=TAXA_PADRAO):
+    """
+    Executa as duas estratégias de coleta e imprime um relatório com o número de
+    requisições, o tempo de cada uma e as diferenças entre os registros (a
+    ordem das linhas não é considerada). Retorna True se os registros forem os mesmos.
+    """
+    resultados = {}
+    for estrategia, raspar in ESTRATEGIAS.items():
+        cliente = ClienteHTTP(concorrencia, taxa)
+        inicio = time.perf_counter()
+        dados_livros = list(raspar(base_url, concorrencia, taxa, cliente=cliente))
+        resultados[estrategia] = (dados_livros, cliente.requisicoes, time.perf_counter() - inicio)
+        cliente.fechar()
+
+    print("-" * 30)
+    print(f"{'estratégia':<12} {'livros':>8} {'requisições':>12} {'tempo (s)':>10}")
+    for estrategia, (dados_livros, requisicoes, tempo) in resultados.items():
+        print(f"{estrategia:<12} {len(dados_livros):>8} {requisicoes:>12} {tempo:>10.1f}")
+
+    registros_detalhe = Counter(chave_registro(livro) for livro in resultados['detalhe'][0])
+    registros_categoria = Counter(chave_registro(livro) for livro in resultados['categoria'][0])
+    apenas_detalhe = registros_detalhe - registros_categoria
+    apenas_categoria = registros_categoria - registros_detalhe
+
+    for titulo, diferencas in (("detalhe", apenas_detalhe), ("categoria", apenas_categoria)):
+        for registro in list(diferencas.elements())[:10]:
+            print(f"Somente na estratégia {titulo}: {dict(zip(CABECALHO_CSV, registro))}")
+
+    iguais = not apenas_detalhe and not apenas_categoria
+    print(f"Registros idênticos: {'sim' if iguais else 'não'}")
+    return iguais
+
+
+ESTRATEGIAS = {
+    'detalhe': iterar_livros_concorrente,
+    'categoria': iterar_livros_por_categoria,
+}
+
+
+def salvar_csv(dados_livros, output_file=ARQUIVO_SAIDA):
+    """
+    Grava os livros extraídos no CSV usado pela carga do banco.
+    """
+    with open(output_file, mode='w', newline='', encoding='utf-8') as file:
+        # Criar um escritor
+        writer = csv.DictWriter(file, fieldnames=CABECALHO_CSV)
+
+        writer.writeheader()
+        writer.writerows(dados_livros)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Web scraper do site Books to Scrape.")
+    parser.add_argument('--estrategia', choices=list(ESTRATEGIAS), default='detalhe',
+                        help="'detalhe' lê a categoria na página de cada livro (padrão); "
+                             "'categoria' percorre as listagens de cada categoria, sem as páginas de detalhe.")
+    parser.add_argument('--modo', choices=['concorrente', 'sequencial'], default='concorrente',
+                        help="Coleta concorrente (padrão) ou a coleta sequencial original (apenas na estratégia 'detalhe').")
+    parser.add_argument('--comparar', action='store_true',
+                        help="Executa as duas estratégias e verifica se produzem os mesmos registros, sem gravar o CSV.")
+    parser.add_argument('--concorrencia', type=int, default=CONCORRENCIA_PADRAO,
+                        help="Quantidade de requisições simultâneas no modo concorrente.")
+    parser.add_argument('--taxa', type=float, default=TAXA_PADRAO,
+                        help="Máximo de requisições por segundo em cada host no modo concorrente.")
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help="URL do site (ex.: um servidor local com páginas salvas).")
+    parser.add_argument('--saida', default=ARQUIVO_SAIDA, help="Arquivo CSV de saída.")
+    parser.add_argument('--parser', choices=list(EXTRATORES), default=EXTRATOR_PADRAO,
+                        help="Backend de extração do HTML: 'rapido' (padrão) ou 'bs4' (árvore completa do BeautifulSoup).")
+    parser.add_argument('--cache', default=CACHE_CAMINHO,
+                        help="Arquivo do cache de páginas usado nas requisições condicionais.")
+    parser.add_argument('--sem-cache', action='store_true',
+                        help="Baixa e processa todas as páginas novamente, sem usar o cache.")
+    args = parser.parse_args(argv)
+    usar_extrator(args.parser)
+
+    if args.comparar:
+        iguais = comparar_estrategias(args.base_url, args.concorrencia, args.taxa)
+        raise SystemExit(0 if iguais else 1)
+
+    inicio = time.perf_counter()
+
+    # Web Scrapping
+    if args.estrategia == 'detalhe' and args.modo == 'sequencial':
+        dados_livros = raspar_sequencial(args.base_url)
+    else:
+        cache = None if args.sem_cache else CachePaginas(args.cache)
+        cliente = ClienteHTTP(args.concorrencia, args.taxa, cache=cache)
+        dados_livros = list(ESTRATEGIAS[args.estrategia](args.base_url, args.concorrencia, args.taxa, cliente=cliente))
+        cliente.fechar()
+        print(f"Requisições realizadas: {cliente.requisicoes} "
+              f"({cliente.nao_modificadas} páginas não modificadas, {cliente.reaproveitadas} reaproveitadas sem requisição)")
+
     # Encerrar script e criar csv de saída
     print("-" * 30)
-    print(f"Web Scraping finalizado!")
+    print(f"Web Scraping finalizado em {time.perf_counter() - inicio:.1f}s!")
     print(f"Total de livros extraídos: {len(dados_livros)}")
 
     if dados_livros:
-        print("Salvando tabela em CSV...")            
-        
-        output_file = 'data/livros.csv'    
-        cabecalho = ['titulo', 'preco', 'avaliacao', 'disponibilidade', 'categoria','url_imagem']
-            
-        with open(output_file, mode='w', newline='', encoding='utf-8') as file:
-            # Criar um escritor
-            writer = csv.DictWriter(file, fieldnames=cabecalho)        
-            
-            writer.writeheader()        
-            writer.writerows(dados_livros)
-            
-        print(f"Dados salvos com sucesso em '{output_file}'")
+        print("Salvando tabela em CSV...")
+        salvar_csv(dados_livros, args.saida)
+        print(f"Dados salvos com sucesso em '{args.saida}'")
     else:
         print("Nenhum dado para salvar.")
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+import pytest
+
+# O banco e as configurações da API são lidos na importação dos módulos de api/
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, RAIZ)
+
+PASTA_TESTES = tempfile.mkdtemp(prefix="api_livros_testes_")
+BANCO_TESTES = os.path.join(PASTA_TESTES, "livraria.db")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{BANCO_TESTES}"
+os.environ["DATABASE_READ_URL"] = ""
+os.environ["CACHE_CONSULTAS_ATIVO"] = "0"
+os.environ["MODELOS_DIR"] = os.path.join(RAIZ, "models")
+
+
+@pytest.fixture
+def banco_vazio():
+    """
+    Banco de testes recriado com as tabelas dos modelos, sem dados e sem o índice de busca.
+    """
+    from api.database import engine, Base_tabela
+    import api.modelo  # noqa: F401 (registra as tabelas em Base_tabela)
+
+    engine.dispose()
+    if os.path.exists(BANCO_TESTES):
+        os.remove(BANCO_TESTES)
+    Base_tabela.metadata.create_all(bind=engine)
+    yield
+    engine.dispose()
@@ -0,0 +1,137 @@
+import os
+import csv
+import sqlite3
+from itertools import islice
+import pytest
+from sqlalchemy import func
+from conftest import RAIZ, BANCO_TESTES
+from api.database import SessionLocal, engine
+from api.modelo import Livro, EstatisticaGeral, EstatisticaCategoria, VersaoCatalogo
+from api.ml import modelos_disponiveis
+from scripts.init_db import criar_banco_de_dados
+from scripts.popular_db import carregar_livros, converter_linha
+
+# Esquema da tabela 'livros' nas versões anteriores às colunas e tabelas derivadas
+ESQUEMA_ORIGINAL = """
+CREATE TABLE livros (
+    id INTEGER NOT NULL PRIMARY KEY,
+    titulo VARCHAR(255) NOT NULL,
+    preco FLOAT NOT NULL,
+    avaliacao VARCHAR(50),
+    disponibilidade VARCHAR(100),
+    categoria VARCHAR(50),
+    url_imagem VARCHAR(500)
+);
+CREATE TABLE usuarios (
+    id INTEGER NOT NULL PRIMARY KEY,
+    username VARCHAR(20) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL
+);
+"""
+
+
+def ler_livros(quantidade=100):
+    with open(os.path.join(RAIZ, "data", "livros.csv"), encoding="utf-8") as f:
+        return [converter_linha(row) for row in islice(csv.DictReader(f), quantidade)]
+
+
+@pytest.fixture
+def banco_original():
+    """
+    Banco no formato das versões anteriores, já com os livros carregados.
+    """
+    engine.dispose()
+    if os.path.exists(BANCO_TESTES):
+        os.remove(BANCO_TESTES)
+
+    livros = ler_livros()
+    conn = sqlite3.connect(BANCO_TESTES)
+    conn.executescript(ESQUEMA_ORIGINAL)
+    conn.executemany(
+        "INSERT INTO livros (titulo, preco, avaliacao, disponibilidade, categoria, url_imagem) "
+        "VALUES (:titulo, :preco, :avaliacao, :disponibilidade, :categoria, :url_imagem)",
+        livros,
+    )
+    conn.commit()
+    conn.close()
+    yield livros
+    engine.dispose()
+
+
+def conferir_estado_derivado(db, livros):
+    geral = db.get(EstatisticaGeral, 1)
+    assert geral is not None and geral.total_livros == len(livros)
+    assert db.query(EstatisticaCategoria).count() == len({livro["categoria"] for livro in livros})
+    assert db.get(VersaoCatalogo, 1) is not None
+    if modelos_disponiveis():
+        assert db.query(func.count(Livro.id)).filter(Livro.cluster.is_(None)).scalar() == 0
+
+
+def test_atualizacao_sem_alteracoes_preenche_estado_derivado(banco_original):
+    criar_banco_de_dados()
+
+    db = SessionLocal()
+    try:
+        resumo = carregar_livros(db, banco_original)
+        db.commit()
+
+        assert (resumo["inseridos"], resumo["atualizados"], resumo["excluidos"]) == (0, 0, 0)
+        conferir_estado_derivado(db, banco_original)
+    finally:
+        db.close()
+
+
+def test_carga_sem_alteracoes_nao_altera_versao(banco_original):
+    criar_banco_de_dados()
+
+    db = SessionLocal()
+    try:
+        carregar_livros(db, banco_original)
+        db.commit()
+        versao = db.get(VersaoCatalogo, 1).versao
+
+        resumo = carregar_livros(db, banco_original)
+        db.commit()
+
+        assert resumo["versao"] is None
+        assert db.get(VersaoCatalogo, 1).versao == versao
+    finally:
+        db.close()
+
+
+@pytest.mark.skipif(not modelos_disponiveis(), reason="Sem modelo em produção em models/.")
+def test_init_db_classifica_livros_existentes(banco_original):
+    criar_banco_de_dados()
+
+    db = SessionLocal()
+    try:
+        assert db.query(func.count(Livro.id)).filter(Livro.cluster.is_(None)).scalar() == 0
+    finally:
+        db.close()
+
+
+def test_init_db_calcula_estatisticas_e_versao(banco_original):
+    criar_banco_de_dados()
+
+    db = SessionLocal()
+    try:
+        conferir_estado_derivado(db, banco_original)
+    finally:
+        db.close()
+
+
+def test_carga_apos_carga_desfeita(banco_original):
+    criar_banco_de_dados()
+
+    db = SessionLocal()
+    try:
+        # Várias cargas desfeitas, para passar por todas as conexões do pool
+        for _ in range(3):
+            carregar_livros(db, banco_original[:10])
+            db.rollback()
+
+        resumo = carregar_livros(db, banco_original[:10])
+        db.commit()
+        assert resumo["excluidos"] == len(banco_original) - 10
+    finally:
+        db.close()
@@ -0,0 +1,28 @@
+from sqlalchemy import inspect
+from api.database import SessionLocal, engine
+from api.busca import indice_busca_disponivel, filtrar_por_titulo
+from api.modelo import Livro
+from scripts.popular_db import carregar_livros
+
+LIVROS = [
+    {"titulo": "A Light in the Attic", "preco": 51.77, "avaliacao": "Three", "disponibilidade": "In stock",
+     "categoria": "Poetry", "url_imagem": "https://books.toscrape.com/a.jpg"},
+    {"titulo": "Tipping the Velvet", "preco": 53.74, "avaliacao": "One", "disponibilidade": "In stock",
+     "categoria": "Historical Fiction", "url_imagem": "https://books.toscrape.com/b.jpg"},
+]
+
+
+def test_carga_sem_indice_de_busca_cria_o_indice(banco_vazio):
+    assert not inspect(engine).has_table("livros_fts")
+    assert not indice_busca_disponivel(engine)
+
+    db = SessionLocal()
+    try:
+        carregar_livros(db, LIVROS)
+        db.commit()
+
+        assert indice_busca_disponivel(engine)
+        query, ordenacao = filtrar_por_titulo(db.query(Livro.titulo), "velvet")
+        assert [linha.titulo for linha in query.order_by(*ordenacao)] == ["Tipping the Velvet"]
+    finally:
+        db.close()
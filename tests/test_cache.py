@@ -0,0 +1,39 @@
+from flask import Flask
+from api.database import SessionLocal
+from api.cache import obter_versao_catalogo, incrementar_versao_catalogo, chave_requisicao
+
+app = Flask(__name__)
+
+
+def incrementar():
+    db = SessionLocal()
+    try:
+        versao = incrementar_versao_catalogo(db)
+        db.commit()
+        return versao
+    finally:
+        db.close()
+
+
+def test_versao_lida_a_cada_requisicao(banco_vazio):
+    with app.test_request_context():
+        assert obter_versao_catalogo() == 0
+
+    versao = incrementar()
+
+    with app.test_request_context():
+        assert obter_versao_catalogo() == versao
+        chave = chave_requisicao(obter_versao_catalogo())
+
+        # Dentro da mesma requisição, a versão não muda
+        incrementar()
+        assert obter_versao_catalogo() == versao
+        assert chave_requisicao(obter_versao_catalogo()) == chave
+
+
+def test_chave_muda_com_a_versao(banco_vazio):
+    with app.test_request_context("/livros?b=2&a=1"):
+        chave = chave_requisicao(1)
+    with app.test_request_context("/livros?a=1&b=2"):
+        assert chave_requisicao(1) == chave
+        assert chave_requisicao(2) != chave
@@ -0,0 +1,17 @@
+import pytest
+from api.ml import indice_cluster
+
+
+@pytest.mark.parametrize("valor, esperado", [
+    ("Premium", 2),
+    ("premium", 2),
+    ("2", 2),
+    ("4", 4),
+    ("Destaque", 4),
+    ("9", None),
+    ("²", None),
+    ("-1", None),
+    ("Inexistente", None),
+])
+def test_indice_cluster(valor, esperado):
+    assert indice_cluster(valor) == esperado
@@ -0,0 +1,43 @@
+import base64
+import json
+import pytest
+from flask import Flask
+from werkzeug.exceptions import BadRequest
+from api.modelo import Livro
+from api.paginacao import codificar_cursor, decodificar_cursor
+
+app = Flask(__name__)
+
+
+@pytest.mark.parametrize("colunas, valores", [
+    ([Livro.id], [5]),
+    ([Livro.preco, Livro.id], [20, 5]),
+    ([Livro.preco, Livro.id], [20.5, 5]),
+    ([Livro.titulo, Livro.id], ["A Light in the Attic", 5]),
+])
+def test_cursor_valido(colunas, valores):
+    with app.test_request_context():
+        assert decodificar_cursor(codificar_cursor(valores), colunas) == valores
+
+
+@pytest.mark.parametrize("colunas, valores", [
+    ([Livro.id], [None]),
+    ([Livro.id], ["5"]),
+    ([Livro.id], [5.5]),
+    ([Livro.preco, Livro.id], [{"a": 1}, 5]),
+    ([Livro.preco, Livro.id], ["abc", 5]),
+    ([Livro.preco, Livro.id], [True, 5]),
+    ([Livro.preco, Livro.id], [None, 5]),
+    ([Livro.preco, Livro.id], [20.5, "5"]),
+    ([Livro.titulo, Livro.id], [3, 5]),
+    ([Livro.preco, Livro.id], [20.5]),
+])
+def test_cursor_com_valor_incompativel(colunas, valores):
+    with app.test_request_context(), pytest.raises(BadRequest):
+        decodificar_cursor(codificar_cursor(valores), colunas)
+
+
+def test_cursor_com_numero_infinito():
+    cursor = base64.urlsafe_b64encode(json.dumps([1e999, 5]).encode()).decode()
+    with app.test_request_context(), pytest.raises(BadRequest):
+        decodificar_cursor(cursor, [Livro.preco, Livro.id])
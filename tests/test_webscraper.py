@@ -0,0 +1,109 @@
+import os
+import threading
+from collections import Counter
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import pytest
+from conftest import RAIZ
+from scripts import webscraper
+from scripts.webscraper import (
+    ClienteHTTP, raspar_sequencial, iterar_livros_concorrente, iterar_livros_por_categoria, chave_registro
+)
+
+# Espelho reduzido do books.toscrape.com: 2 páginas de listagem e 40 livros
+PASTA_FIXTURES = os.path.join(RAIZ, "data", "fixtures", "books_toscrape")
+TOTAL_LIVROS = 40
+
+# Página de detalhe que o servidor responde com 404 no teste de falha
+DETALHE_AUSENTE = "/catalogue/a-light-in-the-attic_1000/index.html"
+
+
+class ServidorFixtures(SimpleHTTPRequestHandler):
+    # Caminhos respondidos com 404, mesmo que o arquivo exista
+    ausentes = set()
+
+    def do_GET(self):
+        if self.path in self.ausentes:
+            self.send_error(404)
+            return
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    """
+    Serve a pasta de fixtures em uma porta livre e retorna a URL base do site.
+    """
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), partial(ServidorFixtures, directory=PASTA_FIXTURES))
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}/"
+    servidor.shutdown()
+    servidor.server_close()
+    ServidorFixtures.ausentes = set()
+
+
+def coletar(estrategia, base_url):
+    cliente = ClienteHTTP(concorrencia=4, taxa=1000)
+    try:
+        return list(estrategia(base_url, 4, 1000, cliente=cliente)), cliente.falhas
+    finally:
+        cliente.fechar()
+
+
+def test_coletas_concorrente_e_sequencial_iguais(site, monkeypatch):
+    # A coleta sequencial original faz pausas fixas entre as requisições
+    monkeypatch.setattr(webscraper.time, "sleep", lambda segundos: None)
+
+    sequencial = raspar_sequencial(site)
+    concorrente, falhas = coletar(iterar_livros_concorrente, site)
+
+    assert falhas == 0
+    assert len(concorrente) == TOTAL_LIVROS
+    assert [chave_registro(livro) for livro in concorrente] == [chave_registro(livro) for livro in sequencial]
+    assert all(livro["categoria"] != "N/A" for livro in concorrente)
+
+
+def test_estrategia_por_categoria_com_os_mesmos_registros(site):
+    detalhe, _ = coletar(iterar_livros_concorrente, site)
+    categoria, falhas = coletar(iterar_livros_por_categoria, site)
+
+    assert falhas == 0
+    assert Counter(map(chave_registro, categoria)) == Counter(map(chave_registro, detalhe))
+
+
+def test_falha_na_pagina_de_detalhe_conta_como_falha_da_coleta(site):
+    ServidorFixtures.ausentes = {DETALHE_AUSENTE}
+
+    livros, falhas = coletar(iterar_livros_concorrente, site)
+
+    assert falhas == 1
+    assert len(livros) == TOTAL_LIVROS
+    assert [livro["titulo"] for livro in livros if livro["categoria"] == "N/A"] == ["A Light in the Attic"]
+
+
+def test_pipeline_nao_confirma_coleta_com_falha(site, banco_vazio):
+    from api.database import SessionLocal
+    from api.modelo import Livro
+    from scripts.update_pipe import run_pipeline
+
+    ServidorFixtures.ausentes = {DETALHE_AUSENTE}
+    assert not run_pipeline('detalhe', 4, 1000, site, usar_cache=False)
+
+    db = SessionLocal()
+    try:
+        assert db.query(Livro).count() == 0
+    finally:
+        db.close()
+
+    ServidorFixtures.ausentes = set()
+    assert run_pipeline('detalhe', 4, 1000, site, usar_cache=False)
+
+    db = SessionLocal()
+    try:
+        assert db.query(Livro).count() == TOTAL_LIVROS
+    finally:
+        db.close()